@@ -0,0 +1,135 @@
+"""
+Compare the extraction engines on the pages in benchmarks/corpus: how long each one takes, and how much of the
+page's article (the text of its <article> or articleBody element) it keeps and how much else it lets in.
+
+    uv run python benchmarks/extraction_engines.py --output engines.json
+
+Readability.js is only compared when it's installed for readabilipy, pages without an article are only timed. An
+engine failing on a page is recorded as such, with an f1 of 0 if the page has an article.
+"""
+
+import argparse
+import json
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import lxml.html
+from clipit.core import ClipitError
+from clipit.core.extractor import extract_readable_content_and_title
+
+try:
+    from benchmarks.suite import CORPUS_DIR, best_of, readability_js_installed
+except ModuleNotFoundError:
+    # Run as a script, with benchmarks/ on the path instead of the repository
+    from suite import CORPUS_DIR, best_of, readability_js_installed
+
+# name: (engine, use_readability_js)
+ENGINES = {
+    "lxml": ("lxml", False),
+    "readabilipy": ("readabilipy", False),
+    "readability_js": ("readabilipy", True),
+}
+
+_REFERENCE_XPATH = '//article | //*[@itemprop="articleBody"]'
+
+
+@dataclass
+class Quality:
+    precision: float
+    recall: float
+
+    @property
+    def f1(self) -> float:
+        if not self.precision + self.recall:
+            return 0.0
+        return 2 * self.precision * self.recall / (self.precision + self.recall)
+
+
+def words(html: str) -> Counter:
+    if not html.strip():
+        return Counter()
+    return Counter(re.findall(r"\w+", lxml.html.fromstring(html).text_content().lower()))
+
+
+def reference_words(page_html: str) -> Counter | None:
+    """The words of the page's article, or None if it doesn't mark one."""
+    found = lxml.html.fromstring(page_html).xpath(_REFERENCE_XPATH)
+    if not found:
+        return None
+    return Counter(re.findall(r"\w+", found[0].text_content().lower()))
+
+
+def quality(extracted: Counter, reference: Counter) -> Quality:
+    """How many of the extracted words are the article's (precision) and how many of the article's were extracted."""
+    overlap = sum((extracted & reference).values())
+    return Quality(
+        precision=overlap / sum(extracted.values()) if extracted else 0.0,
+        recall=overlap / sum(reference.values()) if reference else 0.0,
+    )
+
+
+def compare_engines(documents: list[str], repeat: int, engines: list[str]) -> dict:
+    """For each document and engine, the fastest of repeat extractions and, if the page marks its article, quality."""
+    results = {}
+    for document in documents:
+        page_html = (CORPUS_DIR / document).read_text(encoding="utf-8")
+        reference = reference_words(page_html)
+        results[document] = {}
+        for name in engines:
+            engine, use_readability_js = ENGINES[name]
+            try:
+                seconds, (content_html, title) = best_of(
+                    repeat, lambda: extract_readable_content_and_title(page_html, use_readability_js, engine=engine)
+                )
+            except ClipitError as e:
+                result = {"failed": str(e)}
+                if reference is not None:
+                    result.update(precision=0.0, recall=0.0, f1=0.0)
+                results[document][name] = result
+                continue
+
+            result = {"seconds": seconds, "title": title}
+            if reference is not None:
+                score = quality(words(content_html), reference)
+                result.update(asdict(score), f1=score.f1)
+            results[document][name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--documents", nargs="+", default=sorted(p.name for p in CORPUS_DIR.glob("*.html")))
+    args = parser.parse_args()
+
+    engines = ["lxml", "readabilipy"]
+    if readability_js_installed():
+        engines.append("readability_js")
+    else:
+        print(
+            "Readability.js isn't installed for readabilipy, only comparing lxml with readabilipy's Python extraction"
+        )
+
+    results = compare_engines(args.documents, args.repeat, engines)
+
+    print(f"{'document':<20} {'engine':<16} {'time':>10} {'precision':>10} {'recall':>8} {'f1':>6}")
+    for document, by_engine in results.items():
+        for name, result in by_engine.items():
+            scores = (
+                f"{result['precision']:>10.3f} {result['recall']:>8.3f} {result['f1']:>6.3f}"
+                if "f1" in result
+                else f"{'-':>10} {'-':>8} {'-':>6}"
+            )
+            time = f"{result['seconds'] * 1000:>8.1f}ms" if "seconds" in result else f"{'failed':>10}"
+            print(f"{document:<20} {name:<16} {time} {scores}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
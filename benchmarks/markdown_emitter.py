@@ -0,0 +1,53 @@
+"""
+Compare the markdownify + mdformat conversion with the single-pass emitter, per document size.
+
+    uv run python benchmarks/markdown_emitter.py --sizes 10 100 1000 --repeat 5
+"""
+
+import argparse
+import time
+
+from clipit.core.markdown_converter import convert_to_markdown
+
+
+def make_document(paragraphs: int) -> str:
+    body = "".join(
+        f"<h2>Section {p}</h2><p>Paragraph {p} has <strong>bold</strong>, <em>italic</em>, <code>code</code> and "
+        f'<a href="https://example.com/{p}">linked</a> words in it.</p><ul><li>One</li><li>Two</li></ul>'
+        f"<blockquote><p>A quote</p></blockquote><pre>print({p})</pre>"
+        for p in range(paragraphs)
+    )
+    return f"<article>{body}</article>"
+
+
+def best_of(repeat: int, html: str, single_pass: bool) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert_to_markdown(html, single_pass=single_pass)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for paragraphs in args.sizes:
+        html = make_document(paragraphs)
+        if convert_to_markdown(html) != convert_to_markdown(html, single_pass=False):
+            raise SystemExit(f"Outputs differ for {paragraphs} paragraphs")
+
+        two_pass = best_of(args.repeat, html, single_pass=False)
+        single_pass = best_of(args.repeat, html, single_pass=True)
+        print(
+            f"{paragraphs} paragraphs ({len(html) // 1024} KiB): "
+            f"mdformat {two_pass * 1000:.1f}ms, single pass {single_pass * 1000:.1f}ms, "
+            f"{two_pass / single_pass:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
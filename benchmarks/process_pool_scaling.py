@@ -0,0 +1,57 @@
+"""
+Measure how extraction and Markdown conversion scale with the number of worker processes.
+
+    uv run python benchmarks/process_pool_scaling.py --documents 64 --paragraphs 400
+"""
+
+import argparse
+import os
+import time
+
+from clipit.core.dtos import RenderFlags
+from clipit.core.process_pool import create_process_pool, extract_and_convert
+from clipit.grabbers import BaseGrabber
+
+
+def make_document(n: int, paragraphs: int) -> str:
+    body = "".join(
+        f"<h2>Section {p}</h2><p>Paragraph {p} of document {n} has <strong>bold</strong>, <em>italic</em> and "
+        f'<a href="https://example.com/{p}">linked</a> words in it.</p><ul><li>One</li><li>Two</li></ul>'
+        for p in range(paragraphs)
+    )
+    return f"<html><head><title>Document {n}</title></head><body><article>{body}</article></body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=32)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    grabber = BaseGrabber()
+    render_flags = RenderFlags(include_source=False, include_title=True, yaml_frontmatter=False)
+    documents = [make_document(n, args.paragraphs) for n in range(args.documents)]
+
+    def job_args(html):
+        return (grabber, "https://example.com", html, False, "readabilipy", "Untitled", render_flags, True, False)
+
+    start = time.perf_counter()
+    for html in documents:
+        extract_and_convert(*job_args(html))
+    baseline = time.perf_counter() - start
+    print(f"in-process: {baseline:.2f}s ({args.documents / baseline:.1f} docs/s)")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = create_process_pool(workers, readability_workers=1)
+        start = time.perf_counter()
+        list(pool.map(extract_and_convert, *zip(*(job_args(html) for html in documents))))
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+        print(f"{workers} worker(s): {elapsed:.2f}s ({args.documents / elapsed:.1f} docs/s, {baseline / elapsed:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
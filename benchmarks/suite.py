@@ -0,0 +1,225 @@
+"""
+Time every stage of a clip separately over the pages and Reddit threads in benchmarks/corpus, and compare runs so
+a release that makes one of them slower doesn't go unnoticed.
+
+    uv run python benchmarks/suite.py run --output results.json
+    uv run python benchmarks/suite.py compare baseline.json results.json --threshold 0.2
+
+compare exits with 1 when a stage got slower than the baseline by more than the threshold (and by more than
+--min-delta seconds, so the stages that take microseconds don't fail the comparison on noise alone).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from clipit.core import OutputFormat, RenderFlags
+from clipit.core.backends import FileBackend, save_outputs
+from clipit.core.downloader import download_html_content
+from clipit.core.extractor import extract_readable_content_and_title
+from clipit.core.markdown_converter import convert_to_markdown
+from clipit.core.readability_pool import _JS_DIR
+from clipit.core.session import create_session
+from clipit.grabbers import BaseGrabber, RedditGrabber
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+RENDER_FLAGS = RenderFlags(include_source=True, include_title=True, yaml_frontmatter=True)
+
+
+@dataclass
+class Regression:
+    document: str
+    stage: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_corpus(directory: Path = CORPUS_DIR) -> Iterator[str]:
+    """Serve the corpus from a local HTTP server, so the download stage doesn't depend on the internet."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(directory)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def readability_js_installed() -> bool:
+    # Checking for node itself would try to install Readability.js, which needs the network
+    return os.path.exists(os.path.join(_JS_DIR, "node_modules"))
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> tuple[float, Any]:
+    """The fastest of repeat calls, in seconds, and what the last call returned."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _write(title: str, markdown: str, url: str):
+    # The writer reports every file it saves, which would drown out the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_outputs(FileBackend(create_domain_subdir=False), title, {OutputFormat.MD: markdown}, url, overwrite=True)
+
+
+def bench_page(url: str, repeat: int, readability_js: bool) -> dict[str, float]:
+    grabber = BaseGrabber()
+    session = create_session()
+    timings = {}
+
+    timings["download"], html = best_of(repeat, lambda: download_html_content(url, None, session))
+    timings["extract"], (content_html, title) = best_of(
+        repeat, lambda: extract_readable_content_and_title(html, False, url)
+    )
+    if readability_js:
+        timings["extract_readability_js"], _ = best_of(
+            repeat, lambda: extract_readable_content_and_title(html, True, url)
+        )
+    timings["convert"], markdown = best_of(repeat, lambda: convert_to_markdown(content_html))
+    timings["post_process"], markdown = best_of(
+        repeat, lambda: grabber.post_process_markdown(url, title, markdown, RENDER_FLAGS)
+    )
+    timings["output"], _ = best_of(repeat, lambda: _write(title, markdown, url))
+
+    return timings
+
+
+def bench_reddit_thread(url: str, repeat: int) -> dict[str, float]:
+    # Without the "more comments" requests, the corpus is all there is
+    grabber = RedditGrabber(max_more_requests=0)
+    session = create_session()
+    timings = {}
+
+    timings["download"], json_content = best_of(repeat, lambda: grabber.download(url, None, session))
+    timings["extract"], (markdown, title) = best_of(
+        repeat, lambda: grabber.extract(json_content, False, "Untitled", url)
+    )
+    timings["post_process"], markdown = best_of(repeat, lambda: grabber.convert(url, title, markdown, RENDER_FLAGS))
+    timings["output"], _ = best_of(repeat, lambda: _write(title, markdown, url))
+
+    return timings
+
+
+def run_suite(documents: list[str], repeat: int, readability_js: bool) -> dict:
+    """Time every stage for each of the corpus documents, the fastest of repeat runs."""
+    timings = {}
+    with serve_corpus() as base_url, tempfile.TemporaryDirectory() as output_dir:
+        cwd = os.getcwd()
+        os.chdir(output_dir)
+        try:
+            for document in documents:
+                path = Path(document)
+                if path.suffix == ".json":
+                    # The grabber adds the .json back to the thread's URL
+                    timings[document] = bench_reddit_thread(f"{base_url}/{path.stem}", repeat)
+                else:
+                    timings[document] = bench_page(f"{base_url}/{document}", repeat, readability_js)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "readability_js": readability_js,
+        "timings": timings,
+    }
+
+
+def find_regressions(baseline: dict, current: dict, threshold: float, min_delta: float) -> list[Regression]:
+    """The stages that got slower by more than threshold (relative) and min_delta seconds. New stages don't count."""
+    regressions = []
+    for document, stages in current["timings"].items():
+        for stage, seconds in stages.items():
+            before = baseline["timings"].get(document, {}).get(stage)
+            if before is None:
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > min_delta:
+                regressions.append(Regression(document, stage, before, seconds))
+    return regressions
+
+
+def print_comparison(baseline: dict, current: dict):
+    print(f"{'document':<20} {'stage':<24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for document, stages in current["timings"].items():
+        for stage, seconds in stages.items():
+            before = baseline["timings"].get(document, {}).get(stage)
+            change = f"{(seconds / before - 1) * 100:+.0f}%" if before else "new"
+            before_ms = f"{before * 1000:.1f}ms" if before is not None else "-"
+            print(f"{document:<20} {stage:<24} {before_ms:>10} {seconds * 1000:>8.1f}ms {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Time every stage and write the results to JSON.")
+    run_parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument(
+        "--documents", nargs="+", default=sorted(p.name for p in CORPUS_DIR.iterdir() if p.suffix in (".html", ".json"))
+    )
+    run_parser.add_argument("--no-readability-js", action="store_true")
+
+    compare_parser = subparsers.add_parser("compare", help="Fail if a stage got slower than in the baseline.")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.add_argument("--min-delta", type=float, default=0.001)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        readability_js = not args.no_readability_js and readability_js_installed()
+        if not args.no_readability_js and not readability_js:
+            print("Readability.js isn't installed for readabilipy, skipping extract_readability_js")
+        results = run_suite(args.documents, args.repeat, readability_js)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        for document, stages in results["timings"].items():
+            print(f"{document}: " + ", ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in stages.items()))
+        print(f"Saved results to {args.output}")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    print_comparison(baseline, current)
+    regressions = find_regressions(baseline, current, args.threshold, args.min_delta)
+    for regression in regressions:
+        print(f"Regression: {regression.document} {regression.stage} is {regression.ratio:.2f}x slower")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,35 @@
-from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING
 
-from clipit.clipper import Clipper
 from clipit.core import ClipitError, OutputFormat
 
-try:
-    __version__ = version("clipit")
-except PackageNotFoundError:
-    # Fallback when running from source without installation
-    __version__ = "dev"
+if TYPE_CHECKING:
+    from clipit.clipper import Clipper
+
+    __version__: str
+
+
+def _read_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("clipit")
+    except PackageNotFoundError:
+        # Fallback when running from source without installation
+        return "dev"
+
+
+def __getattr__(name: str):
+    # Both are looked up on first use. The Clipper brings in requests and the rest of the download stage, and reading
+    # the package metadata takes longer than importing clipit itself, clipit --help needs neither
+    if name == "Clipper":
+        from clipit.clipper import Clipper
+
+        return Clipper
+    if name == "__version__":
+        globals()["__version__"] = _read_version()
+        return globals()["__version__"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "__version__",
@@ -1,20 +1,251 @@
+import os
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, TextIO
+
 import click
+from click.core import ParameterSource
+
+import clipit
+from clipit import ClipitError, OutputFormat
+from clipit.core import ClipResult, PolitenessPolicy, StageConcurrency
+from clipit.core.backends import BACKENDS, SHARD_LAYOUTS, FileBackend, create_backend
+from clipit.core.extraction_engine import DEFAULT_ENGINE, ENGINES
+from clipit.core.instrumentation import StageProfile, ThreadProfiler
+from clipit.core.misc import default_cache_dir
+
+if TYPE_CHECKING:
+    from clipit.clipper import Clipper
+
+_default_concurrency = StageConcurrency()
+
+_VERSION_MESSAGE = (
+    "Clipit v{version} © 2025 Vlad Iliescu\n"
+    "Clipit is licensed under the LGPL v3 License (https://www.gnu.org/licenses/lgpl-3.0.html)"
+)
+
+
+def _print_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    # Same as click.version_option, except the version is only read from the package metadata when asked for
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(_VERSION_MESSAGE.format(version=clipit.__version__))
+    ctx.exit()
+
 
-from clipit import ClipitError, Clipper, OutputFormat, __version__
+def _default_user_agent() -> str:
+    return f"Clipit/{clipit.__version__}"
 
 
-@click.command()
-@click.argument("url")
+# The options that configure the Clipper itself, shared by clip and serve
+_CLIPPER_OPTIONS = [
+    click.option(
+        "--user-agent",
+        default=_default_user_agent,
+        help="The user agent reported when retrieving web pages",
+        show_default="Clipit/<version>",
+    ),
+    click.option(
+        "--readability-workers",
+        default=2,
+        type=click.IntRange(min=1),
+        help="How many Node processes to keep running for Readability.js.",
+        show_default=True,
+    ),
+    click.option(
+        "--workers",
+        default=0,
+        type=click.IntRange(min=0),
+        help="Extract and convert pages in this many worker processes, 0 does it in the main process.",
+        show_default=True,
+    ),
+    click.option(
+        "--cache-dir",
+        default=default_cache_dir() / "http",
+        type=click.Path(file_okay=False, path_type=Path),
+        help="Where to cache downloaded pages, so unchanged pages are revalidated instead of downloaded again.",
+        show_default=True,
+    ),
+    click.option(
+        "--no-cache",
+        is_flag=True,
+        default=False,
+        help="Don't use the HTTP and artifact caches.",
+    ),
+    click.option(
+        "--cache-max-size",
+        default=512,
+        type=click.IntRange(min=1),
+        help="Maximum size of the HTTP cache in MB, the least recently used pages are evicted first.",
+        show_default=True,
+    ),
+    click.option(
+        "--artifact-cache-dir",
+        default=default_cache_dir() / "artifacts",
+        type=click.Path(file_okay=False, path_type=Path),
+        help="Where to cache the readable HTML and Markdown of every page, so clipping it again with other options "
+        "skips extracting and converting it.",
+        show_default=True,
+    ),
+    click.option(
+        "--artifact-cache-max-size",
+        default=256,
+        type=click.IntRange(min=1),
+        help="Maximum size of the artifact cache in MB, the least recently used entries are evicted first.",
+        show_default=True,
+    ),
+    click.option(
+        "--max-download-size",
+        default=50,
+        type=click.IntRange(min=1),
+        help="Give up on pages larger than this many MB.",
+        show_default=True,
+    ),
+    click.option(
+        "--reddit-more-requests",
+        default=16,
+        type=click.IntRange(min=0),
+        help="How many requests to spend per Reddit thread loading the comments hidden behind 'more comments'.",
+        show_default=True,
+    ),
+    click.option(
+        "--reddit-more-depth",
+        type=click.IntRange(min=0),
+        help="Only load hidden Reddit comments at most this many levels deep. Unlimited by default.",
+    ),
+    click.option(
+        "--index",
+        "index_path",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="Record every clip in this searchable index, and skip URLs that are already in it unless --overwrite.",
+    ),
+    click.option(
+        "--assets-dir",
+        type=click.Path(file_okay=False, path_type=Path),
+        help="Download the images of every clip into this directory, once per distinct image, and link to them.",
+    ),
+    click.option(
+        "--max-asset-size",
+        default=10,
+        type=click.IntRange(min=1),
+        help="Leave images larger than this many MB where they are.",
+        show_default=True,
+    ),
+    click.option(
+        "--asset-concurrency",
+        default=8,
+        type=click.IntRange(min=1),
+        help="How many images of a page to download at the same time.",
+        show_default=True,
+    ),
+    click.option(
+        "--host-rate",
+        type=click.FloatRange(min=0),
+        help="Send at most this many requests per second to any one host, 0 for no limit.",
+        show_default="5 with --input, --feed or a listing, 0 otherwise",
+    ),
+    click.option(
+        "--host-concurrency",
+        type=click.IntRange(min=0),
+        help="Keep at most this many connections open to any one host, 0 for no limit.",
+        show_default="4 with --input, --feed or a listing, 0 otherwise",
+    ),
+    click.option(
+        "--retries",
+        type=click.IntRange(min=0),
+        help="Retry connection errors, 429s and 5xxs this many times, backing off and honoring Retry-After.",
+        show_default="4 with --input, --feed or a listing, 0 otherwise",
+    ),
+    click.option(
+        "--respect-robots-txt",
+        is_flag=True,
+        default=False,
+        help="Skip the pages robots.txt disallows, and wait as long between requests as its Crawl-delay asks.",
+    ),
+    click.option(
+        "--low-memory",
+        is_flag=True,
+        default=False,
+        help="Save each output as soon as it's ready and drop it, to keep memory down on very large pages.",
+    ),
+    click.option(
+        "--engine",
+        default=DEFAULT_ENGINE,
+        type=click.Choice(ENGINES, case_sensitive=False),
+        help="How to extract pages: with readabilipy (see --use-readability-js) or with clipit's own, faster, lxml one.",
+        show_default=True,
+    ),
+]
+# --host-rate, --host-concurrency and --retries for --input, --feed and listings
+_BATCH_POLITENESS = (5.0, 4, 4)
+_CLIPPER_OPTION_NAMES = (
+    "user_agent",
+    "readability_workers",
+    "workers",
+    "cache_dir",
+    "no_cache",
+    "cache_max_size",
+    "artifact_cache_dir",
+    "artifact_cache_max_size",
+    "max_download_size",
+    "reddit_more_requests",
+    "reddit_more_depth",
+    "index_path",
+    "assets_dir",
+    "max_asset_size",
+    "asset_concurrency",
+    "host_rate",
+    "host_concurrency",
+    "retries",
+    "respect_robots_txt",
+    "low_memory",
+    "engine",
+)
+
+
+def _clipper_options(command):
+    for option in reversed(_CLIPPER_OPTIONS):
+        command = option(command)
+    return command
+
+
+class _ClipByDefaultGroup(click.Group):
+    """
+    Runs the clip command unless the first argument names another command, so `clipit URL` keeps working. --help is
+    left to the group, so it lists the commands.
+    """
+
+    default_command = "clip"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_ClipByDefaultGroup)
+def main() -> None:
+    """Clip web pages to Markdown and HTML. Without a command, runs clip: `clipit URL` is `clipit clip URL`."""
+
+
+@main.command()
+@click.argument("url", required=False)
+@_clipper_options
 @click.option(
-    "--user-agent",
-    default=f"Clipit/{__version__}",
-    help="The user agent reported when retrieving web pages",
-    show_default=True,
+    "-i",
+    "--input",
+    "input_file",
+    type=click.File("r", encoding="utf-8"),
+    help="Clip every URL listed in this file, one per line. Use - to read them from stdin.",
 )
-@click.version_option(
-    version=__version__,
-    prog_name="Clipit",
-    message="%(prog)s v%(version)s © 2025 Vlad Iliescu\n%(prog)s is licensed under the LGPL v3 License (https://www.gnu.org/licenses/lgpl-3.0.html)",
+@click.option(
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_print_version,
+    help="Show the version and exit.",
 )
 @click.option(
     "--yaml-frontmatter/--no-yaml-frontmatter",
@@ -68,10 +299,110 @@ from clipit import ClipitError, Clipper, OutputFormat, __version__
     help="Which output format(s) to use when saving the content. Can be specified multiple times i.e. -f md -f html",
     show_default=True,
 )
-def main(
-    url: str,
+@click.option(
+    "--download-concurrency",
+    default=_default_concurrency.download,
+    type=click.IntRange(min=1),
+    help="How many pages to download at the same time when clipping from --input.",
+    show_default=True,
+)
+@click.option(
+    "--extract-concurrency",
+    default=_default_concurrency.extract,
+    type=click.IntRange(min=1),
+    help="How many pages to extract readable content from at the same time when clipping from --input.",
+    show_default=True,
+)
+@click.option(
+    "--convert-concurrency",
+    default=_default_concurrency.convert,
+    type=click.IntRange(min=1),
+    help="How many pages to convert to Markdown at the same time when clipping from --input.",
+    show_default=True,
+)
+@click.option(
+    "--write-concurrency",
+    default=_default_concurrency.write,
+    type=click.IntRange(min=1),
+    help="How many clips to save at the same time when clipping from --input.",
+    show_default=True,
+)
+@click.option(
+    "--queue-size",
+    default=_default_concurrency.queue_size,
+    type=click.IntRange(min=1),
+    help="How many pages can wait between two stages when clipping from --input.",
+    show_default=True,
+)
+@click.option(
+    "--backend",
+    default=FileBackend.name,
+    type=click.Choice(list(BACKENDS), case_sensitive=False),
+    help="Where to save clips: one file per output, optionally in shards with a manifest, or a single zip/tar archive "
+    "or SQLite database.",
+    show_default=True,
+)
+@click.option(
+    "--archive",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The archive or database to save clips to with --backend zip/tar/sqlite. Defaults to clips.<zip|tar|sqlite>.",
+)
+@click.option(
+    "--shard-by",
+    default=SHARD_LAYOUTS[0],
+    type=click.Choice(SHARD_LAYOUTS, case_sensitive=False),
+    help="With --backend sharded, split each domain's clips by URL hash or by the date they were clipped.",
+    show_default=True,
+)
+@click.option(
+    "--max-urls",
+    type=click.IntRange(min=1),
+    help="When the URL is a listing (a subreddit, a Reddit user's posts) or a --feed, clip at most this many posts.",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="When the URL is a listing or a --feed, only clip posts published after this date.",
+)
+@click.option(
+    "--feed",
+    is_flag=True,
+    default=False,
+    help="The URL, or every URL of --input, is a sitemap, sitemap index, RSS or Atom feed. Clip its new or "
+    "updated entries.",
+)
+@click.option(
+    "--feed-state",
+    "feed_state_path",
+    default=default_cache_dir() / "feeds.sqlite",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Where to remember which --feed entries were already clipped, and how each feed was last downloaded.",
+    show_default=True,
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print how long each stage took and how many bytes it produced, once done.",
+)
+@click.option(
+    "--profile-stats",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Profile the run with cProfile and save the stats to this file, for pstats or snakeviz. Implies --profile.",
+)
+@click.option(
+    "--server/--no-server",
+    default=True,
+    help="Hand single URLs to the running `clipit serve`, if any, instead of clipping them here.",
+    show_default=True,
+)
+def clip(
+    url: str | None,
+    input_file: TextIO | None,
     user_agent: str,
     use_readability_js: bool,
+    readability_workers: int,
+    workers: int,
     yaml_frontmatter: bool,
     include_title: bool,
     include_source: bool,
@@ -79,25 +410,411 @@ def main(
     create_domain_subdir: bool,
     output_formats: list[str],
     overwrite: bool,
+    download_concurrency: int,
+    extract_concurrency: int,
+    convert_concurrency: int,
+    write_concurrency: int,
+    queue_size: int,
+    cache_dir: Path,
+    no_cache: bool,
+    cache_max_size: int,
+    artifact_cache_dir: Path,
+    artifact_cache_max_size: int,
+    max_download_size: int,
+    backend: str,
+    archive: Path | None,
+    shard_by: str,
+    max_urls: int | None,
+    since: datetime | None,
+    feed: bool,
+    feed_state_path: Path,
+    reddit_more_requests: int,
+    reddit_more_depth: int | None,
+    index_path: Path | None,
+    assets_dir: Path | None,
+    max_asset_size: int,
+    asset_concurrency: int,
+    host_rate: float | None,
+    host_concurrency: int | None,
+    retries: int | None,
+    respect_robots_txt: bool,
+    low_memory: bool,
+    engine: str,
+    profile: bool,
+    profile_stats: Path | None,
+    server: bool,
 ) -> None:
     """
     Download a URL, convert it to Markdown/HTML with specified options, and save it to a file.
+
+    Run `clipit search --help` to see how to search the clips recorded with --index.
     """
-    try:
-        grabber = Clipper(user_agent=user_agent)
-        grabber.clip_and_save(
-            url=url,
-            use_readability_js=use_readability_js,
-            fallback_title=fallback_title,
-            include_source=include_source,
-            include_title=include_title,
-            yaml_frontmatter=yaml_frontmatter,
-            output_formats=list(output_formats),
-            create_domain_subdir=create_domain_subdir,
-            overwrite=overwrite,
+    if (url is None) == (input_file is None):
+        raise click.UsageError("Pass either a URL or --input, but not both.")
+
+    clip_options = dict(
+        use_readability_js=use_readability_js,
+        fallback_title=fallback_title,
+        include_source=include_source,
+        include_title=include_title,
+        yaml_frontmatter=yaml_frontmatter,
+        output_formats=list(output_formats),
+        create_domain_subdir=create_domain_subdir,
+        overwrite=overwrite,
+    )
+    if (
+        server
+        and url is not None
+        and not feed
+        and backend == FileBackend.name
+        and not profile
+        and profile_stats is None
+    ):
+        if _forward_to_server(url, clip_options):
+            return
+
+    stage_profile = StageProfile() if profile or profile_stats is not None else None
+    batch = feed or input_file is not None or _is_listing(url)
+    thread_profiler = ThreadProfiler() if profile_stats is not None else None
+
+    # Keep one pooled connection per concurrent download, so no connection gets thrown away after each page
+    grabber = _create_clipper(
+        user_agent=user_agent,
+        readability_workers=readability_workers,
+        workers=workers,
+        cache_dir=cache_dir,
+        no_cache=no_cache,
+        cache_max_size=cache_max_size,
+        artifact_cache_dir=artifact_cache_dir,
+        artifact_cache_max_size=artifact_cache_max_size,
+        max_download_size=max_download_size,
+        reddit_more_requests=reddit_more_requests,
+        reddit_more_depth=reddit_more_depth,
+        index_path=index_path,
+        assets_dir=assets_dir,
+        max_asset_size=max_asset_size,
+        asset_concurrency=asset_concurrency,
+        host_rate=host_rate,
+        host_concurrency=host_concurrency,
+        retries=retries,
+        respect_robots_txt=respect_robots_txt,
+        low_memory=low_memory,
+        engine=engine,
+        pool_maxsize=download_concurrency,
+        batch=batch,
+        feed_state_path=feed_state_path if feed else None,
+        metrics=[stage_profile] if stage_profile is not None else None,
+    )
+
+    output_backend = None
+    if backend != FileBackend.name:
+        output_backend = create_backend(
+            backend, archive, create_domain_subdir=create_domain_subdir, shard_by=shard_by.lower()
         )
+
+    clip_options["backend"] = output_backend
+    concurrency = StageConcurrency(
+        download=download_concurrency,
+        extract=extract_concurrency,
+        convert=convert_concurrency,
+        write=write_concurrency,
+        queue_size=queue_size,
+    )
+
+    try:
+        with thread_profiler or nullcontext():
+            if feed:
+                urls = _read_urls(input_file) if input_file is not None else [url]
+                _report(
+                    grabber.clip_feeds(urls, max_urls=max_urls, since=since, concurrency=concurrency, **clip_options)
+                )
+            elif input_file is not None:
+                _report(grabber.clip_many(_read_urls(input_file), concurrency=concurrency, **clip_options))
+            elif grabber.is_listing(url):
+                _report(
+                    grabber.clip_listing(url, max_urls=max_urls, since=since, concurrency=concurrency, **clip_options)
+                )
+            else:
+                grabber.clip_and_save(url=url, **clip_options)
     except ClipitError as e:
         raise click.ClickException(str(e))
+    finally:
+        if output_backend is not None:
+            output_backend.close()
+        grabber.close()
+        if stage_profile is not None:
+            click.echo(stage_profile.report(), err=True)
+            artifact_stats = grabber.artifact_stats()
+            if artifact_stats is not None:
+                click.echo(
+                    f"artifact cache: {artifact_stats.hits} hits, {artifact_stats.misses} misses "
+                    f"({artifact_stats.hit_rate:.0%} hit rate)",
+                    err=True,
+                )
+        if thread_profiler is not None and profile_stats is not None:
+            thread_profiler.stats().dump_stats(profile_stats)
+            click.echo(f"Saved profile stats to {profile_stats}", err=True)
+
+
+def _create_clipper(
+    user_agent: str,
+    readability_workers: int,
+    workers: int,
+    cache_dir: Path,
+    no_cache: bool,
+    cache_max_size: int,
+    artifact_cache_dir: Path,
+    artifact_cache_max_size: int,
+    max_download_size: int,
+    reddit_more_requests: int,
+    reddit_more_depth: int | None,
+    index_path: Path | None,
+    assets_dir: Path | None,
+    max_asset_size: int,
+    asset_concurrency: int,
+    host_rate: float | None,
+    host_concurrency: int | None,
+    retries: int | None,
+    respect_robots_txt: bool,
+    low_memory: bool,
+    engine: str,
+    batch: bool = False,
+    **kwargs,
+) -> "Clipper":
+    # Imported here rather than at the top, so that --help and --version don't have to import what clipping needs
+    from clipit.clipper import Clipper
+    from clipit.grabbers import create_registry
+
+    grabbers = create_registry()
+    grabbers.configure("reddit", max_more_requests=reddit_more_requests, max_more_depth=reddit_more_depth)
+
+    return Clipper(
+        user_agent=user_agent,
+        cache_dir=None if no_cache else cache_dir,
+        cache_max_bytes=cache_max_size * 1024 * 1024,
+        artifact_cache_dir=None if no_cache else artifact_cache_dir,
+        artifact_cache_max_bytes=artifact_cache_max_size * 1024 * 1024,
+        max_download_bytes=max_download_size * 1024 * 1024,
+        readability_workers=readability_workers,
+        workers=workers or None,
+        index_path=index_path,
+        assets_dir=assets_dir,
+        max_asset_bytes=max_asset_size * 1024 * 1024,
+        asset_concurrency=asset_concurrency,
+        low_memory=low_memory,
+        engine=engine,
+        politeness=_politeness(host_rate, host_concurrency, retries, respect_robots_txt, batch),
+        grabbers=grabbers,
+        **kwargs,
+    )
+
+
+def _politeness(
+    host_rate: float | None, host_concurrency: int | None, retries: int | None, respect_robots_txt: bool, batch: bool
+) -> PolitenessPolicy:
+    # Batches send many requests to the same hosts, so they're paced and retried unless told otherwise. A single URL
+    # fails right away when it can't be downloaded, instead of after several tries
+    default_rate, default_concurrency, default_retries = _BATCH_POLITENESS if batch else (0.0, 0, 0)
+    host_rate = default_rate if host_rate is None else host_rate
+    host_concurrency = default_concurrency if host_concurrency is None else host_concurrency
+    retries = default_retries if retries is None else retries
+    return PolitenessPolicy(
+        requests_per_second=host_rate or None,
+        max_connections_per_host=host_concurrency or None,
+        retries=retries,
+        respect_robots_txt=respect_robots_txt,
+    )
+
+
+def _is_listing(url: str | None) -> bool:
+    from clipit.grabbers import default_registry
+
+    return url is not None and default_registry().find(url).is_listing(url)
+
+
+def _forward_to_server(url: str, clip_options: dict) -> bool:
+    """
+    Clip url on the running `clipit serve`, if there's one and it can clip it the way this command would. Returns
+    False when the URL is still to be clipped here.
+    """
+    from clipit.server import read_server_info, send_job
+
+    # The server has its own user agent, cache, index... so only hand it the clips that don't set any of them
+    ctx = click.get_current_context()
+    if any(ctx.get_parameter_source(name) != ParameterSource.DEFAULT for name in _CLIPPER_OPTION_NAMES):
+        return False
+    # Listings are clipped in batches, which the server doesn't do
+    if _is_listing(url):
+        return False
+
+    info = read_server_info()
+    if info is None:
+        return False
+    try:
+        result = send_job(info, {"url": url, "directory": os.getcwd(), **clip_options})
+    except ClipitError as e:
+        raise click.ClickException(str(e))
+    if result is None:
+        # Left behind by a server that didn't get to clean up
+        return False
+
+    click.echo(result["output"], nl=False)
+    if result["error"] is not None:
+        raise click.ClickException(result["error"])
+    return True
+
+
+def _read_urls(input_file: TextIO) -> Iterator[str]:
+    for line in input_file:
+        line = line.strip()
+        # Skip blank lines and comments
+        if line and not line.startswith("#"):
+            yield line
+
+
+def _report(results: Iterator[ClipResult]) -> None:
+    failed = 0
+    for result in results:
+        if result.skipped:
+            click.echo(f"Skipped {result.url}, it was already clipped. Use --overwrite to clip it again.")
+        elif not result.ok:
+            failed += 1
+            click.echo(f"Failed to clip {result.url} ({result.failed_stage}): {result.error}", err=True)
+
+    if failed:
+        raise click.ClickException(f"{failed} URL(s) could not be clipped.")
+
+
+@main.command()
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    help="The address to listen on. Anything but localhost lets other machines clip on this one, given the token.",
+    show_default=True,
+)
+@click.option(
+    "--port",
+    default=0,
+    type=click.IntRange(min=0, max=65535),
+    help="The port to listen on, 0 picks a free one.",
+    show_default=True,
+)
+@click.option(
+    "--max-jobs",
+    default=8,
+    type=click.IntRange(min=1),
+    help="How many clips to work on at the same time.",
+    show_default=True,
+)
+@_clipper_options
+def serve(
+    host: str,
+    port: int,
+    max_jobs: int,
+    user_agent: str,
+    readability_workers: int,
+    workers: int,
+    cache_dir: Path,
+    no_cache: bool,
+    cache_max_size: int,
+    artifact_cache_dir: Path,
+    artifact_cache_max_size: int,
+    max_download_size: int,
+    reddit_more_requests: int,
+    reddit_more_depth: int | None,
+    index_path: Path | None,
+    assets_dir: Path | None,
+    max_asset_size: int,
+    asset_concurrency: int,
+    host_rate: float | None,
+    host_concurrency: int | None,
+    retries: int | None,
+    respect_robots_txt: bool,
+    low_memory: bool,
+    engine: str,
+) -> None:
+    """
+    Keep a clipper running in the background, with its connections, caches and Readability.js workers ready, and clip
+    the URLs other clipit commands hand it. Stop it with Ctrl+C.
+    """
+    from clipit.server import ClipServer
+
+    clipper = _create_clipper(
+        user_agent=user_agent,
+        readability_workers=readability_workers,
+        workers=workers,
+        cache_dir=cache_dir,
+        no_cache=no_cache,
+        cache_max_size=cache_max_size,
+        artifact_cache_dir=artifact_cache_dir,
+        artifact_cache_max_size=artifact_cache_max_size,
+        max_download_size=max_download_size,
+        reddit_more_requests=reddit_more_requests,
+        reddit_more_depth=reddit_more_depth,
+        index_path=index_path,
+        assets_dir=assets_dir,
+        max_asset_size=max_asset_size,
+        asset_concurrency=asset_concurrency,
+        host_rate=host_rate,
+        host_concurrency=host_concurrency,
+        retries=retries,
+        respect_robots_txt=respect_robots_txt,
+        low_memory=low_memory,
+        engine=engine,
+        pool_maxsize=max_jobs,
+    )
+    try:
+        try:
+            clip_server = ClipServer(clipper, host=host, port=port, max_jobs=max_jobs)
+        except OSError as e:
+            raise click.ClickException(f"Could not listen on {host}:{port}: {e}")
+        clip_server.warm_up()
+        click.echo(f"Clipping on {clip_server.url}, stop with Ctrl+C", err=True)
+        try:
+            clip_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    finally:
+        clipper.close()
+
+
+@main.command()
+@click.argument("query")
+@click.option(
+    "--index",
+    "index_path",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="The index to search, as created by clipit --index.",
+)
+@click.option(
+    "--limit",
+    default=20,
+    type=click.IntRange(min=1),
+    help="How many clips to show at most, best matches first.",
+    show_default=True,
+)
+def search(query: str, index_path: Path, limit: int) -> None:
+    """
+    Full-text search the titles and contents of the clips recorded in an index. Supports SQLite FTS5 query syntax,
+    e.g. "readability AND python" or "pytho*".
+    """
+    from clipit.core.index import ClipIndex
+
+    index = ClipIndex(index_path)
+    try:
+        results = index.search(query, limit=limit)
+    except ClipitError as e:
+        raise click.ClickException(str(e))
+    finally:
+        index.close()
+
+    if not results:
+        click.echo("No clips found.")
+    for result in results:
+        click.echo(f"{result.title}\n  {result.url}\n  {result.snippet}")
+        for output_path in result.output_paths:
+            click.echo(f"  -> {output_path}")
 
 
 if __name__ == "__main__":
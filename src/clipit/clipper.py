@@ -1,14 +1,442 @@
-from clipit.core import OutputFormat, OutputFormatList
+import asyncio
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+from urllib.parse import quote
+
+import click
+import requests
+
+from clipit.core import (
+    AssetOptions,
+    ClipitError,
+    ClipResult,
+    OutputFormat,
+    OutputFormatList,
+    PolitenessPolicy,
+    StageConcurrency,
+)
+from clipit.core.artifact_cache import ArtifactCache, ArtifactCacheStats, use_artifact_cache
+from clipit.core.backends import FileBackend, OutputBackend, save_outputs
 from clipit.core.dtos import RenderFlags
-from clipit.core.writer import output
-from clipit.grabbers import BaseGrabber, RedditGrabber
+from clipit.core.extraction_engine import DEFAULT_ENGINE, check_engine
+from clipit.core.feeds import FeedEntry, FeedReader, FeedState
+from clipit.core.http_cache import HttpCache
+from clipit.core.index import ClipIndex, canonical_url
+from clipit.core.instrumentation import Instrumentation, MetricsSink, utf8_size
+from clipit.core.pipeline import Stage, StageFailure, run_pipeline
+from clipit.core.process_pool import create_process_pool, extract_and_convert
+from clipit.core.readability_pool import configure_readability_pool
+from clipit.core.session import DEFAULT_MAX_DOWNLOAD_BYTES, SessionStats, connection_stats, create_session
+from clipit.core.writer import domain_dir
+from clipit.grabbers import BaseGrabber, GrabberRegistry, default_registry
+
+
+class AlreadyClippedError(ClipitError):
+    pass
+
+
+@dataclass
+class _ClipSettings:
+    use_readability_js: bool
+    fallback_title: str
+    render_flags: RenderFlags
+    output_formats: OutputFormatList
+    create_domain_subdir: bool = True
+    overwrite: bool = False
+    backend: OutputBackend | None = None
+    # Only when saving, and only without overwrite, URLs that are already in the index are skipped
+    skip_clipped: bool = False
+    # Only when saving, outputs are saved as soon as they're ready and dropped, see Clipper
+    low_memory: bool = False
+
+
+@dataclass
+class _ClipJob:
+    url: str
+    grabber: BaseGrabber
+    settings: _ClipSettings
+    html_content: str = ""
+    html_readable_content: str = ""
+    title: str = ""
+    markdown_content: str | None = None
+    outputs: dict[OutputFormat, str] = field(default_factory=dict)
+    # Only looked up when there's an index to record it in
+    canonical_url: str | None = None
+    locations: dict[OutputFormat, str] = field(default_factory=dict)
+
 
-grabbers: list[BaseGrabber] = [RedditGrabber(), BaseGrabber()]
+def _clip_settings(
+    use_readability_js: bool,
+    fallback_title: str,
+    include_source: bool,
+    include_title: bool,
+    yaml_frontmatter: bool,
+    output_formats: list[str],
+    **save_options,
+) -> _ClipSettings:
+    return _ClipSettings(
+        use_readability_js=use_readability_js,
+        fallback_title=fallback_title,
+        render_flags=RenderFlags(
+            include_source=include_source,
+            include_title=include_title,
+            yaml_frontmatter=yaml_frontmatter,
+        ),
+        output_formats=OutputFormatList(output_formats),
+        **save_options,
+    )
 
 
 class Clipper:
-    def __init__(self, user_agent: str | None = None):
+    def __init__(
+        self,
+        user_agent: str | None = None,
+        max_async_downloads: int = 100,
+        session: requests.Session | None = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        cache_dir: str | Path | None = None,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        max_download_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+        readability_workers: int = 2,
+        workers: int | None = None,
+        index_path: str | Path | None = None,
+        grabbers: GrabberRegistry | list[BaseGrabber] | None = None,
+        metrics: Iterable[MetricsSink] | None = None,
+        assets_dir: str | Path | None = None,
+        max_asset_bytes: int = 10 * 1024 * 1024,
+        asset_concurrency: int = 8,
+        politeness: PolitenessPolicy | None = None,
+        low_memory: bool = False,
+        feed_state_path: str | Path | None = None,
+        artifact_cache_dir: str | Path | None = None,
+        artifact_cache_max_bytes: int = 256 * 1024 * 1024,
+        engine: str = DEFAULT_ENGINE,
+    ):
+        """
+        Downloads share one keep-alive session, pass your own or let the Clipper create one with pool_connections
+        per-host connection pools of up to pool_maxsize connections each.
+
+        Set cache_dir to keep downloaded pages in an on-disk HTTP cache of up to cache_max_bytes, unchanged pages are
+        then revalidated instead of downloaded again. Pages larger than max_download_bytes are abandoned mid-download.
+        Both only apply to the session the Clipper creates, and so does politeness: how fast and how often to send
+        requests to any one host, how to retry failed ones (backing off, and waiting as long as the host's
+        Retry-After asks), and whether to honor robots.txt. Defaults to a PolitenessPolicy(), which neither paces nor
+        retries, so a failing page fails right away: for batches, pass one with a rate and retries, as the CLI does.
+
+        Readability.js runs in a pool of readability_workers long-lived Node processes, shared by the whole process.
+
+        Set workers to extract and convert documents in that many worker processes instead of in this one, so they
+        can use more than one core. Each worker process gets its own readability_workers Node processes.
+
+        Set index_path to record every saved clip in a searchable ClipIndex. URLs that are already in the index are
+        then skipped unless overwrite is set.
+
+        Pass grabbers to configure how URLs are clipped: a GrabberRegistry, which picks them by host, or a list of
+        grabbers, the first one that can handle a URL gets it. Defaults to the default_registry(), with clipit's own
+        grabbers and those of the installed plugins.
+
+        Every metrics sink is called with a StageEvent each time a stage of a clip finishes (download, extract,
+        convert, write and their parts, like convert.mdformat), with how long it took and how many bytes it produced.
+        More can be added to the Clipper's instrumentation later. Parts that run in worker processes aren't reported
+        separately, and the async methods only report each clip as a whole.
+
+        Set assets_dir to download the images of every clip into a store named after their content, so an image
+        shared by many pages is stored once, and have the Markdown and readable HTML outputs link to it. Each clip
+        downloads up to asset_concurrency images at a time, and leaves the ones larger than max_asset_bytes alone.
+
+        Set low_memory to keep as little of each clip in memory as possible when saving, for very large pages: every
+        output is saved as soon as it's ready, during the extract and convert stages, and dropped along with what
+        it was made from, and the Markdown header is written separately from the body instead of being
+        prepended to it. The async methods don't support it.
+
+        Set feed_state_path to remember, across runs, which entries of the feeds clip_feeds goes through were already
+        clipped. Without it, clip_feeds clips every entry of a feed.
+
+        Set artifact_cache_dir to cache the readable HTML, title and Markdown of every page in an ArtifactCache of up
+        to artifact_cache_max_bytes, so clipping a page again with other render options or formats skips straight to
+        the post-processing. See artifact_stats() for its hit rate. The async methods don't use it.
+
+        engine picks how pages are extracted: "readabilipy" uses Readability.js (or readabilipy's Python extraction,
+        without use_readability_js or Node) and "lxml" clipit's own, much faster, extraction. Grabbers that don't
+        extract pages with readabilipy, like the Reddit one, ignore it.
+        """
         self.user_agent = user_agent
+        self.max_async_downloads = max_async_downloads
+        self._owns_session = session is None
+        if session is None:
+            cache = HttpCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+            session = create_session(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                cache=cache,
+                max_download_bytes=max_download_bytes,
+                politeness=politeness if politeness is not None else PolitenessPolicy(),
+            )
+        self.session = session
+        self.readability_workers = readability_workers
+        configure_readability_pool(readability_workers)
+        self.workers = workers
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._io_executor: ThreadPoolExecutor | None = None
+        self.index = ClipIndex(index_path) if index_path is not None else None
+        self.grabbers = grabbers if grabbers is not None else default_registry()
+        self.instrumentation = Instrumentation(metrics)
+        self.assets_dir = Path(assets_dir) if assets_dir is not None else None
+        self.max_asset_bytes = max_asset_bytes
+        self.asset_concurrency = asset_concurrency
+        self.low_memory = low_memory
+        self.feed_state = FeedState(feed_state_path) if feed_state_path is not None else None
+        self.artifacts = (
+            ArtifactCache(artifact_cache_dir, max_bytes=artifact_cache_max_bytes)
+            if artifact_cache_dir is not None
+            else None
+        )
+        self.engine = check_engine(engine)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=False, cancel_futures=True)
+            self._io_executor = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self.index is not None:
+            self.index.close()
+        if self.feed_state is not None:
+            self.feed_state.close()
+        if self._owns_session:
+            self.session.close()
+
+    def connection_stats(self) -> SessionStats:
+        """How many requests the session sent, and how many of them had to open a new connection."""
+        return connection_stats(self.session)
+
+    def artifact_stats(self) -> ArtifactCacheStats | None:
+        """How many extractions and conversions the artifact cache saved, and how many it couldn't."""
+        return self.artifacts.stats() if self.artifacts is not None else None
+
+    def _get_io_executor(self) -> ThreadPoolExecutor:
+        # requests has no async API, so the async methods keep their blocking I/O on a dedicated pool of threads,
+        # sized for many downloads in flight and separate from the loop's default executor used for CPU work
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(max_workers=self.max_async_downloads, thread_name_prefix="clipit-io")
+        return self._io_executor
+
+    def _get_process_pool(self) -> ProcessPoolExecutor | None:
+        if self.workers and self._process_pool is None:
+            self._process_pool = create_process_pool(self.workers, self.readability_workers, self.artifacts)
+        return self._process_pool
+
+    def _find_grabber(self, url: str) -> BaseGrabber:
+        if isinstance(self.grabbers, GrabberRegistry):
+            return self.grabbers.find(url)
+
+        grabber = next((g for g in self.grabbers if g.can_handle(url)), None)
+        if grabber is None:
+            raise ValueError("No grabber found for the given URL.")
+
+        return grabber
+
+    # The stages every clip goes through, one after the other in clip() and concurrently in clip_many()
+
+    def _start_job(self, settings: _ClipSettings, url: str) -> _ClipJob:
+        grabber = self._find_grabber(url)
+        grabber.check_output_formats(settings.output_formats)
+        if settings.skip_clipped and self.index is not None and self.index.contains(url):
+            raise AlreadyClippedError(f"{url} was already clipped")
+
+        return _ClipJob(url=url, grabber=grabber, settings=settings)
+
+    def _download(self, job: _ClipJob) -> _ClipJob:
+        with self.instrumentation.stage(job.url, "download") as event:
+            job.html_content = job.grabber.download(job.url, self.user_agent, self.session)
+            if event is not None:
+                event.bytes = utf8_size(job.html_content)
+        if self.index is not None:
+            job.canonical_url = canonical = canonical_url(job.url, job.html_content)
+            if job.settings.skip_clipped and canonical != job.url and self.index.contains(canonical):
+                raise AlreadyClippedError(f"{job.url} was already clipped as {canonical}")
+
+        return job
+
+    def _extract(self, job: _ClipJob) -> _ClipJob:
+        with self.instrumentation.stage(job.url, "extract") as event:
+            job = self._extract_content(job)
+            if event is not None:
+                event.bytes = utf8_size(job.html_readable_content)
+
+        if job.settings.low_memory:
+            # Nothing needs the page itself anymore
+            if job.settings.output_formats.should_output_raw_html():
+                self._save_now(job, OutputFormat.RAW_HTML, [job.html_content])
+            job.html_content = ""
+            # readabilipy's and BeautifulSoup's trees are reference cycles, they'd otherwise stay around until the
+            # next garbage collection, on top of the trees the conversion builds
+            gc.collect()
+        return job
+
+    def _extract_content(self, job: _ClipJob) -> _ClipJob:
+        settings = job.settings
+        process_pool = self._get_process_pool()
+        if process_pool is None:
+            with use_artifact_cache(self.artifacts):
+                job.html_readable_content, job.title = job.grabber.extract(
+                    job.html_content, settings.use_readability_js, settings.fallback_title, job.url, self.engine
+                )
+            return job
+
+        # The worker processes extract and convert in one go, the convert stage then only collects the outputs
+        job.title, job.html_readable_content, job.markdown_content, lookups = process_pool.submit(
+            extract_and_convert,
+            job.grabber,
+            job.url,
+            job.html_content,
+            settings.use_readability_js,
+            self.engine,
+            settings.fallback_title,
+            settings.render_flags,
+            # The images have to be localized before converting, which happens here
+            settings.output_formats.should_output_markdown() and self.assets_dir is None,
+            settings.output_formats.should_output_readable_html() or self.assets_dir is not None,
+        ).result()
+        if lookups is not None and self.artifacts is not None:
+            self.artifacts.record(lookups)
+        return job
+
+    def _asset_options(self, url: str, settings: _ClipSettings) -> AssetOptions | None:
+        if self.assets_dir is None:
+            return None
+
+        backend = settings.backend
+        if backend is None or isinstance(backend, FileBackend):
+            if backend is None:
+                output_dir = domain_dir(url) if settings.create_domain_subdir else Path(".")
+            else:
+                output_dir = backend.directory_for(url)
+            # Relative, so the clips and the store can be moved around together
+            link_prefix = Path(os.path.relpath(self.assets_dir, output_dir)).as_posix()
+        else:
+            # Archives and databases have no directory of their own to link from
+            link_prefix = self.assets_dir.resolve().as_posix()
+
+        return AssetOptions(
+            directory=self.assets_dir,
+            link_prefix=quote(link_prefix),
+            max_bytes=self.max_asset_bytes,
+            concurrency=self.asset_concurrency,
+        )
+
+    def _localize_assets(self, job: _ClipJob) -> _ClipJob:
+        assets = self._asset_options(job.url, job.settings)
+        if assets is None:
+            return job
+
+        with self.instrumentation.stage(job.url, "assets") as event:
+            job.html_readable_content = job.grabber.localize_assets(
+                job.url, job.html_readable_content, assets, self.user_agent, self.session
+            )
+            if event is not None:
+                event.bytes = utf8_size(job.html_readable_content)
+        return job
+
+    def _convert(self, job: _ClipJob) -> _ClipJob:
+        settings = job.settings
+        if settings.low_memory:
+            return self._convert_and_save(job)
+        if settings.output_formats.should_output_markdown() and job.markdown_content is None:
+            with self.instrumentation.stage(job.url, "convert") as event, use_artifact_cache(self.artifacts):
+                job.markdown_content = job.grabber.convert(
+                    job.url, job.title, job.html_readable_content, settings.render_flags
+                )
+                if event is not None:
+                    event.bytes = utf8_size(job.markdown_content)
+        job.outputs = job.grabber.collect_outputs(
+            job.html_content, job.html_readable_content, job.markdown_content, settings.output_formats
+        )
+        return job
+
+    def _convert_and_save(self, job: _ClipJob) -> _ClipJob:
+        """The convert stage of the low memory mode, saving each output as soon as it's ready."""
+        settings = job.settings
+        output_formats = settings.output_formats
+        if output_formats.should_output_readable_html():
+            self._save_now(job, OutputFormat.READABLE_HTML, [job.html_readable_content])
+        if not output_formats.should_output_markdown():
+            return job
+
+        if job.markdown_content is not None:
+            # Already converted in a worker process
+            header, body = "", job.markdown_content
+        else:
+            with self.instrumentation.stage(job.url, "convert") as event, use_artifact_cache(self.artifacts):
+                header, body = job.grabber.convert_parts(
+                    job.url, job.title, job.html_readable_content, settings.render_flags
+                )
+                if event is not None:
+                    event.bytes = (utf8_size(header) or 0) + (utf8_size(body) or 0)
+        # The body is what gets recorded in the index, if any
+        job.html_readable_content = ""
+        job.markdown_content = body
+        gc.collect()
+
+        if output_formats.should_output_markdown_file():
+            self._save_now(job, OutputFormat.MD, [header, body])
+        if output_formats.should_output_markdown_stdout():
+            self._save_now(job, OutputFormat.STDOUT_MD, [header, body])
+        return job
+
+    def _save_now(self, job: _ClipJob, output_format: OutputFormat, parts: list[str]) -> None:
+        if not output_format.is_file_output():
+            for part in parts:
+                click.echo(part, nl=False)
+            click.echo()
+            return
+
+        with self.instrumentation.stage(job.url, "write") as event:
+            location = self._backend(job.settings).write_parts(
+                job.url, job.title, output_format, parts, job.settings.overwrite
+            )
+            if event is not None and location is not None:
+                event.bytes = sum(utf8_size(part) or 0 for part in parts)
+        if location is not None:
+            job.locations[output_format] = location
+
+    def _backend(self, settings: _ClipSettings) -> OutputBackend:
+        return settings.backend or FileBackend(create_domain_subdir=settings.create_domain_subdir)
+
+    def _save(self, job: _ClipJob) -> _ClipJob:
+        settings = job.settings
+        if job.outputs:
+            with self.instrumentation.stage(job.url, "write") as event:
+                locations = save_outputs(self._backend(settings), job.title, job.outputs, job.url, settings.overwrite)
+                if event is not None:
+                    event.bytes = sum(utf8_size(job.outputs[output_format]) or 0 for output_format in locations)
+            job.locations.update(locations)
+
+        if self.index is not None and job.locations:
+            self.index.record(
+                job.url,
+                job.canonical_url or canonical_url(job.url, job.html_content),
+                job.title,
+                job.markdown_content or job.html_readable_content or job.html_content,
+                list(job.locations.values()),
+            )
+
+        return job
 
     def clip(
         self,
@@ -20,18 +448,19 @@ class Clipper:
         yaml_frontmatter: bool,
         output_formats: list[str],
     ) -> tuple[str, dict[OutputFormat, str]]:
-        grabber = next((g for g in grabbers if g.can_handle(url)), None)
-        if grabber is None:
-            raise ValueError("No grabber found for the given URL.")
-
-        output_format_list: OutputFormatList = OutputFormatList(output_formats)
-        render_flags = RenderFlags(
-            include_source=include_source,
-            include_title=include_title,
-            yaml_frontmatter=yaml_frontmatter,
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            # Nothing gets saved, so images are linked from the working directory
+            create_domain_subdir=False,
         )
+        job = self._convert(self._localize_assets(self._extract(self._download(self._start_job(settings, url)))))
 
-        return grabber.grab(url, self.user_agent, use_readability_js, fallback_title, render_flags, output_format_list)
+        return job.title, job.outputs
 
     def clip_and_save(
         self,
@@ -44,8 +473,253 @@ class Clipper:
         output_formats: list[str],
         create_domain_subdir: bool,
         overwrite: bool,
+        backend: OutputBackend | None = None,
     ) -> None:
-        title, outputs = self.clip(
-            url, use_readability_js, fallback_title, include_source, include_title, yaml_frontmatter, output_formats
+        """Clip the URL and save it, to one file per output by default or to the given backend (e.g. an archive)."""
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir=create_domain_subdir,
+            overwrite=overwrite,
+            backend=backend,
+            skip_clipped=self.index is not None and not overwrite,
+            low_memory=self.low_memory,
         )
-        output(title, outputs, url, create_domain_subdir, overwrite)
+        try:
+            job = self._localize_assets(self._extract(self._download(self._start_job(settings, url))))
+            self._save(self._convert(job))
+        except AlreadyClippedError as e:
+            click.echo(f"{e}. Use --overwrite to clip it again.")
+
+    async def aclip(
+        self,
+        url: str,
+        use_readability_js: bool,
+        fallback_title: str,
+        include_source: bool,
+        include_title: bool,
+        yaml_frontmatter: bool,
+        output_formats: list[str],
+    ) -> tuple[str, dict[OutputFormat, str]]:
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir=False,
+        )
+        return await self._agrab(url, settings)
+
+    async def _agrab(self, url: str, settings: _ClipSettings) -> tuple[str, dict[OutputFormat, str]]:
+        grabber = self._find_grabber(url)
+
+        with self.instrumentation.stage(url, "clip"):
+            return await grabber.agrab(
+                url,
+                self.user_agent,
+                settings.use_readability_js,
+                settings.fallback_title,
+                settings.render_flags,
+                settings.output_formats,
+                session=self.session,
+                io_executor=self._get_io_executor(),
+                cpu_executor=self._get_process_pool(),
+                assets=self._asset_options(url, settings),
+                engine=self.engine,
+            )
+
+    async def aclip_and_save(
+        self,
+        url: str,
+        use_readability_js: bool,
+        fallback_title: str,
+        include_source: bool,
+        include_title: bool,
+        yaml_frontmatter: bool,
+        output_formats: list[str],
+        create_domain_subdir: bool,
+        overwrite: bool,
+        backend: OutputBackend | None = None,
+    ) -> None:
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir=create_domain_subdir,
+            overwrite=overwrite,
+            backend=backend,
+            skip_clipped=self.index is not None and not overwrite,
+        )
+        job = self._start_job(settings, url)
+        job.title, job.outputs = await self._agrab(url, settings)
+        job.markdown_content = job.outputs.get(OutputFormat.MD) or job.outputs.get(OutputFormat.STDOUT_MD)
+        await asyncio.get_running_loop().run_in_executor(self._get_io_executor(), self._save, job)
+
+    def clip_many(
+        self,
+        urls: Iterable[str],
+        use_readability_js: bool,
+        fallback_title: str,
+        include_source: bool,
+        include_title: bool,
+        yaml_frontmatter: bool,
+        output_formats: list[str],
+        create_domain_subdir: bool,
+        overwrite: bool,
+        concurrency: StageConcurrency | None = None,
+        backend: OutputBackend | None = None,
+    ) -> Iterator[ClipResult]:
+        """
+        Clip and save every URL, running the download, extract, convert and write stages concurrently.
+
+        Yields one ClipResult per URL as soon as it's done, in completion order. A URL that fails is reported
+        through its ClipResult and doesn't stop the rest of the batch, same for URLs skipped because they're
+        already in the index.
+        """
+        concurrency = concurrency or StageConcurrency()
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir=create_domain_subdir,
+            overwrite=overwrite,
+            backend=backend,
+            skip_clipped=self.index is not None and not overwrite,
+            low_memory=self.low_memory,
+        )
+
+        return self._run_pipeline(urls, partial(self._start_job, settings), concurrency)
+
+    def _run_pipeline(
+        self, items: Iterable, start_job: Callable[..., _ClipJob], concurrency: StageConcurrency
+    ) -> Iterator[ClipResult]:
+        stages = [
+            Stage("check", start_job),
+            Stage("download", self._download, concurrency.download),
+            # Keep every worker process busy, each extract thread waits on one document at a time
+            Stage("extract", self._extract, max(concurrency.extract, self.workers or 0)),
+            Stage("convert", self._convert, concurrency.convert),
+            Stage("write", self._save, concurrency.write),
+        ]
+        if self.assets_dir is not None:
+            # Mostly waiting on downloads, same as the download stage
+            stages.insert(3, Stage("assets", self._localize_assets, concurrency.download))
+
+        for result in run_pipeline(items, stages, concurrency.queue_size):
+            if isinstance(result, StageFailure):
+                url = result.item if isinstance(result.item, str) else result.item.url
+                if isinstance(result.error, AlreadyClippedError):
+                    yield ClipResult(url=url, skipped=True)
+                else:
+                    yield ClipResult(url=url, error=result.error, failed_stage=result.stage)
+            else:
+                yield ClipResult(url=result.url, title=result.title)
+
+    def is_listing(self, url: str) -> bool:
+        """Whether the URL lists other URLs to clip, e.g. a subreddit, see clip_listing."""
+        return self._find_grabber(url).is_listing(url)
+
+    def clip_listing(
+        self,
+        url: str,
+        use_readability_js: bool,
+        fallback_title: str,
+        include_source: bool,
+        include_title: bool,
+        yaml_frontmatter: bool,
+        output_formats: list[str],
+        create_domain_subdir: bool,
+        overwrite: bool,
+        max_urls: int | None = None,
+        since: datetime | None = None,
+        concurrency: StageConcurrency | None = None,
+        backend: OutputBackend | None = None,
+    ) -> Iterator[ClipResult]:
+        """
+        Clip and save every URL a listing links to, e.g. every post of a subreddit, same as clip_many.
+
+        The listing is read page by page while its URLs are being clipped, through the same session.
+        """
+        urls = self._find_grabber(url).list_urls(url, self.user_agent, self.session, max_urls, since)
+        return self.clip_many(
+            urls,
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir,
+            overwrite,
+            concurrency=concurrency,
+            backend=backend,
+        )
+
+    def clip_feeds(
+        self,
+        urls: Iterable[str],
+        use_readability_js: bool,
+        fallback_title: str,
+        include_source: bool,
+        include_title: bool,
+        yaml_frontmatter: bool,
+        output_formats: list[str],
+        create_domain_subdir: bool,
+        overwrite: bool,
+        max_urls: int | None = None,
+        since: datetime | None = None,
+        concurrency: StageConcurrency | None = None,
+        backend: OutputBackend | None = None,
+    ) -> Iterator[ClipResult]:
+        """
+        Clip and save the entries of sitemaps, sitemap indexes, RSS and Atom feeds that are new or were updated since
+        they were last clipped, at most max_urls of them and none older than since, same as clip_many.
+
+        Updated entries replace their earlier clips, whatever overwrite says. Feeds that couldn't be downloaded or
+        parsed are reported as a failed ClipResult once the rest is done.
+        """
+        concurrency = concurrency or StageConcurrency()
+        settings = _clip_settings(
+            use_readability_js,
+            fallback_title,
+            include_source,
+            include_title,
+            yaml_frontmatter,
+            output_formats,
+            create_domain_subdir=create_domain_subdir,
+            overwrite=overwrite,
+            backend=backend,
+            skip_clipped=self.index is not None and not overwrite,
+            low_memory=self.low_memory,
+        )
+        updated_settings = replace(settings, overwrite=True, skip_clipped=False)
+
+        def start_job(entry: FeedEntry) -> _ClipJob:
+            return self._start_job(updated_settings if entry.changed else settings, entry.url)
+
+        state = self.feed_state or FeedState()
+        try:
+            reader = FeedReader(state, self.user_agent, self.session, since=since)
+            entries = (entry for url in urls for entry in reader.entries(url))
+            for result in self._run_pipeline(islice(entries, max_urls), start_job, concurrency):
+                reader.done(result.url, ok=result.ok)
+                yield result
+
+            reader.commit()
+            for url, error in reader.errors:
+                yield ClipResult(url=url, error=error, failed_stage="feed")
+        finally:
+            if state is not self.feed_state:
+                state.close()
@@ -1,5 +1,14 @@
-from clipit.core.dtos import OutputFlags, RenderFlags
+from clipit.core.dtos import AssetOptions, ClipResult, PolitenessPolicy, RenderFlags, StageConcurrency
 from clipit.core.misc import ClipitError
 from clipit.core.output_format import OutputFormat, OutputFormatList
 
-__all__ = ["OutputFormat", "OutputFormatList", "RenderFlags", "OutputFlags", "ClipitError"]
+__all__ = [
+    "OutputFormat",
+    "OutputFormatList",
+    "RenderFlags",
+    "AssetOptions",
+    "PolitenessPolicy",
+    "ClipitError",
+    "ClipResult",
+    "StageConcurrency",
+]
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from clipit.core.disk_cache import DiskLru
+
+T = TypeVar("T")
+
+# The libraries extraction and conversion are done with, a new version of any of them may change what they produce
+_LIBRARIES = ("clipit", "readabilipy", "lxml", "beautifulsoup4", "markdownify", "mdformat", "markdown-it-py")
+
+# The cache the extraction and conversion of the current thread go through, if any
+_active: ContextVar["ArtifactCache | None"] = ContextVar("clipit_artifact_cache", default=None)
+
+
+@dataclass
+class ArtifactCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@lru_cache(maxsize=1)
+def _library_versions() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = []
+    for library in _LIBRARIES:
+        try:
+            versions.append(f"{library}=={version(library)}")
+        except PackageNotFoundError:
+            versions.append(f"{library}==?")
+    return ",".join(versions)
+
+
+class ArtifactCache:
+    """
+    On-disk cache of what extraction (readable HTML and title) and Markdown conversion produce, so clipping the same
+    page again with other render options or formats only redoes the post-processing.
+
+    Entries are keyed on a hash of their input, the options it was processed with and the versions of the libraries
+    doing the processing, so upgrading any of them starts over. When the cache grows past max_bytes, the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._files = DiskLru(cache_dir, max_bytes)
+        self._lock = threading.Lock()
+        self._stats = ArtifactCacheStats()
+
+    def __getstate__(self):
+        # Sent to the worker processes, which keep their own lock, size and counts
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_dir"], state["max_bytes"])
+
+    @staticmethod
+    def key(kind: str, content: str, options: tuple = ()) -> str:
+        digest = hashlib.sha256(f"{kind}\n{json.dumps(options)}\n{_library_versions()}\n".encode("utf-8"))
+        digest.update(content.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        try:
+            value = json.loads(self._files.path(key).read_text(encoding="utf-8"))
+            self._files.touch(key)
+        except (OSError, ValueError):
+            value = None
+
+        with self._lock:
+            if value is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._files.write(key, {".json": json.dumps(value).encode("utf-8")})
+
+    def stats(self) -> ArtifactCacheStats:
+        with self._lock:
+            return ArtifactCacheStats(hits=self._stats.hits, misses=self._stats.misses)
+
+    def record(self, stats: ArtifactCacheStats) -> None:
+        """Add the lookups made somewhere else, e.g. by a worker process, to this cache's stats."""
+        with self._lock:
+            self._stats.hits += stats.hits
+            self._stats.misses += stats.misses
+
+
+@contextmanager
+def use_artifact_cache(cache: ArtifactCache | None) -> Iterator[None]:
+    """Have the extraction and conversion of the current thread go through cache."""
+    token = _active.set(cache)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def set_artifact_cache(cache: ArtifactCache | None) -> None:
+    """Have the extraction and conversion of the current thread go through cache from now on."""
+    _active.set(cache)
+
+
+def active_artifact_cache() -> ArtifactCache | None:
+    return _active.get()
+
+
+def cached(kind: str, content: str, options: tuple, compute: Callable[[], T]) -> T:
+    """The cached result of compute() for content and options, computing and caching it on a miss."""
+    cache = _active.get()
+    if cache is None:
+        return compute()
+
+    key = cache.key(kind, content, options)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value)
+    return value
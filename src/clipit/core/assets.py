@@ -0,0 +1,114 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote, urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from clipit.core import AssetOptions, ClipitError
+from clipit.core.downloader import IMAGE_CONTENT_TYPES, download_content
+
+# Longer suffixes are more likely to be part of the name than an extension
+_MAX_EXTENSION_LENGTH = 5
+
+
+class AssetStore:
+    """
+    A directory of files named after the SHA-256 of their content, so an image used by many pages is stored once.
+
+    Files are spread over subdirectories named after the first two characters of their hash, and written atomically
+    so concurrent clips never see half an image.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def add(self, content: bytes | bytearray, extension: str = "") -> str:
+        """Store content, unless it's there already, and return its name relative to the store."""
+        digest = hashlib.sha256(content).hexdigest()
+        name = f"{digest[:2]}/{digest}{extension}"
+        path = self.directory / name
+        if path.exists():
+            return name
+
+        temp_file = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file.write_bytes(content)
+            os.replace(temp_file, path)
+        except OSError as e:
+            temp_file.unlink(missing_ok=True)
+            raise ClipitError(f"Error saving {name} to {self.directory}: {e}")
+
+        return name
+
+
+def localize_images(
+    html: str,
+    url: str,
+    options: AssetOptions,
+    user_agent: str | None,
+    session: requests.Session | None = None,
+) -> str:
+    """
+    Download the images of a page's HTML into the store, at most options.concurrency at a time, and point the HTML
+    at them.
+
+    Images that can't be downloaded, or are larger than options.max_bytes, keep linking to the original.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    images = {}
+    for img in soup.find_all("img", src=True):
+        src = urljoin(url, img["src"].strip())
+        if urlparse(src).scheme in ("http", "https"):
+            images.setdefault(src, []).append(img)
+    if not images:
+        return html
+
+    store = AssetStore(options.directory)
+    link_prefix = options.link_prefix if options.link_prefix is not None else quote(options.directory.as_posix())
+
+    def localize(src: str) -> str | None:
+        try:
+            content, content_type = download_content(
+                src, user_agent, session, IMAGE_CONTENT_TYPES, max_bytes=options.max_bytes
+            )
+        except ClipitError:
+            return None
+        return store.add(content, _extension(src, content_type))
+
+    with ThreadPoolExecutor(
+        max_workers=min(options.concurrency, len(images)), thread_name_prefix="clipit-assets"
+    ) as pool:
+        names = dict(zip(images, pool.map(localize, images)))
+
+    localized = False
+    for src, imgs in images.items():
+        name = names[src]
+        if name is None:
+            continue
+        localized = True
+        for img in imgs:
+            img["src"] = posixpath.join(link_prefix, name)
+            # Otherwise browsers would keep picking the remote versions
+            del img["srcset"]
+            if img.parent is not None and img.parent.name == "picture":
+                for source in img.parent.find_all("source"):
+                    source.decompose()
+
+    return str(soup) if localized else html
+
+
+def _extension(url: str, content_type: str | None) -> str:
+    if content_type:
+        extension = mimetypes.guess_extension(content_type.split(";", 1)[0].strip().lower())
+        if extension:
+            return extension
+
+    extension = posixpath.splitext(urlparse(url).path)[1].lower()
+    return extension if 1 < len(extension) <= _MAX_EXTENSION_LENGTH and extension[1:].isalnum() else ""
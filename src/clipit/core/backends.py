@@ -0,0 +1,489 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tarfile
+import threading
+import time
+import warnings
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.parse import urlparse
+
+import click
+
+from clipit.core import ClipitError, OutputFormat
+from clipit.core.writer import create_output_dir, domain_dir, sanitize_filename, write_to_file
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def clip_key(url: str) -> str:
+    """Where a clip lives inside an archive: the URL's domain plus a hash of the full URL."""
+    domain = urlparse(url).netloc.replace("www.", "") or "unknown_domain"
+    return f"{domain}/{url_hash(url)[:32]}"
+
+
+class OutputBackend(ABC):
+    """
+    Where clips get saved. Every clip output is addressable by its URL and format.
+
+    Backends are used from several threads during batch runs, and must be closed to make sure everything was saved.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def write(self, url: str, title: str, format: OutputFormat, content: str, overwrite: bool) -> str | None:
+        """Save one output of a clip and return where it went, or None if it was skipped."""
+        raise NotImplementedError
+
+    def write_parts(self, url: str, title: str, format: OutputFormat, parts: list[str], overwrite: bool) -> str | None:
+        """Same as write, for an output in several parts. Backends that can save them one by one don't join them."""
+        return self.write(url, title, format, "".join(parts), overwrite)
+
+    @abstractmethod
+    def read(self, url: str, format: OutputFormat) -> str | None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FileBackend(OutputBackend):
+    """
+    One file per output, named after the clip's title, in directory (the working directory by default) or in a
+    subdirectory of it named after the domain.
+    """
+
+    name = "file"
+
+    def __init__(self, create_domain_subdir: bool = True, directory: str | Path = "."):
+        self.create_domain_subdir = create_domain_subdir
+        self.directory = Path(directory)
+        self._locations: dict[tuple[str, OutputFormat], Path] = {}
+
+    def directory_for(self, url: str) -> Path:
+        """Where the outputs of url are saved, without creating it."""
+        return domain_dir(url, self.directory) if self.create_domain_subdir else self.directory
+
+    def _output_dir(self, url: str) -> Path:
+        return create_output_dir(url, self.directory) if self.create_domain_subdir else self.directory
+
+    def write(self, url: str, title: str, format: OutputFormat, content: str, overwrite: bool) -> str | None:
+        return self.write_parts(url, title, format, [content], overwrite)
+
+    def write_parts(self, url: str, title: str, format: OutputFormat, parts: list[str], overwrite: bool) -> str | None:
+        output_file = write_to_file(
+            parts, str(self._output_dir(url)), sanitize_filename(title), format.value, overwrite
+        )
+        if output_file is None:
+            return None
+
+        self._locations[(url, format)] = output_file
+        return str(output_file)
+
+    def read(self, url: str, format: OutputFormat) -> str | None:
+        # File names come from titles, so only clips saved through this backend instance can be found by URL
+        output_file = self._locations.get((url, format))
+        if output_file is None or not output_file.exists():
+            return None
+
+        return output_file.read_text(encoding="utf-8")
+
+
+SHARD_LAYOUTS = ("hash", "date")
+
+
+class ShardedFileBackend(FileBackend):
+    """
+    One file per output like FileBackend, for domains with more clips than a directory can comfortably hold.
+
+    Outputs go to a subdirectory per shard, either the first two hex digits of the URL's hash (256 shards, a URL
+    always lands in the same one) or the date they were clipped (YYYY/MM/DD), and are named after the title plus a
+    short hash of the URL, so pages with the same title don't collide. Every saved output is appended to a
+    manifest.jsonl in directory, mapping its URL and format to its path, so clips can be found by URL without walking
+    the tree. The last line for a URL and format wins.
+    """
+
+    name = "sharded"
+    manifest_name = "manifest.jsonl"
+
+    def __init__(self, create_domain_subdir: bool = True, directory: str | Path = ".", shard_by: str = "hash"):
+        if shard_by not in SHARD_LAYOUTS:
+            raise ClipitError(f"Unknown shard layout: {shard_by}, expected one of {', '.join(SHARD_LAYOUTS)}")
+        super().__init__(create_domain_subdir=create_domain_subdir, directory=directory)
+        self.shard_by = shard_by
+        self.manifest_path = self.directory / self.manifest_name
+        self._manifest: dict[tuple[str, str], str] | None = None
+        self._lock = threading.Lock()
+
+    def directory_for(self, url: str) -> Path:
+        if self.shard_by == "date":
+            return super().directory_for(url) / time.strftime("%Y/%m/%d")
+        return super().directory_for(url) / url_hash(url)[:2]
+
+    def _output_dir(self, url: str) -> Path:
+        output_dir = self.directory_for(url)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+
+    def locate(self, url: str, format: OutputFormat) -> Path | None:
+        """Where the output of url in format was saved, according to the manifest."""
+        with self._lock:
+            path = self._entries().get((url, format.value))
+        return self.directory / path if path is not None else None
+
+    def write_parts(self, url: str, title: str, format: OutputFormat, parts: list[str], overwrite: bool) -> str | None:
+        previous = self.locate(url, format)
+        if previous is not None and previous.exists() and not overwrite:
+            click.echo(f"{url} ({format.value}) is already in {previous}. Use --overwrite to replace it.")
+            return None
+
+        name = "-".join(part for part in (sanitize_filename(title)[:200], url_hash(url)[:8]) if part)
+        # The manifest already says whether this clip exists, and the name is unique to its URL
+        output_file = write_to_file(parts, str(self._output_dir(url)), name, format.value, overwrite=True)
+        if output_file is None:
+            return None
+        if previous is not None and previous != output_file:
+            # Clipped again under another title or on another day
+            previous.unlink(missing_ok=True)
+
+        self._record(url, title, format, output_file)
+        return str(output_file)
+
+    def read(self, url: str, format: OutputFormat) -> str | None:
+        output_file = self.locate(url, format)
+        if output_file is None or not output_file.exists():
+            return None
+
+        return output_file.read_text(encoding="utf-8")
+
+    def _entries(self) -> dict[tuple[str, str], str]:
+        if self._manifest is None:
+            self._manifest = {}
+            if self.manifest_path.exists():
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            self._manifest[(entry["url"], entry["format"])] = entry["path"]
+                        except (ValueError, KeyError, TypeError):
+                            # A line cut short by a crash, the clip it was about gets saved again
+                            continue
+        return self._manifest
+
+    def _record(self, url: str, title: str, format: OutputFormat, output_file: Path) -> None:
+        path = Path(os.path.relpath(output_file, self.directory)).as_posix()
+        line = json.dumps(
+            {"url": url, "format": format.value, "title": title, "path": path, "clipped_at": time.time()},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._entries()[(url, format.value)] = path
+
+
+class _BatchedBackend(OutputBackend):
+    """A single-file backend that makes its writes durable every batch_size clip outputs instead of after each one."""
+
+    extension = ""
+
+    def __init__(self, path: str | Path, batch_size: int = 100):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, url: str, title: str, format: OutputFormat, content: str, overwrite: bool) -> str | None:
+        with self._lock:
+            if not overwrite and self._contains(url, format):
+                click.echo(f"{url} ({format.value}) is already in {self.path}. Use --overwrite to replace it.")
+                return None
+
+            try:
+                location = self._write(url, title, format, content)
+                self._pending += 1
+                if self._pending >= self.batch_size:
+                    self._commit()
+                    self._pending = 0
+            except Exception as e:
+                raise ClipitError(f"Error writing {url} to {self.path}: {e}")
+
+        click.echo(f"Saved {format.value} content to {self.path}:{location}")
+        return f"{self.path}:{location}"
+
+    def read(self, url: str, format: OutputFormat) -> str | None:
+        with self._lock:
+            return self._read(url, format)
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            self._pending = 0
+            self._close()
+
+    @abstractmethod
+    def _contains(self, url: str, format: OutputFormat) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write(self, url: str, title: str, format: OutputFormat, content: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _read(self, url: str, format: OutputFormat) -> str | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _commit(self) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ZipBackend(_BatchedBackend):
+    """
+    Every clip output is a deflated member of a single zip archive, named <domain>/<url hash>.<format>.
+
+    Zip archives can only be appended to, so an overwritten output is appended again, and the archive is rewritten
+    without the outputs it replaced when the batch is committed.
+    """
+
+    name = "zip"
+    extension = "zip"
+
+    def __init__(self, path: str | Path, batch_size: int = 100):
+        super().__init__(path, batch_size)
+        self._zip = zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED)
+        self._replaced = False
+
+    def _member(self, url: str, format: OutputFormat) -> str:
+        return f"{clip_key(url)}.{format.value}"
+
+    def _contains(self, url: str, format: OutputFormat) -> bool:
+        return self._member(url, format) in self._zip.NameToInfo
+
+    def _write(self, url: str, title: str, format: OutputFormat, content: str) -> str:
+        member = self._member(url, format)
+        info = zipfile.ZipInfo(member, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # Keep the URL and title next to the content, so the archive makes sense on its own
+        info.comment = f"{url}\n{title}".encode("utf-8")[:65535]
+        if member in self._zip.NameToInfo:
+            self._replaced = True
+        with warnings.catch_warnings():
+            # A duplicate name until the commit drops the member it replaces
+            warnings.simplefilter("ignore", UserWarning)
+            self._zip.writestr(info, content)
+
+        return member
+
+    def _read(self, url: str, format: OutputFormat) -> str | None:
+        member = self._member(url, format)
+        if member not in self._zip.NameToInfo:
+            return None
+
+        return self._zip.read(member).decode("utf-8")
+
+    def _commit(self) -> None:
+        # The central directory is only written when the archive is closed, so that's what makes the batch durable
+        self._zip.close()
+        if self._replaced:
+            self._drop_replaced()
+            self._replaced = False
+        _fsync(self.path)
+        self._zip = zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED)
+
+    def _drop_replaced(self) -> None:
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with zipfile.ZipFile(self.path) as source, zipfile.ZipFile(tmp_path, "w") as target:
+            for info in source.infolist():
+                # The last member with a name is the one NameToInfo has
+                if source.NameToInfo[info.filename] is info:
+                    target.writestr(info, source.read(info))
+        _fsync(tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _close(self) -> None:
+        self._zip.close()
+
+
+class TarBackend(_BatchedBackend):
+    """
+    Every clip output is a gzip-compressed member of a single tar archive, named <domain>/<url hash>.<format>.gz.
+
+    Compressing the members instead of the whole archive is what lets us keep appending to it across runs.
+    """
+
+    name = "tar"
+    extension = "tar"
+
+    def __init__(self, path: str | Path, batch_size: int = 100):
+        super().__init__(path, batch_size)
+        self._tar = tarfile.open(self.path, "a")
+        self._members = {member.name: member for member in self._tar.getmembers()}
+
+    def _member(self, url: str, format: OutputFormat) -> str:
+        return f"{clip_key(url)}.{format.value}.gz"
+
+    def _contains(self, url: str, format: OutputFormat) -> bool:
+        return self._member(url, format) in self._members
+
+    def _write(self, url: str, title: str, format: OutputFormat, content: str) -> str:
+        member = self._member(url, format)
+        data = gzip.compress(content.encode("utf-8"))
+        info = tarfile.TarInfo(member)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.pax_headers = {"clipit.url": url, "clipit.title": title}
+        self._tar.addfile(info, io.BytesIO(data))
+        # The data ends the archive, padded to a whole block, which is where _read finds it. Overwritten outputs are
+        # appended again, and tar readers, like this index, go by the last member with a name
+        blocks = -(-info.size // tarfile.BLOCKSIZE)
+        info.offset_data = self._tar.offset - blocks * tarfile.BLOCKSIZE
+        self._members[member] = info
+
+        return member
+
+    def _read(self, url: str, format: OutputFormat) -> str | None:
+        info = self._members.get(self._member(url, format))
+        if info is None:
+            return None
+
+        # Straight to the member's data, instead of going through the whole archive for it
+        self._commit()
+        with open(self.path, "rb") as f:
+            f.seek(info.offset_data)
+            return gzip.decompress(f.read(info.size)).decode("utf-8")
+
+    def _commit(self) -> None:
+        if self._tar.fileobj is not None:
+            self._tar.fileobj.flush()
+            os.fsync(self._tar.fileobj.fileno())
+
+    def _close(self) -> None:
+        self._tar.close()
+
+
+class SqliteBackend(_BatchedBackend):
+    """Every clip output is a row of a single SQLite database, keyed on URL and format."""
+
+    name = "sqlite"
+    extension = "sqlite"
+
+    def __init__(self, path: str | Path, batch_size: int = 100):
+        super().__init__(path, batch_size)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL plus synchronous=NORMAL only syncs at checkpoints, each batch is then a single transaction
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS clips (
+                url TEXT NOT NULL,
+                format TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                clipped_at REAL NOT NULL,
+                PRIMARY KEY (url, format)
+            )
+            """
+        )
+        self._db.commit()
+
+    def _contains(self, url: str, format: OutputFormat) -> bool:
+        row = self._db.execute("SELECT 1 FROM clips WHERE url = ? AND format = ?", (url, format.value)).fetchone()
+        return row is not None
+
+    def _write(self, url: str, title: str, format: OutputFormat, content: str) -> str:
+        self._db.execute(
+            "INSERT OR REPLACE INTO clips (url, format, title, content, clipped_at) VALUES (?, ?, ?, ?, ?)",
+            (url, format.value, title, content, time.time()),
+        )
+
+        return f"{url} ({format.value})"
+
+    def _read(self, url: str, format: OutputFormat) -> str | None:
+        row = self._db.execute("SELECT content FROM clips WHERE url = ? AND format = ?", (url, format.value)).fetchone()
+        return row[0] if row else None
+
+    def _commit(self) -> None:
+        self._db.commit()
+
+    def _close(self) -> None:
+        self._db.close()
+
+
+BACKENDS: dict[str, type[OutputBackend]] = {
+    FileBackend.name: FileBackend,
+    ShardedFileBackend.name: ShardedFileBackend,
+    ZipBackend.name: ZipBackend,
+    TarBackend.name: TarBackend,
+    SqliteBackend.name: SqliteBackend,
+}
+
+
+def create_backend(
+    name: str,
+    archive_path: str | Path | None = None,
+    create_domain_subdir: bool = True,
+    batch_size: int = 100,
+    shard_by: str = "hash",
+) -> OutputBackend:
+    """Create a backend by name, archives default to clips.<extension> in the working directory."""
+    if name == FileBackend.name:
+        return FileBackend(create_domain_subdir=create_domain_subdir)
+    if name == ShardedFileBackend.name:
+        return ShardedFileBackend(create_domain_subdir=create_domain_subdir, shard_by=shard_by)
+
+    backend_class = BACKENDS.get(name)
+    if backend_class is None or not issubclass(backend_class, _BatchedBackend):
+        raise ClipitError(f"Unknown output backend: {name}")
+
+    return backend_class(archive_path or f"clips.{backend_class.extension}", batch_size=batch_size)
+
+
+def save_outputs(
+    backend: OutputBackend,
+    title: str,
+    outputs: dict[OutputFormat, str],
+    url: str,
+    overwrite: bool,
+) -> dict[OutputFormat, str]:
+    """Save the file outputs of a clip to backend and print the others. Returns where each saved output went."""
+    locations = {}
+    for format, output in outputs.items():
+        if output is None:
+            continue
+        if format.is_file_output():
+            location = backend.write(url, title, format, output, overwrite)
+            if location is not None:
+                locations[format] = location
+        else:
+            click.echo(output)
+
+    return locations
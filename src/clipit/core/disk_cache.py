@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+
+class DiskLru:
+    """
+    The files of an on-disk cache, kept to max_bytes by evicting the least recently used entries.
+
+    Each entry is stored as cache_dir/<first two characters of its key>/<key><suffix>, one file per suffix. The file
+    of the first suffix is written last, so an entry only shows up once it's complete, and its mtime doubles as the
+    entry's last access time.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int, suffixes: tuple[str, ...] = (".json",)):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffixes = suffixes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def path(self, key: str, suffix: str | None = None) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix or self.suffixes[0]}"
+
+    def touch(self, key: str) -> None:
+        """Mark the entry as just used, raises OSError if it isn't there."""
+        os.utime(self.path(key))
+
+    def write(self, key: str, files: dict[str, bytes]) -> None:
+        """Store the files of an entry, replacing the previous ones, then evict entries if the cache got too big."""
+        size = sum(len(data) for data in files.values())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            total_bytes = self._get_total_bytes()
+            previous_size = self._size(key)
+            self.path(key).parent.mkdir(parents=True, exist_ok=True)
+            for suffix in reversed(self.suffixes):
+                atomic_write(self.path(key, suffix), files[suffix])
+
+            self._total_bytes = total_bytes + size - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _size(self, key: str) -> int:
+        size = 0
+        for suffix in self.suffixes:
+            try:
+                size += self.path(key, suffix).stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def _get_total_bytes(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+
+        return self._total_bytes
+
+    def _entries(self):
+        for path in self.cache_dir.glob(f"*/*{self.suffixes[0]}"):
+            try:
+                last_access = path.stat().st_mtime
+            except OSError:
+                continue
+            key = path.name.removesuffix(self.suffixes[0])
+            yield key, self._size(key), last_access
+
+    def _evict(self) -> None:
+        # Evict a bit more than strictly needed, so we don't end up scanning the whole cache on every write
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda item: item[2])
+        total_bytes = sum(size for _, size, _ in entries)
+
+        for key, size, _ in entries:
+            if total_bytes <= target:
+                break
+            for suffix in self.suffixes:
+                self.path(key, suffix).unlink(missing_ok=True)
+            total_bytes -= size
+
+        self._total_bytes = total_bytes
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write data to path so that readers see either the previous content or the new one, never part of it."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
@@ -1,10 +1,56 @@
+import codecs
+import re
+
 import requests
 from requests import RequestException
 
 from clipit.core import ClipitError
+from clipit.core.session import DEFAULT_MAX_DOWNLOAD_BYTES, ClipitSession
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml", "text/plain")
+JSON_CONTENT_TYPES = ("application/json", "text/json")
+# Entries ending with a slash match every subtype
+IMAGE_CONTENT_TYPES = ("image/",)
+
+_CHUNK_SIZE = 64 * 1024
+# Browsers look for <meta charset> in the first 1024 bytes, we're a bit more lenient
+_CHARSET_PRESCAN_BYTES = 4096
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+
+
+def download_html_content(
+    url,
+    user_agent: str | None,
+    session: requests.Session | None = None,
+    content_types: tuple[str, ...] = HTML_CONTENT_TYPES,
+) -> str:
+    """
+    Download a page and decode it, streaming the body so we can give up early on oversized or non-HTML responses.
+
+    Only responses with one of the given content types (or none at all) are accepted.
+    """
+    body, content_type = download_content(url, user_agent, session, content_types)
+    return decode_html(body, content_type)
+
 
+def download_content(
+    url,
+    user_agent: str | None,
+    session: requests.Session | None = None,
+    content_types: tuple[str, ...] = HTML_CONTENT_TYPES,
+    max_bytes: int | None = None,
+) -> tuple[bytes | bytearray, str | None]:
+    """
+    Download anything, through the session's HTTP cache if it has one, and return its body and content type.
 
-def download_html_content(url, user_agent: str | None) -> str:
+    Responses larger than max_bytes, the session's limit by default, are abandoned mid-download.
+    """
     try:
         request_headers = {
             "User-Agent": user_agent,
@@ -14,10 +60,106 @@ def download_html_content(url, user_agent: str | None) -> str:
         if user_agent is None:
             del request_headers["User-Agent"]
 
-        response = requests.get(url, headers=request_headers)
-        response.raise_for_status()
-        html_content = response.content.decode("utf-8")
+        cache = None
+        session_max_bytes = DEFAULT_MAX_DOWNLOAD_BYTES
+        if isinstance(session, ClipitSession):
+            cache = session.cache
+            session_max_bytes = session.max_download_bytes
+        if max_bytes is None:
+            max_bytes = session_max_bytes
+
+        key = None
+        cached = None
+        if cache is not None:
+            key = cache.key(url, request_headers)
+            cached = cache.lookup(key)
+
+        conditional_headers = cache.conditional_headers(cached) if cache is not None and cached is not None else {}
+        http = session or requests
+        response = http.get(url, headers={**request_headers, **conditional_headers}, stream=True)
+        try:
+            if response.status_code == 304 and cache is not None and key is not None and cached is not None:
+                body = cache.read_body(key)
+                if body is not None:
+                    return body, cached.content_type
+
+                # The cached body went away in the meantime, so fetch the page again, unconditionally this time
+                response.close()
+                response = http.get(url, headers=request_headers, stream=True)
+
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type")
+            _check_content_type(url, content_type, content_types)
+            body = _read_body(url, response, max_bytes)
+        finally:
+            response.close()
+
+        if cache is not None and key is not None:
+            cache.store(
+                key,
+                url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_type=content_type,
+                body=body,
+            )
     except RequestException as e:
         raise ClipitError(f"Error downloading {url}: {e}")
 
-    return html_content
+    return body, content_type
+
+
+def _check_content_type(url, content_type: str | None, content_types: tuple[str, ...]) -> None:
+    if not content_type:
+        return
+
+    mime_type = content_type.split(";", 1)[0].strip().lower()
+    if not any(
+        mime_type == accepted or (accepted.endswith("/") and mime_type.startswith(accepted))
+        for accepted in content_types
+    ):
+        raise ClipitError(f"Error downloading {url}: expected {' or '.join(content_types)}, got {mime_type}")
+
+
+def _read_body(url, response: requests.Response, max_bytes: int) -> bytearray:
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ClipitError(f"Error downloading {url}: the response is larger than {max_bytes} bytes")
+
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise ClipitError(f"Error downloading {url}: the response is larger than {max_bytes} bytes")
+
+    return body
+
+
+def detect_encoding(body: bytes | bytearray, content_type: str | None) -> str:
+    """Pick the page's encoding the way browsers do: byte order mark, then Content-Type, then <meta>, then UTF-8."""
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+
+    candidates = []
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        if match:
+            candidates.append(match.group(1))
+
+    # A memoryview slice, so we don't copy the head of the body just to look at it
+    match = _META_CHARSET.search(memoryview(body)[:_CHARSET_PRESCAN_BYTES])
+    if match:
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+
+    return "utf-8"
+
+
+def decode_html(body: bytes | bytearray, content_type: str | None) -> str:
+    return body.decode(detect_encoding(body, content_type), errors="replace")
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from pathlib import Path
 
 
 @dataclass
@@ -9,6 +10,53 @@ class RenderFlags:
 
 
 @dataclass
-class OutputFlags:
-    create_domain_subdir: bool
-    overwrite: bool
+class AssetOptions:
+    # The content-addressed store the images are downloaded to
+    directory: Path
+    # How the outputs link to the store, the directory itself by default
+    link_prefix: str | None = None
+    # Images larger than this are left where they are
+    max_bytes: int = 10 * 1024 * 1024
+    # How many images of a page to download at the same time
+    concurrency: int = 8
+
+
+@dataclass
+class StageConcurrency:
+    download: int = 8
+    extract: int = 2
+    convert: int = 2
+    write: int = 1
+    queue_size: int = 32
+
+
+@dataclass
+class PolitenessPolicy:
+    # Requests per second sent to any one host, and how many can go out at once after a pause. None means unlimited
+    requests_per_second: float | None = None
+    burst: int = 4
+    # Connections open to any one host at the same time, the other requests wait for one. None means unlimited
+    max_connections_per_host: int | None = None
+    # Retries of connection errors, 429s and 5xxs, backing off exponentially (backoff_factor * 2^n, plus jitter), and
+    # waiting for their turn like any other request
+    retries: int = 0
+    backoff_factor: float = 0.5
+    backoff_max: float = 60.0
+    # Give up instead of waiting when a Retry-After asks for longer than this, in seconds
+    max_retry_after: float = 120.0
+    respect_robots_txt: bool = False
+    robots_txt_ttl: float = 3600.0
+
+
+@dataclass
+class ClipResult:
+    url: str
+    title: str | None = None
+    error: Exception | None = None
+    failed_stage: str | None = None
+    # Already in the clip index, so it wasn't clipped again
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
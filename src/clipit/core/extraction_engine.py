@@ -0,0 +1,12 @@
+from clipit.core.misc import ClipitError
+
+# readabilipy: Readability.js, or readabilipy's Python extraction when Node isn't there or use_readability_js is off
+# lxml: clipit's own extraction, scoring the page's blocks in a single pass over its lxml tree
+ENGINES = ("readabilipy", "lxml")
+DEFAULT_ENGINE = "readabilipy"
+
+
+def check_engine(engine: str) -> str:
+    if engine not in ENGINES:
+        raise ClipitError(f"Unknown extraction engine: {engine}")
+    return engine
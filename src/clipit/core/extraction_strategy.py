@@ -0,0 +1,166 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum
+from functools import cached_property
+
+import lxml.html
+from lxml import etree
+from readabilipy.extractors.extract_title import combine_similar_titles
+from readabilipy.simplifiers import normalise_whitespace
+
+
+class Strategy(Enum):
+    READABILITY_JS = "readability_js"
+    PYTHON = "python"
+
+
+# The same xpaths and scores readabilipy's extract_title uses
+_TITLE_XPATHS = [
+    ('//header[@class="entry-header"]/h1[@class="entry-title"]//text()', 4),
+    ('//meta[@property="og:title"]/@content', 4),
+    ('//h1[@class="entry-title"]//text()', 3),
+    ('//h1[@itemprop="headline"]//text()', 3),
+    ('//h2[@itemprop="headline"]//text()', 2),
+    ('//meta[contains(@itemprop, "headline")]/@content', 2),
+    ("//body/title//text()", 1),
+    ('//div[@class="postarea"]/h2/a//text()', 1),
+    ('//h1[@class="post__title"]//text()', 1),
+    ('//h1[@class="title"]//text()', 1),
+    ("//head/title//text()", 1),
+    ("//header/h1//text()", 1),
+    ('//meta[@name="dcterms.title"]/@content', 1),
+    ('//meta[@name="fb_title"]/@content', 1),
+    ('//meta[@name="sailthru.title"]/@content', 1),
+    ('//meta[@name="title"]/@content', 1),
+]
+
+# Readability.js' isProbablyReaderable heuristics
+UNLIKELY_CANDIDATES = re.compile(
+    r"-ad-|ai2html|banner|breadcrumbs|combx|comment|community|cover-wrap|disqus|extra|footer|gdpr|header|legends|menu|"
+    r"related|remark|replies|rss|shoutbox|sidebar|skyscraper|social|sponsor|supplemental|ad-break|agegate|pagination|"
+    r"pager|popup|yom-remote",
+    re.IGNORECASE,
+)
+MAYBE_CANDIDATE = re.compile(r"and|article|body|column|content|main|shadow", re.IGNORECASE)
+_MIN_CONTENT_LENGTH = 140
+_MIN_SCORE = 20
+
+
+class ParsedPage:
+    """A page's HTML plus its lxml tree, parsed at most once and shared by every extraction attempt."""
+
+    def __init__(self, html: str):
+        self.html = html
+
+    @cached_property
+    def tree(self) -> etree._Element | None:
+        try:
+            return lxml.html.fromstring(self.html)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def release_tree(self) -> None:
+        """Free the parsed tree, it gets parsed again if it's needed after all."""
+        self.__dict__.pop("tree", None)
+
+    def is_probably_readable(self) -> bool:
+        """
+        Whether Readability.js is likely to find an article in this page, the same way its isProbablyReaderable does.
+
+        Scores every paragraph-like node with enough text outside of likely boilerplate, without running any of the
+        actual extraction.
+        """
+        if self.tree is None:
+            return False
+
+        score = 0.0
+        for node in self.tree.iter("p", "pre", "article"):
+            match_string = f"{node.get('class', '')} {node.get('id', '')}"
+            if UNLIKELY_CANDIDATES.search(match_string) and not MAYBE_CANDIDATE.search(match_string):
+                continue
+            if node.tag == "p" and node.getparent() is not None and node.getparent().tag == "li":
+                continue
+
+            text_length = len(node.text_content().strip())
+            if text_length < _MIN_CONTENT_LENGTH:
+                continue
+
+            score += math.sqrt(text_length - _MIN_CONTENT_LENGTH)
+            if score > _MIN_SCORE:
+                return True
+
+        return False
+
+    def extract_title(self) -> str | None:
+        """Same result as readabilipy's extract_title, reusing the parsed tree."""
+        if self.tree is None:
+            return None
+
+        extracted_strings: dict[str, dict] = defaultdict(dict)
+        for xpath, score in _TITLE_XPATHS:
+            found_elements = self.tree.xpath(xpath)
+            found_elements = found_elements if isinstance(found_elements, list) else [found_elements]
+            for found_element in found_elements:
+                element = normalise_whitespace(found_element)
+                if element:
+                    if element in extracted_strings:
+                        extracted_strings[element]["score"] += score
+                        extracted_strings[element]["xpaths"].append(xpath)
+                        extracted_strings[element]["xpaths"].sort()
+                    else:
+                        extracted_strings[element]["score"] = score
+                        extracted_strings[element]["xpaths"] = [xpath]
+
+        extracted_titles = combine_similar_titles(extracted_strings)
+        if not extracted_titles:
+            return None
+
+        return max(extracted_titles, key=lambda x: extracted_titles[x].get("score"))
+
+
+@dataclass
+class _HostRecord:
+    readability_js_wins: int = 0
+    readability_js_misses: int = 0
+
+
+class StrategyMemory:
+    """
+    Remembers, per host, whether Readability.js found content, so hosts where it keeps coming up empty go straight
+    to the Python extraction.
+    """
+
+    def __init__(self, min_misses: int = 2):
+        self.min_misses = min_misses
+        self._hosts: dict[str, _HostRecord] = defaultdict(_HostRecord)
+        self._lock = threading.Lock()
+
+    def preferred(self, host: str | None) -> Strategy | None:
+        if not host:
+            return None
+        with self._lock:
+            record = self._hosts.get(host)
+            if record is None:
+                return None
+            if record.readability_js_misses >= self.min_misses and (
+                record.readability_js_misses > record.readability_js_wins
+            ):
+                return Strategy.PYTHON
+
+            return Strategy.READABILITY_JS
+
+    def record(self, host: str | None, readability_js_found_content: bool) -> None:
+        if not host:
+            return
+        with self._lock:
+            record = self._hosts[host]
+            if readability_js_found_content:
+                record.readability_js_wins += 1
+            else:
+                record.readability_js_misses += 1
+
+
+strategy_memory = StrategyMemory()
@@ -1,18 +1,108 @@
-from readabilipy import simple_json_from_html_string
+from urllib.parse import urlparse
+
+from readabilipy.simple_tree import simple_tree_from_html_string
 
 from clipit.core import ClipitError
+from clipit.core.artifact_cache import cached
+from clipit.core.extraction_engine import DEFAULT_ENGINE, check_engine
+from clipit.core.extraction_strategy import ParsedPage, Strategy, strategy_memory
+from clipit.core.instrumentation import timed
+from clipit.core.lxml_extractor import extract_with_lxml
+from clipit.core.readability_pool import get_readability_pool
+
+
+def _readability_js_json(html_content):
+    pool = get_readability_pool()
+    if pool is None:
+        return None
+
+    # Same fields as readabilipy's simple_json_from_html_string, minus the ones we don't use
+    article = pool.parse(html_content) or {}
+    return {
+        "title": article.get("title") or None,
+        "content": article.get("content") or None,
+    }
+
+
+def _python_json(page: ParsedPage):
+    # Same as readabilipy's simple_json_from_html_string without Readability.js, but the title comes from the tree
+    # we may already have parsed, and we skip the date extraction (and its parse) since we don't use it
+    title = page.extract_title()
+    # The lxml tree isn't needed anymore, no need to keep it around while readabilipy builds its own
+    page.release_tree()
+    return {
+        "title": title,
+        "content": str(simple_tree_from_html_string(page.html)),
+    }
+
+
+def _should_try_readability_js(page: ParsedPage, host: str | None) -> bool:
+    preferred = strategy_memory.preferred(host)
+    if preferred is not None:
+        return preferred == Strategy.READABILITY_JS
+
+    # Pages that obviously have no article would only cost us a Node round trip before falling back anyway
+    return page.is_probably_readable()
+
+
+def extract_readable_content_and_title(
+    html_content, use_readability_js, url: str | None = None, engine: str = DEFAULT_ENGINE
+):
+    """
+    The readable content and title of a page, through the active artifact cache if there's one.
 
+    engine is one of ENGINES, the lxml engine ignores use_readability_js.
+    """
+    check_engine(engine)
+    if engine == "lxml":
+        content_html, title = cached("extract", html_content, (engine,), lambda: _extract_with_lxml(html_content))
+        return content_html, title
 
-def extract_readable_content_and_title(html_content, use_readability_js):
+    page = ParsedPage(html_content)
+    host = urlparse(url).hostname if url else None
+    # Whether Readability.js runs depends on more than the page (Node, the host's strategy memory), so the cached
+    # extractions are keyed on the strategy tried first
+    if use_readability_js and _should_try_readability_js(page, host) and get_readability_pool() is not None:
+        strategy = Strategy.READABILITY_JS
+    else:
+        strategy = Strategy.PYTHON
+    content_html, title = cached(
+        "extract",
+        html_content,
+        (strategy.value, engine),
+        lambda: _extract_readable_content_and_title(page, strategy, host, use_readability_js),
+    )
+    return content_html, title
+
+
+def _extract_with_lxml(html_content) -> tuple[str, str]:
+    try:
+        with timed("lxml"):
+            content_html, title = extract_with_lxml(ParsedPage(html_content))
+    except Exception as e:
+        raise ClipitError(f"Error processing HTML content: {e}")
+    return content_html, (title or "").strip()
+
+
+def _extract_readable_content_and_title(
+    page: ParsedPage, strategy: Strategy, host: str | None, use_readability_js: bool
+) -> tuple[str, str]:
+    """The readable content and title of a page, with Readability.js first if strategy says so."""
     try:
-        rpy = simple_json_from_html_string(html_content, use_readability=use_readability_js)
-        content_html = rpy.get("content") or ""
-
-        # If readability.js fails, try again without it
-        if not content_html and use_readability_js:
-            rpy = simple_json_from_html_string(html_content, use_readability=False)
-            content_html = rpy.get("content", "")
-            if not content_html:
+        rpy = None
+        if strategy == Strategy.READABILITY_JS:
+            with timed("readability_js"):
+                rpy = _readability_js_json(page.html)
+            if rpy is not None:
+                strategy_memory.record(host, readability_js_found_content=bool(rpy.get("content")))
+        content_html = (rpy or {}).get("content") or ""
+
+        # If readability.js fails (or was skipped), use the Python extraction
+        if not content_html:
+            with timed("python"):
+                rpy = _python_json(page)
+            content_html = rpy.get("content") or ""
+            if not content_html and use_readability_js:
                 raise ClipitError("No content found")
 
         content_html = content_html.replace(
@@ -21,7 +111,4 @@ def extract_readable_content_and_title(html_content, use_readability_js):
         title = (rpy.get("title") or "").strip()
     except Exception as e:
         raise ClipitError(f"Error processing HTML content: {e}")
-    return (
-        content_html,
-        title,
-    )
+    return content_html, title
@@ -0,0 +1,390 @@
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+from urllib.parse import urljoin
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+import requests
+from requests import RequestException
+
+from clipit.core import ClipitError
+
+_CHUNK_SIZE = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# The element holding each entry, for every kind of root element
+_ENTRY_TAGS = {
+    "urlset": "url",
+    "sitemapindex": "sitemap",
+    "rss": "item",
+    "RDF": "item",
+    "feed": "entry",
+}
+
+
+@dataclass
+class FeedItem:
+    """One entry of a sitemap or feed, or a sitemap listed by a sitemap index."""
+
+    url: str
+    # The entry's lastmod, updated or pubDate as it was written, if it has one
+    updated: str | None = None
+    is_sitemap: bool = False
+
+
+@dataclass
+class FeedEntry:
+    """A page to clip, from one of the feeds a FeedReader went through."""
+
+    feed: str
+    url: str
+    updated: str | None
+    # Already clipped before, but updated since
+    changed: bool = False
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: Element, *names: str) -> str | None:
+    for name in names:
+        for child in element:
+            if _local_name(child.tag) == name and child.text and child.text.strip():
+                return child.text.strip()
+    return None
+
+
+def _atom_link(entry: Element) -> str | None:
+    for child in entry:
+        if _local_name(child.tag) == "link" and child.get("rel", "alternate") == "alternate" and child.get("href"):
+            return child.get("href").strip()
+    return None
+
+
+def _decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """The chunks as they are, or gunzipped as they come for .xml.gz sitemaps."""
+    decompressor = None
+    for index, chunk in enumerate(chunks):
+        if index == 0 and chunk.startswith(_GZIP_MAGIC):
+            decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        yield decompressor.decompress(chunk) if decompressor is not None else chunk
+    if decompressor is not None:
+        yield decompressor.flush()
+
+
+def parse_feed(chunks: Iterable[bytes], base_url: str) -> Iterator[FeedItem]:
+    """
+    The entries of a sitemap, sitemap index, RSS or Atom feed, parsed as the chunks come in. Every entry is removed
+    from the tree once read, so even a 50,000 URL sitemap never sits in memory in one piece.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    parents: list[Element] = []
+    entry_tag = None
+
+    def read_events() -> Iterator[FeedItem]:
+        nonlocal entry_tag
+        for event, element in parser.read_events():
+            if event == "start":
+                if entry_tag is None:
+                    entry_tag = _ENTRY_TAGS.get(_local_name(element.tag))
+                    if entry_tag is None:
+                        raise ClipitError(f"{base_url} is not a sitemap, RSS or Atom feed")
+                parents.append(element)
+                continue
+
+            parents.pop()
+            if _local_name(element.tag) != entry_tag:
+                continue
+
+            item = _read_entry(element, entry_tag)
+            if parents:
+                parents[-1].remove(element)
+            if item is not None:
+                item.url = urljoin(base_url, item.url)
+                yield item
+
+    try:
+        for chunk in _decompressed(chunks):
+            parser.feed(chunk)
+            yield from read_events()
+        parser.close()
+        yield from read_events()
+    except (ParseError, zlib.error) as e:
+        raise ClipitError(f"Could not parse {base_url}: {e}")
+
+    if entry_tag is None:
+        raise ClipitError(f"{base_url} is empty")
+
+
+def _read_entry(element: Element, entry_tag: str) -> FeedItem | None:
+    if entry_tag in ("url", "sitemap"):
+        url = _child_text(element, "loc")
+        updated = _child_text(element, "lastmod")
+    elif entry_tag == "entry":
+        url = _atom_link(element)
+        updated = _child_text(element, "updated", "published")
+    else:
+        url = _child_text(element, "link")
+        if url is None:
+            guid = next((child for child in element if _local_name(child.tag) == "guid"), None)
+            if guid is not None and guid.get("isPermaLink", "true") == "true" and guid.text:
+                url = guid.text.strip()
+        updated = _child_text(element, "pubDate", "date", "updated")
+
+    if not url:
+        return None
+    return FeedItem(url=url, updated=updated, is_sitemap=entry_tag == "sitemap")
+
+
+def parse_date(value: str | None) -> datetime | None:
+    """A sitemap or Atom (W3C/ISO 8601) or RSS (RFC 822) date, None if it's neither."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FeedState:
+    """
+    What was seen of every feed so far, in SQLite: the ETag and Last-Modified it was last downloaded with, and the
+    entries that were clipped, along with their last modification date. Pass no path to keep it in memory.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+        try:
+            if self.path is not None:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS feeds (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT
+                );
+                CREATE TABLE IF NOT EXISTS feed_entries (
+                    feed TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    updated TEXT,
+                    PRIMARY KEY (feed, url)
+                );
+                """
+            )
+        except sqlite3.OperationalError as e:
+            raise ClipitError(f"Could not create the feed state in {self.path}: {e}")
+
+    def validators(self, feed: str) -> tuple[str | None, str | None]:
+        """The ETag and Last-Modified the feed was last downloaded with, if any."""
+        with self._lock:
+            row = self._db.execute("SELECT etag, last_modified FROM feeds WHERE url = ?", (feed,)).fetchone()
+        return row if row is not None else (None, None)
+
+    def save_validators(self, feed: str, etag: str | None, last_modified: str | None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, last_modified) VALUES (?, ?, ?)", (feed, etag, last_modified)
+            )
+
+    def seen(self, feed: str) -> dict[str, str | None]:
+        """Every entry of the feed clipped so far, with the date it was last updated."""
+        with self._lock:
+            return dict(self._db.execute("SELECT url, updated FROM feed_entries WHERE feed = ?", (feed,)))
+
+    def sitemaps(self, feed: str) -> dict[str, str | None]:
+        """The sitemaps of an index read so far, with their lastmod in the index, empty if feed isn't an index."""
+        with self._lock:
+            return dict(
+                self._db.execute(
+                    "SELECT e.url, e.updated FROM feed_entries e JOIN feeds f ON f.url = e.url WHERE e.feed = ?",
+                    (feed,),
+                )
+            )
+
+    def mark_seen(self, feed: str, url: str, updated: str | None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO feed_entries (feed, url, updated) VALUES (?, ?, ?)", (feed, url, updated)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class FeedReader:
+    """
+    Goes through sitemaps, sitemap indexes, RSS and Atom feeds and yields only their entries that are new or
+    updated since they were last clipped, according to a FeedState.
+
+    Feeds are downloaded with the ETag and Last-Modified of the last time, so an unchanged feed costs one request and
+    no parsing, and the sitemaps of an index are only downloaded when their lastmod changed, or with their own ETag
+    and Last-Modified when the index doesn't give one. Tell the reader how each entry went with done(), and commit()
+    once they all went through: a feed's validators are only saved when all its entries were clipped, so the ones
+    that failed are tried again on the next refresh.
+    """
+
+    def __init__(
+        self,
+        state: FeedState,
+        user_agent: str | None,
+        session: requests.Session | None = None,
+        since: datetime | None = None,
+    ):
+        self.state = state
+        self.user_agent = user_agent
+        self.session = session
+        self.since = since.timestamp() if since is not None else None
+        # The feeds that couldn't be downloaded or parsed, and why
+        self.errors: list[tuple[str, ClipitError]] = []
+        self._lock = threading.Lock()
+        self._visited: set[str] = set()
+        self._yielded: set[str] = set()
+        # The entries yielded that aren't done yet
+        self._queued: dict[str, FeedEntry] = {}
+        self._failures: dict[str, int] = defaultdict(int)
+        # Feed -> the validators it was downloaded with and the sitemaps it listed, once read to the end
+        self._read: dict[str, tuple[tuple[str | None, str | None], list[str]]] = {}
+        self._unchanged: set[str] = set()
+        # Sitemap -> the index listing it and its lastmod there
+        self._indexes: dict[str, tuple[str, str | None]] = {}
+
+    def entries(self, url: str) -> Iterator[FeedEntry]:
+        """The entries of the feed at url (and of its sitemaps, for an index) that are new or updated."""
+        if url in self._visited:
+            return
+        self._visited.add(url)
+
+        try:
+            entries, sitemaps, validators = self._read_feed(url)
+        except ClipitError as e:
+            self.errors.append((url, e))
+            return
+        if validators is None:
+            with self._lock:
+                self._unchanged.add(url)
+            # An unchanged index doesn't mean unchanged sitemaps: those without a lastmod can gain entries without
+            # the index changing, only asking them tells
+            for sitemap, updated in self.state.sitemaps(url).items():
+                if updated is None:
+                    self._indexes[sitemap] = (url, None)
+                    yield from self.entries(sitemap)
+            return
+
+        yield from entries
+        for sitemap in sitemaps:
+            self._indexes[sitemap.url] = (url, sitemap.updated)
+            yield from self.entries(sitemap.url)
+
+        with self._lock:
+            self._read[url] = (validators, [sitemap.url for sitemap in sitemaps])
+
+    def done(self, url: str, ok: bool) -> None:
+        """Record how clipping an entry went, so it isn't clipped again next time, or its feed is read again."""
+        with self._lock:
+            entry = self._queued.pop(url, None)
+            if entry is not None and not ok:
+                self._failures[entry.feed] += 1
+        if entry is not None and ok:
+            self.state.mark_seen(entry.feed, entry.url, entry.updated)
+
+    def commit(self) -> None:
+        """
+        Save the validators of every feed that was read to the end and whose entries were all clipped, and for an
+        index, whose sitemaps were all complete too.
+        """
+        with self._lock:
+            pending = {entry.feed for entry in self._queued.values()}
+            complete = set(self._unchanged)
+
+            def is_complete(feed: str) -> bool:
+                if feed in complete:
+                    return True
+                if feed not in self._read or self._failures[feed] or feed in pending:
+                    return False
+                return all(is_complete(sitemap) for sitemap in self._read[feed][1])
+
+            saved = [feed for feed in self._read if is_complete(feed)]
+
+        for feed in saved:
+            etag, last_modified = self._read[feed][0]
+            self.state.save_validators(feed, etag, last_modified)
+            if feed in self._indexes:
+                index, updated = self._indexes[feed]
+                self.state.mark_seen(index, feed, updated)
+
+    def _read_feed(self, url: str) -> tuple[list[FeedEntry], list[FeedItem], tuple[str | None, str | None] | None]:
+        response = self._get(url)
+        if response is None:
+            return [], [], None
+
+        seen = self.state.seen(url)
+        entries: list[FeedEntry] = []
+        sitemaps: list[FeedItem] = []
+        try:
+            for item in parse_feed(response.iter_content(chunk_size=_CHUNK_SIZE), url):
+                known = item.url in seen
+                if item.is_sitemap:
+                    # Without a lastmod, only asking the sitemap itself tells whether it changed
+                    if not known or item.updated is None or seen[item.url] != item.updated:
+                        sitemaps.append(item)
+                    continue
+                if known and (item.updated is None or seen[item.url] == item.updated):
+                    continue
+                if self.since is not None and item.updated is not None:
+                    updated = parse_date(item.updated)
+                    if updated is not None and updated.timestamp() < self.since:
+                        continue
+
+                entry = FeedEntry(feed=url, url=item.url, updated=item.updated, changed=known)
+                with self._lock:
+                    # Feeds of the same site can list a page more than once
+                    if item.url in self._yielded:
+                        continue
+                    self._yielded.add(item.url)
+                    self._queued[item.url] = entry
+                entries.append(entry)
+        except RequestException as e:
+            raise ClipitError(f"Error downloading {url}: {e}")
+        finally:
+            response.close()
+
+        return entries, sitemaps, (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def _get(self, url: str) -> requests.Response | None:
+        etag, last_modified = self.state.validators(url)
+        headers = {}
+        if self.user_agent is not None:
+            headers["User-Agent"] = self.user_agent
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = (self.session or requests).get(url, headers=headers, stream=True)
+        except RequestException as e:
+            raise ClipitError(f"Error downloading {url}: {e}")
+
+        if response.status_code == 304 or not response.ok:
+            response.close()
+            if response.status_code == 304:
+                return None
+            raise ClipitError(f"Error downloading {url}: {response.status_code} {response.reason}")
+        return response
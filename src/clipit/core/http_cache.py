@@ -0,0 +1,93 @@
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from clipit.core.disk_cache import DiskLru
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    content_type: str | None
+    size: int
+    stored_at: float
+
+
+class HttpCache:
+    """
+    On-disk cache of responses that carry an ETag or Last-Modified validator.
+
+    Entries are keyed on the URL plus the request headers, so the same page fetched with a different user agent or
+    language is cached separately. Cached entries are always revalidated with If-None-Match/If-Modified-Since, a 304
+    lets the download skip the body. When the cache grows past max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        # The metadata of a response, then its body
+        self._files = DiskLru(cache_dir, max_bytes, suffixes=(".json", ".body"))
+
+    @staticmethod
+    def key(url: str, request_headers: dict[str, str]) -> str:
+        headers = "\n".join(f"{name.lower()}: {value}" for name, value in sorted(request_headers.items()))
+        return hashlib.sha256(f"{url}\n{headers}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self._files.path(key, ".json"), self._files.path(key, ".body")
+
+    def lookup(self, key: str) -> CachedResponse | None:
+        meta_path, body_path = self._paths(key)
+        try:
+            meta = CachedResponse(**json.loads(meta_path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not body_path.exists():
+            return None
+
+        return meta
+
+    def conditional_headers(self, entry: CachedResponse) -> dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        return headers
+
+    def read_body(self, key: str) -> bytes | None:
+        _, body_path = self._paths(key)
+        try:
+            body = body_path.read_bytes()
+            self._files.touch(key)
+        except OSError:
+            return None
+
+        return body
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        content_type: str | None,
+        body: bytes,
+    ) -> None:
+        if not etag and not last_modified:
+            # Nothing to revalidate with, so there's no way to skip the download next time
+            return
+        meta = CachedResponse(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            content_type=content_type,
+            size=len(body),
+            stored_at=time.time(),
+        )
+        self._files.write(key, {".json": json.dumps(asdict(meta)).encode("utf-8"), ".body": body})
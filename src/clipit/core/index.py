@@ -0,0 +1,159 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from clipit.core import ClipitError
+
+_CANONICAL_LINK = re.compile(
+    r"<link\b(?=[^>]*\brel\s*=\s*[\"']?canonical\b)[^>]*\bhref\s*=\s*[\"']([^\"'>]+)[\"']",
+    re.IGNORECASE,
+)
+# Only the <head> is worth searching for the canonical link
+_CANONICAL_PRESCAN_CHARS = 32 * 1024
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref)$", re.IGNORECASE)
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase the scheme and host, drop the fragment, tracking parameters and trailing slash."""
+    parsed = urlparse(url.strip())
+    query = urlencode(
+        [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k)]
+    )
+    path = parsed.path.rstrip("/") or "/"
+
+    return urlunparse(
+        parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(), path=path, query=query, fragment="")
+    )
+
+
+def canonical_url(url: str, html_content: str | None = None) -> str:
+    """The page's <link rel="canonical"> if it has one, its normalized URL otherwise."""
+    if html_content:
+        match = _CANONICAL_LINK.search(html_content, 0, _CANONICAL_PRESCAN_CHARS)
+        if match:
+            return normalize_url(urljoin(url, match.group(1)))
+
+    return normalize_url(url)
+
+
+def _fingerprint(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@dataclass
+class SearchResult:
+    url: str
+    title: str
+    snippet: str
+    output_paths: list[str]
+
+
+class ClipIndex:
+    """
+    A SQLite index of every clip: its URL, canonical URL, title, content hash, where its outputs went, and its full
+    text (FTS5), so clips can be found without walking the output tree.
+
+    Fingerprints of every known URL are kept in memory, so "was this already clipped?" doesn't need a query.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        try:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS clips (
+                    url TEXT PRIMARY KEY,
+                    canonical_url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    output_paths TEXT NOT NULL,
+                    clipped_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS clips_canonical_url ON clips (canonical_url);
+                -- Each clip's text has the rowid of its row in clips
+                CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(title, content);
+                """
+            )
+        except sqlite3.OperationalError as e:
+            raise ClipitError(f"Could not create the clip index in {self.path}: {e}")
+
+        self._known: set[int] = set()
+        for url, canonical in self._db.execute("SELECT url, canonical_url FROM clips"):
+            self._known.add(_fingerprint(url))
+            self._known.add(_fingerprint(canonical))
+
+    def contains(self, url: str) -> bool:
+        """Whether the URL (or another URL with the same canonical URL) was already clipped."""
+        candidates = {url, normalize_url(url)}
+        with self._lock:
+            if not any(_fingerprint(candidate) in self._known for candidate in candidates):
+                return False
+
+            # Fingerprints can collide, so confirm with the database
+            for candidate in candidates:
+                row = self._db.execute(
+                    "SELECT 1 FROM clips WHERE url = ? OR canonical_url = ? LIMIT 1", (candidate, candidate)
+                ).fetchone()
+                if row is not None:
+                    return True
+
+        return False
+
+    def record(self, url: str, canonical: str, title: str, content: str, output_paths: list[str]) -> None:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self._lock, self._db:
+            # An upsert rather than a replace, so a clipped again URL keeps its rowid and the text it replaces is
+            # found by rowid, without scanning the whole FTS table
+            (rowid,) = self._db.execute(
+                """
+                INSERT INTO clips (url, canonical_url, title, content_hash, output_paths, clipped_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    canonical_url = excluded.canonical_url,
+                    title = excluded.title,
+                    content_hash = excluded.content_hash,
+                    output_paths = excluded.output_paths,
+                    clipped_at = excluded.clipped_at
+                RETURNING rowid
+                """,
+                (url, canonical, title, content_hash, json.dumps(output_paths), time.time()),
+            ).fetchone()
+            self._db.execute("DELETE FROM clips_fts WHERE rowid = ?", (rowid,))
+            self._db.execute("INSERT INTO clips_fts (rowid, title, content) VALUES (?, ?, ?)", (rowid, title, content))
+            self._known.add(_fingerprint(url))
+            self._known.add(_fingerprint(canonical))
+
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    """
+                    SELECT clips.url, clips.title, snippet(clips_fts, 1, '[', ']', '…', 12), clips.output_paths
+                    FROM clips_fts JOIN clips ON clips.rowid = clips_fts.rowid
+                    WHERE clips_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                    """,
+                    (query, limit),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ClipitError(f"Invalid search query {query!r}: {e}")
+
+        return [
+            SearchResult(url=url, title=title, snippet=snippet, output_paths=json.loads(output_paths))
+            for url, title, snippet, output_paths in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
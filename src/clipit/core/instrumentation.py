@@ -0,0 +1,170 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import pstats
+
+
+@dataclass
+class StageEvent:
+    url: str
+    # Nested stages are named after their parent, e.g. convert.mdformat
+    stage: str
+    seconds: float = 0.0
+    # The size of what the stage produced (raw HTML, readable HTML, Markdown, saved outputs), in UTF-8 bytes
+    bytes: int | None = None
+    ok: bool = True
+
+
+MetricsSink = Callable[[StageEvent], None]
+
+# The instrumentation, URL and stage of whatever the current thread is clipping, for the nested stages to report to
+_current: ContextVar[tuple["Instrumentation", str, str] | None] = ContextVar("clipit_instrumentation", default=None)
+
+
+class Instrumentation:
+    """
+    Sends a StageEvent to every sink each time a stage of a clip finishes, failed stages included.
+
+    Without sinks nothing is timed or measured, so an idle Instrumentation costs next to nothing.
+    """
+
+    def __init__(self, sinks: Iterable[MetricsSink] | None = None):
+        self.sinks: list[MetricsSink] = list(sinks or [])
+
+    def add_sink(self, sink: MetricsSink) -> None:
+        self.sinks.append(sink)
+
+    @contextmanager
+    def stage(self, url: str, stage: str) -> Iterator[StageEvent | None]:
+        """Time the block as a stage of clipping url. Yields the event so the block can fill in its size."""
+        if not self.sinks:
+            yield None
+            return
+
+        event = StageEvent(url=url, stage=stage)
+        token = _current.set((self, url, stage))
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException:
+            event.ok = False
+            raise
+        finally:
+            event.seconds = time.perf_counter() - start
+            _current.reset(token)
+            for sink in self.sinks:
+                sink(event)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[StageEvent | None]:
+    """Time the block as a part of the stage the current thread is in, if any. For the grabbers and converters."""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+
+    instrumentation, url, parent = current
+    with instrumentation.stage(url, f"{parent}.{stage}") as event:
+        yield event
+
+
+def utf8_size(text: str | None) -> int | None:
+    return len(text.encode("utf-8", errors="replace")) if text is not None else None
+
+
+@dataclass
+class StageTotals:
+    count: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    bytes: int | None = None
+
+
+class StageProfile:
+    """A metrics sink adding up how long each stage took and how much it produced, across every clip."""
+
+    def __init__(self):
+        self.totals: dict[str, StageTotals] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: StageEvent) -> None:
+        with self._lock:
+            totals = self.totals.setdefault(event.stage, StageTotals())
+            totals.count += 1
+            totals.failed += not event.ok
+            totals.seconds += event.seconds
+            if event.bytes is not None:
+                totals.bytes = (totals.bytes or 0) + event.bytes
+
+    def report(self) -> str:
+        # Nested stages finish before their parents, so order by the parents' first appearance instead
+        parents: dict[str, int] = {}
+        for stage in self.totals:
+            parents.setdefault(stage.split(".")[0], len(parents))
+        stages = sorted(self.totals, key=lambda stage: (parents[stage.split(".")[0]], stage))
+
+        lines = [f"{'stage':<28} {'count':>6} {'failed':>6} {'total':>10} {'mean':>10} {'bytes':>12}"]
+        for stage in stages:
+            totals = self.totals[stage]
+            depth = stage.count(".")
+            name = "  " * depth + stage.rsplit(".", 1)[-1]
+            size = totals.bytes if totals.bytes is not None else "-"
+            lines.append(
+                f"{name:<28} {totals.count:>6} {totals.failed:>6} {totals.seconds:>9.3f}s "
+                f"{totals.seconds / totals.count * 1000:>8.1f}ms {size:>12}"
+            )
+        return "\n".join(lines)
+
+
+class ThreadProfiler:
+    """
+    cProfile for the current thread and every thread started while it's running, merged into one set of stats.
+
+    A profiler only sees the thread it was enabled in, and clipping batches happens on the pipeline's threads.
+    """
+
+    def __init__(self):
+        import cProfile
+
+        self._profiles = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ThreadProfiler":
+        threading.setprofile(self._profile_thread)
+        self._profiles[0].enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiles[0].disable()
+        threading.setprofile(None)
+
+    def _profile_thread(self, frame, event, arg):
+        # Called on the new thread's first event, cProfile then takes over as its profile function
+        import cProfile
+
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Newer Pythons only allow one profiler at a time
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stats(self) -> "pstats.Stats":
+        import pstats
+
+        with self._lock:
+            first, *others = self._profiles
+            stats = pstats.Stats(first)
+            for profile in others:
+                stats.add(profile)
+        return stats
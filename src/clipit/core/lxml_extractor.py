@@ -0,0 +1,279 @@
+import re
+
+from lxml import etree
+
+from clipit.core.extraction_strategy import MAYBE_CANDIDATE, UNLIKELY_CANDIDATES, ParsedPage
+from clipit.core.misc import ClipitError
+
+# Never part of the readable content, dropped along with everything in them
+_JUNK_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "link",
+    "meta",
+    "iframe",
+    "object",
+    "embed",
+    "svg",
+    "canvas",
+    "button",
+    "input",
+    "select",
+    "textarea",
+    "nav",
+    "aside",
+    "footer",
+}
+# Kept even when their class or id looks like boilerplate
+_ALWAYS_CANDIDATES = {"html", "body", "article", "main", "a"}
+# The nodes holding the page's text, the ones that get scored
+_PARAGRAPH_TAGS = {"p", "pre", "td"}
+# A div without any of these is scored as a paragraph too
+_BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "dl",
+    "div",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "ul",
+}
+# Readability.js' starting scores for the containers of scored paragraphs, by tag and by class or id
+_TAG_SCORES = {
+    "div": 5,
+    "article": 5,
+    "main": 5,
+    "section": 3,
+    "pre": 3,
+    "td": 3,
+    "blockquote": 3,
+    "address": -3,
+    "ol": -3,
+    "ul": -3,
+    "dl": -3,
+    "dd": -3,
+    "dt": -3,
+    "li": -3,
+    "h1": -5,
+    "h2": -5,
+    "h3": -5,
+    "h4": -5,
+    "h5": -5,
+    "h6": -5,
+    "th": -5,
+}
+_POSITIVE = re.compile(r"article|body|content|entry|hentry|h-entry|main|page|pagination|post|text|blog|story", re.I)
+_NEGATIVE = re.compile(
+    r"-ad-|hidden|^hid$| hid$| hid |^hid |banner|combx|comment|com-|contact|foot|footer|footnote|gdpr|masthead|media|"
+    r"meta|outbrain|promo|related|scroll|share|shoutbox|sidebar|skyscraper|sponsor|shopping|tags|tool|widget",
+    re.I,
+)
+_SENTENCE_END = re.compile(r"\.( |$)")
+_MIN_PARAGRAPH_LENGTH = 25
+# Attributes the Markdown conversion and the readable HTML output have a use for, the rest are dropped
+_KEPT_ATTRIBUTES = {"href", "src", "alt", "title", "colspan", "rowspan", "start", "lang", "dir"}
+
+
+def _match_string(node: etree._Element) -> str:
+    return f"{node.get('class', '')} {node.get('id', '')}"
+
+
+def _class_weight(node: etree._Element) -> int:
+    match_string = _match_string(node)
+    if match_string == " ":
+        return 0
+    return (25 if _POSITIVE.search(match_string) else 0) - (25 if _NEGATIVE.search(match_string) else 0)
+
+
+def _is_junk(node) -> bool:
+    if not isinstance(node.tag, str):
+        # Comments and processing instructions
+        return True
+    if node.tag in _JUNK_TAGS:
+        return True
+    if node.tag in _ALWAYS_CANDIDATES:
+        return False
+    match_string = _match_string(node)
+    return bool(UNLIKELY_CANDIDATES.search(match_string)) and not MAYBE_CANDIDATE.search(match_string)
+
+
+def _is_paragraph(node: etree._Element) -> bool:
+    if node.tag in _PARAGRAPH_TAGS:
+        return True
+    return node.tag == "div" and not any(child.tag in _BLOCK_TAGS for child in node)
+
+
+def _link_density(node: etree._Element, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_length = sum(len(link.text_content()) for link in node.iter("a"))
+    return link_length / text_length
+
+
+def _score_blocks(body: etree._Element) -> dict[etree._Element, float]:
+    """
+    Drop the junk and score every container of a paragraph in a single pass over the tree: each paragraph adds to
+    its parent's score, and half of it to its grandparent's.
+    """
+    scores: dict[etree._Element, float] = {}
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        for child in list(node):
+            if _is_junk(child):
+                # Keeps the text that follows it
+                child.drop_tree()
+                continue
+            stack.append(child)
+            if not _is_paragraph(child):
+                continue
+
+            text = child.text_content().strip()
+            if len(text) < _MIN_PARAGRAPH_LENGTH:
+                continue
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+
+            parent = node
+            grandparent = parent.getparent()
+            for container, share in ((parent, 1.0), (grandparent, 0.5)):
+                if container is None or container.tag == "html":
+                    break
+                if container not in scores:
+                    scores[container] = _TAG_SCORES.get(container.tag, 0) + _class_weight(container)
+                scores[container] += score * share
+
+    return scores
+
+
+def _final_score(node: etree._Element, score: float) -> float:
+    return score * (1 - _link_density(node, len(node.text_content())))
+
+
+def _with_siblings(top: etree._Element, scores: dict[etree._Element, float], top_score: float):
+    """The top candidate, and those of its siblings that look like they belong to the same content."""
+    parent = top.getparent()
+    if parent is None or top.tag == "body":
+        return [top]
+
+    threshold = max(10.0, top_score * 0.2)
+    nodes = []
+    for sibling in parent:
+        if sibling is top:
+            nodes.append(sibling)
+            continue
+
+        bonus = top_score * 0.2 if sibling.get("class") and sibling.get("class") == top.get("class") else 0
+        if sibling in scores and _final_score(sibling, scores[sibling]) + bonus >= threshold:
+            nodes.append(sibling)
+        elif sibling.tag == "p":
+            text = sibling.text_content()
+            link_density = _link_density(sibling, len(text))
+            if len(text) > 80 and link_density < 0.25:
+                nodes.append(sibling)
+            elif 0 < len(text) <= 80 and link_density == 0 and _SENTENCE_END.search(text):
+                nodes.append(sibling)
+
+    return nodes
+
+
+def _is_boilerplate(element: etree._Element) -> bool:
+    text_length = len(element.text_content())
+    has_content = any(True for _ in element.iter("p", "pre", "img", "table")) and element.tag != "table"
+    if _link_density(element, text_length) > 0.5 and not has_content and text_length < 1000:
+        return True
+    if element.tag in ("form", "fieldset"):
+        return _class_weight(element) < 0 or (
+            len(element.text_content().strip()) < _MIN_PARAGRAPH_LENGTH and not has_content
+        )
+    return False
+
+
+def _text_length(node: etree._Element) -> int:
+    return len("".join(node.text_content().split()))
+
+
+def _clean(node: etree._Element) -> None:
+    # Link lists and tool boxes in the middle of the content, e.g. share buttons or related articles, and what's
+    # left of forms once their controls are gone, e.g. search boxes or comment forms. Forms are only dropped here,
+    # as Readability.js does, since some sites wrap their whole page in one.
+    boilerplate = {
+        element
+        for element in node.iter("ul", "ol", "div", "section", "table", "form", "fieldset")
+        if element is not node and _is_boilerplate(element)
+    }
+    # The others go along with these
+    outermost = [
+        element for element in boilerplate if not any(parent in boilerplate for parent in element.iterancestors())
+    ]
+    # Unless that's all there is, e.g. a page of links: Readability.js would retry without this cleaning then
+    kept_text = _text_length(node) - sum(_text_length(element) for element in outermost)
+    kept_images = sum(1 for _ in node.iter("img")) - sum(1 for element in outermost for _ in element.iter("img"))
+    if kept_text or kept_images:
+        for element in outermost:
+            element.drop_tree()
+
+    for element in node.iter():
+        for name in list(element.attrib):
+            if name not in _KEPT_ATTRIBUTES:
+                del element.attrib[name]
+
+
+def extract_with_lxml(page: ParsedPage) -> tuple[str, str | None]:
+    """
+    The readable content and title of page, scoring its blocks the way Readability.js does but in a single pass
+    and without readabilipy's simplification, which is most of what readabilipy's Python extraction costs.
+
+    Modifies the page's tree, and releases it when done. Raises ClipitError if the page has no content.
+    """
+    title = page.extract_title()
+    root = page.tree
+    if root is None:
+        raise ClipitError("No content found")
+
+    body = root.find("body")
+    if body is None:
+        body = root
+    scores = _score_blocks(body)
+
+    top, top_score = body, 0.0
+    for node, score in scores.items():
+        score = _final_score(node, score)
+        if score > top_score:
+            top, top_score = node, score
+
+    content = body.makeelement("div", {})
+    for node in _with_siblings(top, scores, top_score):
+        # body and html can't go in a div, their children can
+        if node.tag in ("body", "html"):
+            content.text = node.text
+            content.extend(node)
+        else:
+            node.tail = None
+            content.append(node)
+    _clean(content)
+    if not content.text_content().strip() and next(content.iter("img"), None) is None:
+        raise ClipitError("No content found")
+
+    html = etree.tostring(content, encoding="unicode", method="html")
+    page.release_tree()
+    return html, title
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import yaml
+from bs4 import BeautifulSoup
 from markdownify import (
     ATX,
     UNDERSCORE,
@@ -9,6 +10,9 @@ from markdownify import (
 )
 from mdformat import text as mdformat_text
 
+from clipit.core.artifact_cache import cached
+from clipit.core.instrumentation import timed
+
 
 def try_include_title(include_title, markdown_content, title):
     if include_title:
@@ -26,6 +30,11 @@ def try_add_yaml_frontmatter(yaml_frontmatter: bool, markdown_content, title, ur
     if not yaml_frontmatter:
         return markdown_content
 
+    markdown_content = f"{_yaml_frontmatter(title, url)}{markdown_content}"
+    return markdown_content
+
+
+def _yaml_frontmatter(title, url) -> str:
     metadata = {
         "title": title,
         "source": url,
@@ -33,8 +42,22 @@ def try_add_yaml_frontmatter(yaml_frontmatter: bool, markdown_content, title, ur
     }
 
     yaml_metadata = yaml.dump(metadata, sort_keys=False)
-    markdown_content = f"---\n{yaml_metadata}---\n\n{markdown_content}"
-    return markdown_content
+    return f"---\n{yaml_metadata}---\n\n"
+
+
+def markdown_header(title, url, include_source: bool, include_title: bool, yaml_frontmatter: bool) -> str:
+    """
+    Everything try_include_source, try_include_title and try_add_yaml_frontmatter put in front of the Markdown, so it
+    can be prepended with a single copy of the document, or none at all when it's written out separately.
+    """
+    header = []
+    if yaml_frontmatter:
+        header.append(_yaml_frontmatter(title, url))
+    if include_title:
+        header.append(f"# {title}\n\n")
+    if include_source:
+        header.append(f"[Source]({url})\n\n")
+    return "".join(header)
 
 
 class ClipitMarkdownConverter(MarkdownConverter):
@@ -46,8 +69,31 @@ class ClipitMarkdownConverter(MarkdownConverter):
         return abstract_inline_conversion(lambda s: UNDERSCORE)(self, el, text, parent_tags)
 
 
-def convert_to_markdown(content_html):
-    converter = ClipitMarkdownConverter(heading_style=ATX, bullets="-")
-    markdown_content = converter.convert(content_html)
-    pretty_markdown_content = mdformat_text(markdown_content)
+_converter = ClipitMarkdownConverter(heading_style=ATX, bullets="-")
+
+
+def convert_to_markdown(content_html, single_pass=True):
+    """
+    Convert HTML to Markdown, normalized with mdformat, through the active artifact cache if there's one.
+
+    With single_pass the normalized Markdown is emitted directly, without mdformat having to parse it back, for every
+    document the emitter supports. The output is the same either way.
+    """
+    return cached("markdown", content_html, (), lambda: _convert_to_markdown(content_html, single_pass))
+
+
+def _convert_to_markdown(content_html, single_pass):
+    from clipit.core.markdown_emitter import emit_markdown
+
+    soup = BeautifulSoup(content_html, "html.parser")
+    if single_pass:
+        with timed("emit"):
+            markdown_content = emit_markdown(soup)
+        if markdown_content is not None:
+            return markdown_content
+
+    with timed("markdownify"):
+        markdown_content = _converter.convert_soup(soup)
+    with timed("mdformat"):
+        pretty_markdown_content = mdformat_text(markdown_content)
     return pretty_markdown_content
@@ -0,0 +1,612 @@
+"""
+Markdown straight from the HTML tree, already in the form mdformat would normalize it to.
+
+The regular conversion renders Markdown with markdownify and then has mdformat parse it and render it again. Here the
+converter emits mdformat's output directly: the markup it produces is tagged inside the string as it's built, so the
+blocks and the text between the markup can be finished (escaped, numbered, indented) in a single linear pass, with no
+Markdown parser involved.
+
+Only a subset of HTML is handled. Anything whose normalized form would depend on how a Markdown parser reads the
+intermediate output (tables, raw brackets or backslashes in the text, emphasis that wouldn't pair up, ...) raises
+_Unsupported, and emit_markdown returns None so the caller can take the regular route.
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+from markdown_it.common.normalize_url import normalizeLink, validateLink
+from markdown_it.common.utils import isMdAsciiPunct, isPunctChar, isWhiteSpace
+from markdown_it.rules_block.html_block import HTML_SEQUENCES
+from markdown_it.rules_inline.autolink import AUTOLINK_RE
+from markdownify import ATX, _next_block_content_sibling, chomp, re_all_whitespace, strip_pre
+from mdformat import codepoints
+
+from clipit.core.markdown_converter import ClipitMarkdownConverter
+
+# Inline markup is tagged as \x02<kind><markup>\x03. Kinds: o/c open and close emphasis, l/e start and end a link,
+# a an autolink, m anything else (code spans, images)
+_INLINE = re.compile("\x02(.)([^\x03]*)\x03")
+# Markers must survive str.strip(), which treats \x0b, \x0c and \x1c-\x1f as whitespace.
+# Finished blocks are tagged as \x10<kind><rendered>\x11. Kinds: h heading, r thematic break, c code, q blockquote,
+# u bullet list, o ordered list starting at 1, n ordered list starting elsewhere
+_BLOCK = re.compile("\x10(.)([^\x11]*)\x11")
+_BLOCK_CHARS = re.compile("[\x0e\x10]")
+# List items are tagged as \x0e<T|L><block>\x12<block>...\x0f, tight or loose
+_ITEM = re.compile("\x0e(.)([^\x0f]*)\x0f")
+
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+_CHAR_REFERENCE = r"&#?[0-9A-Za-z]+;"
+_UNSAFE_TEXT = re.compile(r"[\\\[\]`]|<(?! )|" + _CHAR_REFERENCE)
+_UNSAFE_ALT = re.compile(r"[\\\[\]`<*_\n]|" + _CHAR_REFERENCE)
+_UNSAFE_TITLE = re.compile(r"[\\\n]|" + _CHAR_REFERENCE)
+_UNSAFE_URL = re.compile(r"[\s\\<>\x00-\x1f\x7f]|" + _CHAR_REFERENCE)
+# Lines a Markdown parser would not read as paragraph text
+_BLOCK_START = re.compile(
+    r"[ \t]*(?:#{1,6}(?:[ \t]|$)|>|[-+](?:[ \t]|$)|[0-9]{1,9}[.)](?:[ \t]|$)|=+[ \t]*$|-+[ \t]*$|~~~|```)"
+)
+# Code span lines aren't escaped at all
+_CODE_BLOCK_START = re.compile(_BLOCK_START.pattern + r"|[ \t]*(?:\*(?:[ \t]|$)|<|(?:[-*_][ \t]*){3,}$)")
+_CLOSING_FENCE = re.compile(r"^ {0,3}```+[ \t]*$", re.MULTILINE)
+_BLANK_LINE = re.compile(r"\n[ \t]*\n")
+_BACKTICKS = re.compile("`+")
+
+# The same escapes as mdformat's text and paragraph renderers
+_SPACES = re.compile(" {2,}")
+_ASTERISK = re.compile(r"\*")
+_UNDERSCORE = re.compile("_")
+_LESS_THAN = re.compile("<(?:[^ ]|$)")
+_ATX_LINE = re.compile(r"#{1,6}( |\t|$)")
+_BULLET_LINE = re.compile(r"[-*+]( |\t|$)")
+_ORDERED_PAREN_LINE = re.compile(r"[0-9]+\)( |\t|$)")
+_ORDERED_DOT_LINE = re.compile(r"[0-9]+\.( |\t|$)")
+_ESCAPED_LINE_STARTS = frozenset("#>-*+=_<0123456789")
+_WHITESPACE = codepoints.UNICODE_WHITESPACE
+_BAD_UNDERSCORE_NEIGHBOURS = codepoints.UNICODE_WHITESPACE | codepoints.UNICODE_PUNCTUATION
+
+_THEMATIC_BREAK = "_" * 70
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _escape_asterisk(match: re.Match) -> str:
+    text, i = match.string, match.start()
+    if i > 0 and i + 1 < len(text) and text[i - 1] in _WHITESPACE and text[i + 1] in _WHITESPACE:
+        return "*"
+    return "\\*"
+
+
+def _escape_underscore(match: re.Match) -> str:
+    text, i = match.string, match.start()
+    prev_char = text[i - 1] if i > 0 else None
+    next_char = text[i + 1] if i + 1 < len(text) else None
+    if prev_char in _WHITESPACE and next_char in _WHITESPACE:
+        return "_"
+    if (
+        prev_char is not None
+        and next_char is not None
+        and prev_char not in _BAD_UNDERSCORE_NEIGHBOURS
+        and next_char not in _BAD_UNDERSCORE_NEIGHBOURS
+    ):
+        return "_"
+    return "\\_"
+
+
+def _render_text(text: str, before_autolink: bool) -> str:
+    text = text.replace("\t", " ")
+    if "  " in text:
+        text = _SPACES.sub(" ", text)
+    if "*" in text:
+        text = _ASTERISK.sub(_escape_asterisk, text)
+    if "_" in text:
+        text = _UNDERSCORE.sub(_escape_underscore, text)
+    if "<" in text:
+        text = _LESS_THAN.sub(r"\\\g<0>", text)
+    if before_autolink and text.endswith("!"):
+        text = text[:-1] + "\\!"
+    return text
+
+
+def _flanking(marker: str, prev_char: str, next_char: str) -> tuple[bool, bool]:
+    """Whether a delimiter run between these characters can open and can close emphasis, as markdown-it decides."""
+    prev_punct = isMdAsciiPunct(ord(prev_char)) or isPunctChar(prev_char)
+    next_punct = isMdAsciiPunct(ord(next_char)) or isPunctChar(next_char)
+    prev_space = isWhiteSpace(ord(prev_char))
+    next_space = isWhiteSpace(ord(next_char))
+
+    left = not (next_space or (next_punct and not (prev_space or prev_punct)))
+    right = not (prev_space or (prev_punct and not (next_space or next_punct)))
+    if marker == "_":
+        return left and (not right or prev_punct), right and (not left or next_punct)
+    return left, right
+
+
+def _destination(url: str) -> str:
+    """The link destination mdformat would print for a URL, if a Markdown parser reads it back unchanged."""
+    if _UNSAFE_URL.search(url):
+        raise _Unsupported("link destination")
+    depth = 0
+    for char in url:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                break
+    if depth:
+        raise _Unsupported("unbalanced parentheses in link destination")
+
+    url = normalizeLink(url)
+    if not validateLink(url):
+        raise _Unsupported("link destination")
+    if not url or "(" in url or ")" in url:
+        return f"<{url}>"
+    return url
+
+
+def _title(title: str | None) -> str:
+    if not title:
+        return ""
+    if _UNSAFE_TITLE.search(title) or _CONTROL_CHARS.search(title):
+        raise _Unsupported("link title")
+    return ' "%s"' % title.replace('"', r"\"")
+
+
+def _block(kind: str, rendered: str) -> str:
+    return f"\x10{kind}{rendered}\x11"
+
+
+def _finish_paragraph_lines(text: str) -> str:
+    """mdformat's paragraph renderer, minus the inline rendering."""
+    if text[0] in _WHITESPACE:
+        text = f"&#{ord(text[0])};{text[1:]}"
+    if text[-1] in _WHITESPACE:
+        text = f"{text[:-1]}&#{ord(text[-1])};"
+
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line and line[0] not in _ESCAPED_LINE_STARTS:
+            lines[i] = line
+            continue
+
+        if _ATX_LINE.match(line):
+            line = f"\\{line}"
+        if line.startswith(">"):
+            line = f"\\{line}"
+        if _BULLET_LINE.match(line):
+            line = f"\\{line}"
+        if _ORDERED_PAREN_LINE.match(line):
+            line = line.replace(")", "\\)", 1)
+        if _ORDERED_DOT_LINE.match(line):
+            line = line.replace(".", "\\.", 1)
+
+        space_removed = line.replace(" ", "").replace("\t", "")
+        if len(space_removed) >= 3:
+            if all(c == "*" for c in space_removed):
+                line = line.replace("*", "\\*", 1)
+            elif all(c == "-" for c in space_removed):
+                line = line.replace("-", "\\-", 1)
+            elif all(c == "_" for c in space_removed):
+                line = line.replace("_", "\\_", 1)
+
+        stripped = line.strip(" \t")
+        if all(c == "-" for c in stripped):
+            line = line.replace("-", "\\-", 1)
+        elif all(c == "=" for c in stripped):
+            line = line.replace("=", "\\=", 1)
+
+        if line.startswith("<"):
+            for opening, _, can_break_paragraph in HTML_SEQUENCES:
+                if can_break_paragraph and opening.search(line):
+                    line = f"    {line}"
+                    break
+
+        lines[i] = line
+
+    return "\n".join(lines)
+
+
+class SinglePassMarkdownConverter(ClipitMarkdownConverter):
+    """
+    A ClipitMarkdownConverter whose output is already mdformat-normalized.
+
+    It keeps no state between documents, so one instance can be shared by every thread.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**{"heading_style": ATX, "bullets": "-", **options})
+
+    def process_text(self, el, parent_tags=None):
+        if _CONTROL_CHARS.search(el):
+            raise _Unsupported("control characters")
+        return super().process_text(el, parent_tags)
+
+    def escape(self, text, parent_tags):
+        # Nothing is escaped up front, text is escaped once its neighbours are known. Text mdformat would have
+        # to escape differently than markdownify did isn't supported.
+        if _UNSAFE_TEXT.search(text):
+            raise _Unsupported("text with Markdown syntax")
+        return text
+
+    def convert__document_(self, el, text, parent_tags):
+        text = super().convert__document_(el, text, parent_tags)
+        markdown = self._render_blocks(self._blocks(text), "\n\n")
+        return markdown + "\n" if markdown else ""
+
+    # Inline markup
+
+    def _delimited(self, marker: str, tags: set[str], text: str, parent_tags: set[str]) -> str:
+        if "_noformat" in parent_tags:
+            return text
+        if not tags.isdisjoint(parent_tags):
+            raise _Unsupported("nested emphasis")
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        if _BLOCK_CHARS.search(text):
+            raise _Unsupported("block inside emphasis")
+        return f"{prefix}\x02o{marker}\x03{text}\x02c{marker}\x03{suffix}"
+
+    def convert_b(self, el, text, parent_tags):
+        return self._delimited("**", {"b", "strong"}, text, parent_tags)
+
+    convert_strong = convert_b
+
+    def convert_i(self, el, text, parent_tags):
+        return self._delimited("_", {"i", "em"}, text, parent_tags)
+
+    convert_em = convert_i
+
+    def convert_code(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        if _BLOCK_CHARS.search(text) or _BLANK_LINE.search(text):
+            raise _Unsupported("block inside code span")
+        if "\n" in text and any(_CODE_BLOCK_START.match(line) for line in text.split("\n")[1:]):
+            raise _Unsupported("code span across block syntax")
+
+        code = text.replace("\n", " ")
+        longest_backticks = max((len(run) for run in _BACKTICKS.findall(code)), default=0)
+        if longest_backticks:
+            separator = "`" * (longest_backticks + 1)
+            code = f"{separator} {code} {separator}"
+        elif code.startswith(" ") and code.endswith(" ") and code.strip():
+            code = f"` {code} `"
+        else:
+            code = f"`{code}`"
+        return f"{prefix}\x02m{code}\x03{suffix}"
+
+    convert_kbd = convert_code
+
+    convert_samp = convert_code
+
+    def convert_a(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return text
+        if "a" in parent_tags:
+            raise _Unsupported("nested links")
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        if _BLOCK_CHARS.search(text):
+            raise _Unsupported("block inside link")
+
+        href = el.get("href")
+        title = el.get("title")
+        if text == href and not title and "\x02" not in text and "*" not in text:
+            if not AUTOLINK_RE.match(href):
+                raise _Unsupported("autolink")
+            url = normalizeLink(href)
+            if not validateLink(url):
+                raise _Unsupported("autolink")
+            return f"{prefix}\x02a<{url}>\x03{suffix}"
+        if not href:
+            return text
+
+        return f"{prefix}\x02l[\x03{text}\x02e]({_destination(href)}{_title(title)})\x03{suffix}"
+
+    def convert_img(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return super().convert_img(el, text, parent_tags)
+
+        alt = el.attrs.get("alt", None) or ""
+        if _CONTROL_CHARS.search(alt) or _UNSAFE_ALT.search(alt):
+            raise _Unsupported("image alt text")
+        if "_inline" in parent_tags and el.parent.name not in self.options["keep_inline_images_in"]:
+            return alt
+
+        src = el.attrs.get("src", None) or ""
+        title = el.attrs.get("title", None) or ""
+        if not src and title:
+            raise _Unsupported("image with a title and no source")
+        return f"\x02m![{alt}]({_destination(src)}{_title(title)})\x03"
+
+    # Blocks
+
+    def convert_hN(self, n, el, text, parent_tags):
+        if "_noformat" in parent_tags or "_inline" in parent_tags:
+            return super().convert_hN(n, el, text, parent_tags)
+
+        text = re_all_whitespace.sub(" ", text.strip())
+        if not text or _BLOCK_CHARS.search(text):
+            raise _Unsupported("empty heading or block inside heading")
+        # A trailing # would be read as the heading's closing sequence
+        if text.endswith("#"):
+            raise _Unsupported("heading ending with #")
+
+        stack: list[str] = []
+        rendered = self._render_inline(text, stack)
+        if stack:
+            raise _Unsupported("unbalanced markup in heading")
+        if rendered.endswith("#"):
+            rendered = rendered[:-1] + "\\#"
+
+        return "\n\n" + _block("h", "#" * max(1, min(6, n)) + " " + rendered) + "\n\n"
+
+    def convert_hr(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return super().convert_hr(el, text, parent_tags)
+        return "\n\n" + _block("r", _THEMATIC_BREAK) + "\n\n"
+
+    def convert_pre(self, el, text, parent_tags):
+        if not text or "_noformat" in parent_tags:
+            return super().convert_pre(el, text, parent_tags)
+
+        code = strip_pre(text)
+        if _CLOSING_FENCE.search(code):
+            raise _Unsupported("code block containing a fence")
+        if "\t" in code and "blockquote" in parent_tags:
+            raise _Unsupported("tabs in a quoted code block")
+
+        fence = "`" * max(3, max((len(run) for run in _BACKTICKS.findall(code)), default=0) + 1)
+        return "\n\n" + _block("c", f"{fence}\n{code}\n{fence}") + "\n\n"
+
+    def convert_p(self, el, text, parent_tags):
+        if "_inline" in parent_tags and _BLOCK_CHARS.search(text):
+            raise _Unsupported("block inside inline context")
+        return super().convert_p(el, text, parent_tags)
+
+    def convert_div(self, el, text, parent_tags):
+        if "_inline" in parent_tags and _BLOCK_CHARS.search(text):
+            raise _Unsupported("block inside inline context")
+        return super().convert_div(el, text, parent_tags)
+
+    convert_article = convert_div
+
+    convert_section = convert_div
+
+    def convert_blockquote(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return super().convert_blockquote(el, text, parent_tags)
+        text = text.strip(" \t\r\n")
+        if "_inline" in parent_tags:
+            if _BLOCK_CHARS.search(text):
+                raise _Unsupported("block inside inline context")
+            return " " + text + " "
+        if not text:
+            return "\n"
+
+        lines = self._render_blocks(self._blocks(text), "\n\n").splitlines()
+        quoted = "\n".join(f"> {line}" if line else ">" for line in lines) if lines else ">"
+        return "\n" + _block("q", quoted) + "\n\n"
+
+    def convert_li(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return super().convert_li(el, text, parent_tags)
+        if el.parent is None or el.parent.name not in ("ul", "ol"):
+            raise _Unsupported("list item outside of a list")
+        text = text.strip()
+        if not text:
+            raise _Unsupported("empty list item")
+
+        blocks = self._blocks(text)
+        if any(kind in "hrc" for kind, _, _ in blocks):
+            # markdownify doesn't space these out inside items the way it does at the top level
+            raise _Unsupported("heading, rule or code block in a list item")
+        loose = any(blank for _, _, blank in blocks[1:])
+        rendered = "\x12".join(self._render_block(kind, content) for kind, content, _ in blocks)
+        return f"\x0e{'L' if loose else 'T'}{rendered}\x0f"
+
+    def convert_list(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return super().convert_list(el, text, parent_tags)
+        items = _ITEM.findall(text)
+        if _ITEM.sub("", text).strip():
+            raise _Unsupported("content outside of list items")
+        if not items:
+            return super().convert_list(el, text, parent_tags)
+
+        separator = "\n" if all(flag == "T" for flag, _ in items) else "\n\n"
+        if el.name == "ol":
+            start = el.get("start")
+            start = int(start) if start and str(start).isnumeric() else 1
+            if len(str(start + len(items) - 1)) > 9:
+                raise _Unsupported("list numbers too long")
+            kind = "o" if start == 1 else "n"
+            first_marker = f"{start}."
+            other_marker = "0" * (len(str(start)) - 1) + "1."
+        else:
+            kind = "u"
+            first_marker = other_marker = "-"
+        indent = " " * (len(first_marker) + 1)
+
+        rendered_items = []
+        for index, (_, blocks) in enumerate(items):
+            marker = other_marker if index else first_marker
+            first, *rest = blocks.replace("\x12", separator).split("\n")
+            lines = [f"{marker} {first}" if first else marker]
+            lines.extend(indent + line if line else "" for line in rest)
+            rendered_items.append("\n".join(lines))
+        token = _block(kind, separator.join(rendered_items))
+
+        if "li" in parent_tags:
+            return "\n" + token
+        next_sibling = _next_block_content_sibling(el)
+        before_paragraph = next_sibling is not None and next_sibling.name not in ("ul", "ol")
+        return "\n\n" + token + "\n" + ("\n" if before_paragraph else "")
+
+    convert_ul = convert_list
+
+    convert_ol = convert_list
+
+    def _unsupported(self, el, text, parent_tags):
+        raise _Unsupported(el.name)
+
+    convert_table = convert_caption = convert_tr = convert_td = convert_th = _unsupported
+
+    convert_dl = convert_dt = convert_dd = convert_video = _unsupported
+
+    # Finishing
+
+    def _blocks(self, text: str) -> list[tuple[str, str | list[str], bool]]:
+        """
+        Split a container's content into its blocks: (kind, content, blank line before it).
+
+        Paragraphs come as their raw lines, everything else is already rendered. Neighbours that a Markdown parser
+        would merge into each other (a list right after another, text right after a list) aren't supported.
+        """
+        pieces = _BLOCK.split(text)
+        if "\x0e" in text:
+            raise _Unsupported("list item outside of a list")
+
+        blocks: list[tuple[str, str | list[str], bool]] = []
+        blank = False
+        last = len(pieces) - 1
+        for index in range(0, len(pieces), 3):
+            lines = pieces[index].split("\n")
+            # The first and last lines are shared with the blocks around this text
+            if index > 0:
+                if lines[0].strip(" \t"):
+                    raise _Unsupported("text on the same line as a block")
+                lines = lines[1:]
+            if index < last:
+                if lines[-1].strip(" \t"):
+                    raise _Unsupported("text on the same line as a block")
+                lines = lines[:-1]
+
+            paragraph: list[str] = []
+            for line in lines:
+                if line.strip(" \t"):
+                    paragraph.append(line)
+                    continue
+                if paragraph:
+                    blocks.append(("p", paragraph, blank))
+                    paragraph = []
+                blank = True
+            if paragraph:
+                blocks.append(("p", paragraph, blank))
+                blank = False
+
+            if index < last:
+                blocks.append((pieces[index + 1], pieces[index + 2], blank))
+                blank = False
+
+        for (previous, _, _), (kind, _, blank) in zip(blocks, blocks[1:]):
+            if previous in "uon" and kind in "uon" and (previous == "u") == (kind == "u"):
+                raise _Unsupported("consecutive lists")
+            if blank:
+                continue
+            if previous in "hcr" or (previous == "p" and kind in "hcuoq") or (previous in "uonq" and kind in "hc"):
+                continue
+            raise _Unsupported(f"{kind} right after {previous}")
+
+        return blocks
+
+    def _render_blocks(self, blocks: list[tuple[str, str | list[str], bool]], separator: str) -> str:
+        return separator.join(self._render_block(kind, content) for kind, content, _ in blocks)
+
+    def _render_block(self, kind: str, content: str | list[str]) -> str:
+        if kind == "p":
+            return self._render_paragraph(content)
+        return content
+
+    def _render_paragraph(self, lines: list[str]) -> str:
+        text = "\n".join(lines).strip()
+        if not text:
+            raise _Unsupported("whitespace-only paragraph")
+        lines = text.split("\n")
+
+        stack: list[str] = []
+        last = len(lines) - 1
+        rendered = []
+        for n, line in enumerate(lines):
+            if _BLOCK_START.match(line):
+                raise _Unsupported("paragraph line that starts a block")
+            hard_break = False
+            if n < last:
+                content = line.rstrip(" ")
+                hard_break = len(line) - len(content) >= 2
+                line = content
+            if n > 0:
+                line = line.lstrip(" \t")
+            line = self._render_inline(line, stack)
+            rendered.append(line + "\\" if hard_break else line)
+        if stack:
+            raise _Unsupported("unbalanced inline markup")
+
+        return _finish_paragraph_lines("\n".join(rendered))
+
+    def _render_inline(self, text: str, stack: list[str]) -> str:
+        """Render one line of inline content, checking its markup pairs up the way it was meant to."""
+        pieces = _INLINE.split(text)
+        if len(pieces) == 1:
+            return _render_text(text, False) if text else text
+
+        rendered = []
+        count = len(pieces)
+        for index in range(0, count, 3):
+            text = pieces[index]
+            kind = pieces[index + 1] if index + 1 < count else None
+            if text:
+                if kind == "l" and text.endswith("!"):
+                    raise _Unsupported("! right before a link")
+                rendered.append(_render_text(text, kind == "a"))
+            if kind is None:
+                break
+
+            markup = pieces[index + 2]
+            prev_char = text[-1] if text else (pieces[index - 1][-1] if index else " ")
+            following = pieces[index + 3]
+            next_char = following[0] if following else (pieces[index + 5][0] if index + 5 < count else " ")
+            if kind in "oc":
+                marker = markup[0]
+                if marker in (prev_char, next_char):
+                    raise _Unsupported("adjacent emphasis")
+                can_open, can_close = _flanking(marker, prev_char, next_char)
+                if kind == "o":
+                    if not can_open or can_close:
+                        raise _Unsupported("emphasis that can't open")
+                    stack.append(markup)
+                elif not can_close or can_open or not stack or stack.pop() != markup:
+                    raise _Unsupported("emphasis that can't close")
+            elif kind == "l":
+                stack.append("[")
+            elif kind == "e":
+                if not stack or stack.pop() != "[":
+                    raise _Unsupported("unbalanced link")
+            elif markup[0] == "`" and "`" in (prev_char, next_char):
+                # Code spans right next to each other would be read as one
+                raise _Unsupported("adjacent code spans")
+            rendered.append(markup)
+
+        return "".join(rendered)
+
+
+_converter = SinglePassMarkdownConverter()
+
+
+def emit_markdown(html: str | BeautifulSoup) -> str | None:
+    """
+    Convert HTML to normalized Markdown in one pass, or return None if it uses markup only the regular conversion
+    handles.
+    """
+    soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, "html.parser")
+    try:
+        return _converter.convert_soup(soup)
+    except _Unsupported:
+        return None
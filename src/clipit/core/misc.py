@@ -1,2 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+
 class ClipitError(Exception):
     pass
+
+
+def default_cache_dir() -> Path:
+    """The per-user cache directory of the current platform, with a clipit subdirectory."""
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+    return base / "clipit"
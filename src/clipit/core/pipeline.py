@@ -0,0 +1,128 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[Any], Any]
+    concurrency: int = 1
+
+
+@dataclass
+class StageFailure:
+    item: Any
+    stage: str
+    error: Exception
+
+
+def run_pipeline(items: Iterable[Any], stages: list[Stage], queue_size: int) -> Iterator[Any]:
+    """
+    Push every item through the given stages, each stage running in its own pool of threads.
+
+    Stages are joined by bounded queues, so a slow stage applies backpressure to the ones before it instead of
+    letting work pile up in memory. An item whose stage raises is taken out of the pipeline and yielded as a
+    StageFailure, the rest of the items keep flowing. Results are yielded in completion order.
+
+    If iterating over items raises, the items already in the pipeline are finished first and the error is raised
+    after them.
+    """
+    if not stages:
+        raise ValueError("A pipeline needs at least one stage.")
+
+    queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in stages]
+    results: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    feed_errors: list[Exception] = []
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        # Bail out if the consumer went away, otherwise we'd block forever on a full queue
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        # Same as put, a worker waiting for its next item stops once the consumer went away
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def feed():
+        try:
+            for item in items:
+                if not put(queues[0], item):
+                    return
+        except Exception as e:
+            feed_errors.append(e)
+        for _ in range(stages[0].concurrency):
+            put(queues[0], _DONE)
+
+    def work(index: int, stage: Stage, remaining: list[int], lock: threading.Lock):
+        inbox = queues[index]
+        is_last = index == len(stages) - 1
+        outbox = results if is_last else queues[index + 1]
+
+        while True:
+            item = get(inbox)
+            if item is _DONE:
+                break
+
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                put(results, StageFailure(item=item, stage=stage.name, error=e))
+                continue
+
+            put(outbox, result)
+
+        # The last worker of a stage to finish tells the next stage there's nothing else coming
+        with lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker:
+            if is_last:
+                put(results, _DONE)
+            else:
+                for _ in range(stages[index + 1].concurrency):
+                    put(outbox, _DONE)
+
+    threads = [threading.Thread(target=feed, name="clipit-feed", daemon=True)]
+    for index, stage in enumerate(stages):
+        if stage.concurrency < 1:
+            raise ValueError(f"Stage {stage.name} needs a concurrency of at least 1.")
+        remaining = [stage.concurrency]
+        lock = threading.Lock()
+        for n in range(stage.concurrency):
+            threads.append(
+                threading.Thread(
+                    target=work,
+                    args=(index, stage, remaining, lock),
+                    name=f"clipit-{stage.name}-{n}",
+                    daemon=True,
+                )
+            )
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            yield result
+        if feed_errors:
+            raise feed_errors[0]
+    finally:
+        stop.set()
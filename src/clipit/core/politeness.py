@@ -0,0 +1,193 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from clipit.core import ClipitError, PolitenessPolicy
+
+# Worth trying again later, the rest of the 4xx and 5xx won't get any better
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Fetches a robots.txt URL with the given user agent, returning the status code and the body
+RobotsFetcher = Callable[[str, str | None], tuple[int, str]]
+
+
+@dataclass
+class _Host:
+    rate: float | None
+    burst: int
+    tokens: float
+    updated: float
+    paused_until: float = 0.0
+
+
+@dataclass
+class _Robots:
+    rules: RobotFileParser
+    expires: float
+
+
+class HostScheduler:
+    """
+    Decides when each request can go out, per host: a token bucket refilling at the policy's rate (or the rate the
+    host's robots.txt Crawl-delay asks for, when slower), and pauses when a host answers with a Retry-After.
+
+    One scheduler is shared by every request of a session, across threads.
+    """
+
+    def __init__(self, policy: PolitenessPolicy):
+        self.policy = policy
+        self._hosts: dict[str, _Host] = {}
+        self._robots: dict[str, _Robots] = {}
+        self._robots_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(
+                rate=self.policy.requests_per_second,
+                burst=self.policy.burst,
+                tokens=self.policy.burst,
+                updated=time.monotonic(),
+            )
+        return state
+
+    def wait_turn(self, host: str) -> None:
+        """Block until a request can be sent to host."""
+        while True:
+            with self._lock:
+                state = self._host(host)
+                now = time.monotonic()
+                if state.paused_until > now:
+                    delay = state.paused_until - now
+                elif not state.rate:
+                    return
+                else:
+                    state.tokens = min(state.burst, state.tokens + (now - state.updated) * state.rate)
+                    state.updated = now
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        return
+                    delay = (1 - state.tokens) / state.rate
+            time.sleep(delay)
+
+    def pause(self, host: str, seconds: float) -> None:
+        """Hold every request to host for the next few seconds."""
+        with self._lock:
+            state = self._host(host)
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+
+    def slow_down(self, host: str, requests_per_second: float) -> None:
+        """Never send more than requests_per_second to host, one at a time, whatever the policy's rate."""
+        with self._lock:
+            state = self._host(host)
+            if not state.rate or requests_per_second < state.rate:
+                state.rate = requests_per_second
+                state.burst = 1
+                state.tokens = min(state.tokens, 1)
+
+    def check_robots_txt(self, url: str, user_agent: str | None, fetch: RobotsFetcher) -> None:
+        """Raise a ClipitError if the host's robots.txt disallows url, and apply its Crawl-delay."""
+        parts = urlsplit(url)
+        if parts.path == "/robots.txt" or parts.scheme not in ("http", "https"):
+            return
+
+        agent = user_agent or "*"
+        robots = self._robots_txt(f"{parts.scheme}://{parts.netloc}", user_agent, fetch)
+        if not robots.can_fetch(agent, url):
+            raise ClipitError(f"{url} is disallowed by {robots.url}")
+
+        crawl_delay = robots.crawl_delay(agent)
+        if crawl_delay:
+            self.slow_down(parts.hostname or "", 1 / float(crawl_delay))
+
+    def _robots_txt(self, origin: str, user_agent: str | None, fetch: RobotsFetcher) -> RobotFileParser:
+        with self._lock:
+            lock = self._robots_locks.setdefault(origin, threading.Lock())
+
+        # One fetch per host, the other requests for it wait for the rules
+        with lock:
+            cached = self._robots.get(origin)
+            if cached is not None and cached.expires > time.monotonic():
+                return cached.rules
+
+            rules = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                status, text = fetch(rules.url, user_agent)
+            except Exception:
+                # Can't tell, so don't stand in the way
+                status, text = 404, ""
+            # Same as the standard library's RobotFileParser.read()
+            if status in (401, 403):
+                rules.disallow_all = True
+            elif status >= 400:
+                rules.allow_all = True
+            else:
+                rules.parse(text.splitlines())
+            rules.modified()
+
+            self._robots[origin] = _Robots(rules=rules, expires=time.monotonic() + self.policy.robots_txt_ttl)
+            return rules
+
+
+class PoliteRetry(Retry):
+    """
+    urllib3's Retry, plus telling the scheduler when a host asks for a break with Retry-After, so the other requests
+    to it wait too. Gives up instead when the break asked for is longer than the policy allows.
+
+    Retries happen within urllib3, after the adapter got the request its turn, so each one waits for a turn of its
+    own once backed off.
+    """
+
+    def __init__(self, *args, scheduler: HostScheduler | None = None, max_retry_after: float | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+        self.max_retry_after = max_retry_after
+        # The host of the request being retried, set by increment()
+        self.host: str | None = None
+
+    def new(self, **kwargs) -> "PoliteRetry":
+        retry = super().new(**kwargs)
+        retry.scheduler = self.scheduler
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.scheduler is not None and self.host is not None:
+            self.scheduler.wait_turn(self.host)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if _pool is not None:
+            retry.host = _pool.host
+
+        retry_after = self.get_retry_after(response) if response is not None else None
+        if retry_after is not None and self.respect_retry_after_header:
+            if self.max_retry_after is not None and retry_after > self.max_retry_after:
+                raise MaxRetryError(_pool, url, ResponseError(f"asked to retry after {retry_after:.0f}s"))
+            if self.scheduler is not None and _pool is not None:
+                self.scheduler.pause(_pool.host, retry_after)
+
+        return retry
+
+
+def create_retry(policy: PolitenessPolicy, scheduler: HostScheduler | None = None) -> PoliteRetry:
+    return PoliteRetry(
+        total=policy.retries,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=policy.backoff_factor,
+        backoff_max=policy.backoff_max,
+        # Up to the same again, so requests that failed together don't all come back at the same time
+        backoff_jitter=policy.backoff_factor,
+        # Hand the last response back, the downloader reports its status
+        raise_on_status=False,
+        scheduler=scheduler,
+        max_retry_after=policy.max_retry_after,
+    )
@@ -0,0 +1,94 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from clipit.core.artifact_cache import ArtifactCache, ArtifactCacheStats, active_artifact_cache, set_artifact_cache
+from clipit.core.dtos import RenderFlags
+
+# Imported once per worker (or once in the fork server, which every worker is then forked from), so no document pays
+# for them
+_PRELOADED_MODULES = [
+    "clipit.core.extractor",
+    "clipit.core.markdown_converter",
+    "clipit.grabbers",
+    "clipit.grabbers.reddit_grabber",
+]
+
+
+def _initialize_worker(readability_workers: int, artifact_cache: ArtifactCache | None) -> None:
+    import importlib
+
+    for module in _PRELOADED_MODULES:
+        importlib.import_module(module)
+
+    from clipit.core.readability_pool import configure_readability_pool
+
+    configure_readability_pool(readability_workers)
+
+    # Tasks run on the worker's main thread, so this holds for every one of them
+    set_artifact_cache(artifact_cache)
+
+
+def _ready() -> bool:
+    return True
+
+
+def create_process_pool(
+    workers: int, readability_workers: int, artifact_cache: ArtifactCache | None = None
+) -> ProcessPoolExecutor:
+    """
+    Create a pool of worker processes for extraction and Markdown conversion, and start all of them right away.
+    With artifact_cache, every worker goes through its own instance of the same on-disk cache.
+
+    Workers come from a fork server that already imported the heavy modules where the platform supports it, and
+    from spawn otherwise. Forking the parent directly isn't safe once the download threads are running.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(_PRELOADED_MODULES)
+    else:
+        context = multiprocessing.get_context("spawn")
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_initialize_worker,
+        initargs=(readability_workers, artifact_cache),
+    )
+    # Submitting one job per worker at once makes the pool start them all, instead of one by one as work arrives
+    wait([pool.submit(_ready) for _ in range(workers)])
+
+    return pool
+
+
+def extract_and_convert(
+    grabber,
+    url: str,
+    html_content: str,
+    use_readability_js: bool,
+    engine: str,
+    fallback_title: str,
+    render_flags: RenderFlags,
+    convert: bool,
+    keep_readable_content: bool,
+) -> tuple[str, str, str | None, ArtifactCacheStats | None]:
+    """
+    Extract and convert a document in one go, so its HTML crosses the process boundary only once.
+
+    Returns the title, the readable content (empty unless keep_readable_content, no need to send it back otherwise),
+    the Markdown (None unless convert) and the artifact cache lookups it took, if the worker has a cache.
+    """
+    cache = active_artifact_cache()
+    before = cache.stats() if cache is not None else None
+
+    html_readable_content, title = grabber.extract(html_content, use_readability_js, fallback_title, url, engine)
+
+    markdown_content = None
+    if convert:
+        markdown_content = grabber.convert(url, title, html_readable_content, render_flags)
+
+    lookups = None
+    if cache is not None and before is not None:
+        after = cache.stats()
+        lookups = ArtifactCacheStats(hits=after.hits - before.hits, misses=after.misses - before.misses)
+
+    return title, html_readable_content if keep_readable_content else "", markdown_content, lookups
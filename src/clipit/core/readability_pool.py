@@ -0,0 +1,249 @@
+import atexit
+import importlib.util
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+import warnings
+
+from clipit.core import ClipitError
+
+# Reads one JSON request per line from stdin and answers with one JSON response per line, the same way
+# readabilipy's ExtractArticle.js does for a single file. Run with readabilipy's javascript directory as the
+# working directory, so the modules resolve against its node_modules.
+_WORKER_SCRIPT = r"""
+const readline = require('readline');
+const { Readability } = require('@mozilla/readability');
+const { JSDOM } = require('jsdom');
+
+const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+rl.on('line', (line) => {
+    const request = JSON.parse(line);
+    const response = { id: request.id };
+    if (request.ping) {
+        response.pong = true;
+    } else {
+        try {
+            const dom = new JSDOM(request.html.trim());
+            response.article = new Readability(dom.window.document).parse();
+            dom.window.close();
+        } catch (e) {
+            response.error = String((e && e.stack) || e);
+        }
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+rl.on('close', () => process.exit(0));
+"""
+
+# Found without importing readabilipy, which takes a while and isn't needed until a page gets extracted
+_JS_DIR = os.path.join(os.path.dirname(importlib.util.find_spec("readabilipy").origin), "javascript")
+
+
+class _WorkerCrashed(Exception):
+    pass
+
+
+class _NodeWorker:
+    def __init__(self):
+        self.jobs_done = 0
+        self.last_used = time.monotonic()
+        self._next_id = 0
+        self._responses: queue.Queue = queue.Queue()
+        self._process = subprocess.Popen(
+            ["node", "-e", _WORKER_SCRIPT],
+            cwd=_JS_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        threading.Thread(target=self._read_responses, name="clipit-readability-reader", daemon=True).start()
+
+    def _read_responses(self):
+        assert self._process.stdout is not None
+        for line in self._process.stdout:
+            self._responses.put(line)
+        # EOF, the process is gone
+        self._responses.put(None)
+
+    def is_alive(self) -> bool:
+        return self._process.poll() is None
+
+    def request(self, payload: dict, timeout: float) -> dict:
+        self._next_id += 1
+        payload = {"id": self._next_id, **payload}
+        try:
+            assert self._process.stdin is not None
+            self._process.stdin.write(json.dumps(payload) + "\n")
+            self._process.stdin.flush()
+            line = self._responses.get(timeout=timeout)
+        except (OSError, ValueError, queue.Empty) as e:
+            raise _WorkerCrashed(str(e) or "Timed out waiting for Readability.js")
+        if line is None:
+            raise _WorkerCrashed("The Readability.js worker exited unexpectedly")
+
+        self.last_used = time.monotonic()
+        response = json.loads(line)
+        if response.get("id") != self._next_id:
+            raise _WorkerCrashed("The Readability.js worker answered out of order")
+
+        return response
+
+    def ping(self, timeout: float) -> bool:
+        try:
+            return self.request({"ping": True}, timeout).get("pong", False)
+        except _WorkerCrashed:
+            return False
+
+    def close(self):
+        if self.is_alive():
+            try:
+                assert self._process.stdin is not None
+                self._process.stdin.close()
+                self._process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+
+
+class ReadabilityWorkerPool:
+    """
+    A pool of long-lived Node processes running Readability.js, so pages don't pay for a Node cold start each.
+
+    Each worker is restarted after max_jobs_per_worker pages (to keep jsdom's memory in check), when it crashes or
+    times out, and when it fails the health check it gets after sitting idle for more than health_check_after seconds.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs_per_worker: int = 500,
+        job_timeout: float = 60.0,
+        health_check_after: float = 30.0,
+    ):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.health_check_after = health_check_after
+        self._idle: queue.LifoQueue[_NodeWorker | None] = queue.LifoQueue()
+        # Workers are started lazily, a None slot means "start one when needed"
+        for _ in range(size):
+            self._idle.put(None)
+
+    def start(self) -> None:
+        """Start every worker now instead of when it's first needed, so the first pages don't wait for Node."""
+        workers = []
+        try:
+            for _ in range(self.size):
+                workers.append(self._checkout())
+        finally:
+            for worker in workers:
+                self._checkin(worker)
+
+    def parse(self, html: str) -> dict | None:
+        """Run Readability.parse() on the page and return its article, exactly like readabilipy's node script."""
+        attempts = 2
+        for attempt in range(attempts):
+            worker = self._checkout()
+            try:
+                response = worker.request({"html": html}, self.job_timeout)
+            except _WorkerCrashed as e:
+                worker.close()
+                self._idle.put(None)
+                if attempt == attempts - 1:
+                    raise ClipitError(f"Readability.js failed: {e}")
+                continue
+
+            worker.jobs_done += 1
+            self._checkin(worker)
+            if "error" in response:
+                raise ClipitError(f"Readability.js failed: {response['error']}")
+
+            return response.get("article")
+
+        return None
+
+    def _checkout(self) -> _NodeWorker:
+        worker = self._idle.get()
+        if worker is not None and not self._is_healthy(worker):
+            worker.close()
+            worker = None
+
+        if worker is not None:
+            return worker
+
+        try:
+            return _NodeWorker()
+        except OSError as e:
+            # Give the slot back, or the pool would shrink with every failed start
+            self._idle.put(None)
+            raise ClipitError(f"Could not start a Readability.js worker: {e}")
+
+    def _is_healthy(self, worker: _NodeWorker) -> bool:
+        if not worker.is_alive():
+            return False
+        if time.monotonic() - worker.last_used > self.health_check_after:
+            return worker.ping(self.job_timeout)
+
+        return True
+
+    def _checkin(self, worker: _NodeWorker):
+        if worker.jobs_done >= self.max_jobs_per_worker:
+            worker.close()
+            self._idle.put(None)
+        else:
+            self._idle.put(worker)
+
+    def close(self):
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            if worker is not None:
+                worker.close()
+        for _ in workers:
+            self._idle.put(None)
+
+
+_pool: ReadabilityWorkerPool | None = None
+_pool_size = 2
+_pool_lock = threading.Lock()
+_node_available: bool | None = None
+
+
+def configure_readability_pool(size: int) -> None:
+    """Set how many Readability.js workers the shared pool runs, restarting it if it's already running."""
+    global _pool, _pool_size
+    with _pool_lock:
+        _pool_size = size
+        if _pool is not None and _pool.size != size:
+            _pool.close()
+            _pool = None
+
+
+def get_readability_pool() -> ReadabilityWorkerPool | None:
+    """The pool shared by every extraction in this process, or None if Node or Readability.js aren't available."""
+    global _pool, _node_available
+    with _pool_lock:
+        if _node_available is None:
+            from readabilipy.simple_json import have_node
+
+            _node_available = have_node()
+            if not _node_available:
+                warnings.warn(
+                    "node executable not found, reverting to pure-Python mode. "
+                    "Install Node.js v10 or newer to use Readability.js."
+                )
+        if not _node_available:
+            return None
+        if _pool is None:
+            _pool = ReadabilityWorkerPool(size=_pool_size)
+            atexit.register(_pool.close)
+
+        return _pool
@@ -0,0 +1,164 @@
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from clipit.core import PolitenessPolicy
+from clipit.core.http_cache import HttpCache
+from clipit.core.politeness import HostScheduler, create_retry
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+
+@dataclass
+class SessionStats(ConnectionStats):
+    hosts: dict[str, ConnectionStats] = field(default_factory=dict)
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that keeps track of how many requests reused a pooled connection, per host, and lets the
+    scheduler hold requests back until their host is ready for them.
+    """
+
+    def __init__(self, *args, scheduler: HostScheduler | None = None, **kwargs):
+        self._lock = threading.Lock()
+        self.stats = SessionStats()
+        self.scheduler = scheduler
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        adapter = self
+
+        def counting(pool_cls):
+            class CountingConnectionPool(pool_cls):
+                def _new_conn(self):
+                    adapter._record(self.host, new_connection=True)
+                    return super()._new_conn()
+
+            return CountingConnectionPool
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting(pool_cls) for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        host = urlparse(request.url).hostname or ""
+        if self.scheduler is not None:
+            self.scheduler.wait_turn(host)
+        self._record(host, new_connection=False)
+        return super().send(request, *args, **kwargs)
+
+    def _record(self, host: str, new_connection: bool):
+        with self._lock:
+            host_stats = self.stats.hosts.setdefault(host, ConnectionStats())
+            for stats in (self.stats, host_stats):
+                if new_connection:
+                    stats.new_connections += 1
+                else:
+                    stats.requests += 1
+
+
+DEFAULT_MAX_DOWNLOAD_BYTES = 50 * 1024 * 1024
+
+
+class ClipitSession(requests.Session):
+    """
+    A requests session that also carries the downloader's settings: its optional HTTP cache and size limit, and the
+    scheduler keeping it polite, which also checks robots.txt when the policy says so.
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache | None = None,
+        max_download_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+        scheduler: HostScheduler | None = None,
+    ):
+        super().__init__()
+        self.cache = cache
+        self.max_download_bytes = max_download_bytes
+        self.scheduler = scheduler
+
+    def request(self, method, url, *args, **kwargs):
+        if self.scheduler is not None and self.scheduler.policy.respect_robots_txt:
+            headers = kwargs.get("headers") or {}
+            user_agent = headers.get("User-Agent") or self.headers.get("User-Agent")
+            self.scheduler.check_robots_txt(url, user_agent, self._fetch_robots_txt)
+        return super().request(method, url, *args, **kwargs)
+
+    def _fetch_robots_txt(self, url: str, user_agent: str | None) -> tuple[int, str]:
+        # Straight to requests, robots.txt itself isn't subject to robots.txt
+        headers = {"User-Agent": user_agent} if user_agent else {}
+        response = super().request("GET", url, headers=headers, timeout=30)
+        return response.status_code, response.text
+
+
+def create_session(
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    cache: HttpCache | None = None,
+    max_download_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+    politeness: PolitenessPolicy | None = None,
+) -> ClipitSession:
+    """
+    Create a keep-alive session meant to be shared by all downloads.
+
+    pool_connections is how many hosts get their own connection pool, pool_maxsize how many connections are kept
+    open per host. Compression is negotiated with every encoding urllib3 can decode, which includes brotli (br)
+    when the brotli package is installed. Responses larger than max_download_bytes are abandoned mid-download.
+
+    With a politeness policy, requests are rate limited and retried per host as it says, and its
+    max_connections_per_host replaces pool_maxsize, with requests waiting for a free connection.
+    """
+    scheduler = HostScheduler(politeness) if politeness is not None else None
+    session = ClipitSession(cache=cache, max_download_bytes=max_download_bytes, scheduler=scheduler)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter_options = {}
+    if politeness is not None:
+        adapter_options["max_retries"] = create_retry(politeness, scheduler)
+        if politeness.max_connections_per_host is not None:
+            pool_maxsize = politeness.max_connections_per_host
+            adapter_options["pool_block"] = True
+    adapter = _CountingHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        scheduler=scheduler,
+        **adapter_options,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def connection_stats(session: requests.Session) -> SessionStats:
+    adapter = session.get_adapter("https://")
+    if not isinstance(adapter, _CountingHTTPAdapter):
+        return SessionStats()
+
+    with adapter._lock:
+        return SessionStats(
+            requests=adapter.stats.requests,
+            new_connections=adapter.stats.new_connections,
+            hosts={
+                host: ConnectionStats(requests=stats.requests, new_connections=stats.new_connections)
+                for host, stats in adapter.stats.hosts.items()
+            },
+        )
@@ -1,40 +1,11 @@
 import re
 from pathlib import Path
+from typing import Iterable
 from urllib.parse import urlparse
 
 import click
 
-from clipit.core import ClipitError, OutputFlags, OutputFormat
-
-
-def should_output_file(output_formats: dict[OutputFormat, str]) -> bool:
-    return any(fmt.is_file_output() for fmt in output_formats)
-
-
-def output(title: str, outputs: dict[OutputFormat, str], url: str, create_domain_subdir: bool, overwrite: bool):
-    output_dir = None
-    safe_title = None
-
-    output_flags = OutputFlags(
-        create_domain_subdir=create_domain_subdir,
-        overwrite=overwrite,
-    )
-
-    if should_output_file(outputs):
-        if output_flags.create_domain_subdir:
-            output_dir = create_output_dir(url)
-        else:
-            output_dir = Path(".")
-        safe_title = sanitize_filename(title)
-
-    for format, output in outputs.items():
-        if format.is_file_output():
-            # output_dir and safe_title are only defined if we're saving to a file
-            if output is not None and output_dir is not None and safe_title is not None:
-                write_to_file(output, str(output_dir), safe_title, format.value, output_flags.overwrite)
-        else:
-            if output is not None:
-                click.echo(output)
+from clipit.core import ClipitError
 
 
 def sanitize_filename(filename):
@@ -60,32 +31,43 @@ def sanitize_filename(filename):
 
 
 def write_to_file(
-    markdown_content: str,
+    markdown_content: str | Iterable[str],
     output_dir: str,
     safe_title: str,
     extension: str,
     overwrite: bool,
-):
+) -> Path | None:
     output_file = Path(output_dir) / f"{safe_title}.{extension}"
 
     if not overwrite and output_file.exists():
         click.echo(f"File {output_file} already exists. Use --overwrite to replace it.")
-        return
+        return None
 
     try:
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+            if isinstance(markdown_content, str):
+                f.write(markdown_content)
+            else:
+                # Written part by part, so they never have to be joined
+                f.writelines(markdown_content)
         click.echo(f"Saved {extension} content to {output_file}")
     except Exception as e:
         raise ClipitError(f"Error writing to file {output_file}: {e}")
 
+    return output_file
+
 
-def create_output_dir(url):
+def domain_dir(url, base_dir: str | Path = ".") -> Path:
+    """The subdirectory of base_dir the clips of url go to with create_domain_subdir."""
     parsed_url = urlparse(url)
     domain = parsed_url.netloc.replace("www.", "")
     if not domain:
         domain = "unknown_domain"
-    output_dir = Path(".") / domain
+    return Path(base_dir) / domain
+
+
+def create_output_dir(url, base_dir: str | Path = "."):
+    output_dir = domain_dir(url, base_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
 
     return output_dir
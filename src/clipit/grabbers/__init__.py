@@ -1,4 +1,19 @@
+from typing import TYPE_CHECKING
+
 from clipit.grabbers.base_grabber import BaseGrabber
-from clipit.grabbers.reddit_grabber import RedditGrabber
+from clipit.grabbers.registry import GrabberRegistry, GrabberSpec, create_registry, default_registry
+
+if TYPE_CHECKING:
+    from clipit.grabbers.reddit_grabber import RedditGrabber
+
+
+def __getattr__(name: str):
+    # Site-specific grabbers are imported when they're first used, by the registry or by name
+    if name == "RedditGrabber":
+        from clipit.grabbers.reddit_grabber import RedditGrabber
+
+        return RedditGrabber
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["BaseGrabber", "RedditGrabber"]
+__all__ = ["BaseGrabber", "RedditGrabber", "GrabberRegistry", "GrabberSpec", "create_registry", "default_registry"]
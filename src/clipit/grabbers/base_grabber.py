@@ -1,14 +1,13 @@
+from concurrent.futures import Executor
 from datetime import datetime
+from typing import TYPE_CHECKING, Iterator
 
-from clipit.core import OutputFormat, OutputFormatList, RenderFlags
-from clipit.core.downloader import download_html_content
-from clipit.core.extractor import extract_readable_content_and_title
-from clipit.core.markdown_converter import (
-    convert_to_markdown,
-    try_add_yaml_frontmatter,
-    try_include_source,
-    try_include_title,
-)
+from clipit.core import AssetOptions, ClipitError, OutputFormat, OutputFormatList, RenderFlags
+from clipit.core.extraction_engine import DEFAULT_ENGINE
+from clipit.core.instrumentation import timed
+
+if TYPE_CHECKING:
+    import requests
 
 
 class BaseGrabber:
@@ -23,30 +22,170 @@ class BaseGrabber:
         fallback_title: str,
         render_flags: RenderFlags,
         output_formats: OutputFormatList,
+        session: "requests.Session | None" = None,
+        assets: AssetOptions | None = None,
+        engine: str = DEFAULT_ENGINE,
     ) -> tuple[str, dict[OutputFormat, str]]:
+        """
+        Clip url and return its title and outputs. With assets, the images of the readable content are downloaded to
+        a local store and the outputs link to them. engine is how the page gets extracted, one of ENGINES.
+        """
+        self.check_output_formats(output_formats)
+
+        html_content = self.download(url, user_agent, session)
+        html_readable_content, title = self.extract(html_content, use_readability_js, fallback_title, url, engine)
+        if assets is not None:
+            html_readable_content = self.localize_assets(url, html_readable_content, assets, user_agent, session)
+
+        markdown_content = None
+        if output_formats.should_output_markdown():
+            markdown_content = self.convert(url, title, html_readable_content, render_flags)
+
+        return title, self.collect_outputs(html_content, html_readable_content, markdown_content, output_formats)
+
+    async def agrab(
+        self,
+        url: str,
+        user_agent: str | None,
+        use_readability_js: bool,
+        fallback_title: str,
+        render_flags: RenderFlags,
+        output_formats: OutputFormatList,
+        session: "requests.Session | None" = None,
+        io_executor: Executor | None = None,
+        cpu_executor: Executor | None = None,
+        assets: AssetOptions | None = None,
+        engine: str = DEFAULT_ENGINE,
+    ) -> tuple[str, dict[OutputFormat, str]]:
+        """
+        Same as grab, without blocking the event loop.
+
+        The download runs on io_executor and the extraction/conversion on cpu_executor, both default to the loop's
+        default executor.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        self.check_output_formats(output_formats)
+
+        html_content = await loop.run_in_executor(io_executor, self.download, url, user_agent, session)
+        html_readable_content, title = await loop.run_in_executor(
+            cpu_executor, self.extract, html_content, use_readability_js, fallback_title, url, engine
+        )
+        if assets is not None:
+            html_readable_content = await loop.run_in_executor(
+                io_executor, self.localize_assets, url, html_readable_content, assets, user_agent, session
+            )
+
+        markdown_content = None
+        if output_formats.should_output_markdown():
+            markdown_content = await loop.run_in_executor(
+                cpu_executor, self.convert, url, title, html_readable_content, render_flags
+            )
+
+        return title, self.collect_outputs(html_content, html_readable_content, markdown_content, output_formats)
+
+    def is_listing(self, url: str) -> bool:
+        """Whether the URL lists other URLs to clip (e.g. a subreddit), instead of being a page to clip itself."""
+        return False
+
+    def list_urls(
+        self,
+        url: str,
+        user_agent: str | None,
+        session: "requests.Session | None" = None,
+        max_urls: int | None = None,
+        since: datetime | None = None,
+    ) -> Iterator[str]:
+        """The URLs a listing links to, at most max_urls of them and none older than since."""
+        raise ClipitError(f"{url} is not a listing.")
+
+    def check_output_formats(self, output_formats: OutputFormatList) -> None:
+        """Raise a ClipitError if this grabber can't produce the requested formats."""
+        pass
+
+    def download(self, url: str, user_agent: str | None, session: "requests.Session | None" = None) -> str:
+        # Every stage imports what it needs when it first runs, so importing a grabber (e.g. for clipit --help)
+        # doesn't import requests, readabilipy, markdownify and mdformat
+        from clipit.core.downloader import download_html_content
+
+        return download_html_content(url, user_agent, session)
+
+    def extract(
+        self,
+        html_content: str,
+        use_readability_js: bool,
+        fallback_title: str,
+        url: str | None = None,
+        engine: str = DEFAULT_ENGINE,
+    ) -> tuple[str, str]:
+        from clipit.core.extractor import extract_readable_content_and_title
+
+        html_readable_content, title = extract_readable_content_and_title(html_content, use_readability_js, url, engine)
+        title = self.post_process_title(title, fallback_title)
+
+        return html_readable_content, title
+
+    def localize_assets(
+        self,
+        url: str,
+        html_readable_content: str,
+        assets: AssetOptions,
+        user_agent: str | None,
+        session: "requests.Session | None" = None,
+    ) -> str:
+        """Download the images of the readable content into the asset store, and link to them instead."""
+        from clipit.core.assets import localize_images
+
+        return localize_images(html_readable_content, url, assets, user_agent, session)
+
+    def convert(self, url: str, title: str, html_readable_content: str, render_flags: RenderFlags) -> str:
+        from clipit.core.markdown_converter import convert_to_markdown
+
+        markdown_content = convert_to_markdown(html_readable_content)
+        with timed("post_process"):
+            markdown_content = self.post_process_markdown(url, title, markdown_content, render_flags)
+
+        return markdown_content
+
+    def convert_parts(
+        self, url: str, title: str, html_readable_content: str, render_flags: RenderFlags
+    ) -> tuple[str, str]:
+        """
+        Same as convert, split in the header (front matter, title, source) and the body, for the low memory mode to
+        write one after the other instead of joining them in memory.
+        """
+        from clipit.core.markdown_converter import convert_to_markdown
+
+        markdown_content = convert_to_markdown(html_readable_content)
+        with timed("post_process"):
+            header = self.markdown_header(url, title, render_flags)
+
+        return header, markdown_content
+
+    def collect_outputs(
+        self,
+        html_content: str,
+        html_readable_content: str,
+        markdown_content: str | None,
+        output_formats: OutputFormatList,
+    ) -> dict[OutputFormat, str]:
         outputs = {}
 
-        html_content = download_html_content(url, user_agent)
         if output_formats.should_output_raw_html():
             outputs[OutputFormat.RAW_HTML] = html_content
 
-        html_readable_content, title = extract_readable_content_and_title(html_content, use_readability_js)
-        title = self.post_process_title(title, fallback_title)
-
         if output_formats.should_output_readable_html():
             outputs[OutputFormat.READABLE_HTML] = html_readable_content
 
-        if output_formats.should_output_markdown():
-            markdown_content = convert_to_markdown(html_readable_content)
-            markdown_content = self.post_process_markdown(url, title, markdown_content, render_flags)
-
+        if markdown_content is not None:
             if output_formats.should_output_markdown_file():
                 outputs[OutputFormat.MD] = markdown_content
 
             if output_formats.should_output_markdown_stdout():
                 outputs[OutputFormat.STDOUT_MD] = markdown_content
 
-        return title, outputs
+        return outputs
 
     def render_markdown(self, markdown_content):
         return markdown_content
@@ -64,11 +203,15 @@ class BaseGrabber:
         markdown_content: str,
         render_flags: RenderFlags,
     ):
-        markdown_content = try_include_source(render_flags.include_source, markdown_content, url)
-        markdown_content = try_include_title(render_flags.include_title, markdown_content, title)
-        markdown_content = try_add_yaml_frontmatter(render_flags.yaml_frontmatter, markdown_content, title, url)
+        # The whole header at once, so the document is copied once instead of once per part of the header
+        return self.markdown_header(url, title, render_flags) + markdown_content
 
-        return markdown_content
+    def markdown_header(self, url: str, title: str, render_flags: RenderFlags) -> str:
+        from clipit.core.markdown_converter import markdown_header
+
+        return markdown_header(
+            title, url, render_flags.include_source, render_flags.include_title, render_flags.yaml_frontmatter
+        )
 
     def post_process_title(self, title: str, fallback_title: str):
         title = self.handle_missing_title(title, fallback_title)
@@ -1,26 +1,174 @@
 import json
-from urllib.parse import urlparse, urlunparse
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import TYPE_CHECKING, Iterator
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 
-from clipit.core import ClipitError, RenderFlags
-from clipit.core.downloader import download_html_content
+from clipit.core import AssetOptions, ClipitError, RenderFlags
+from clipit.core.extraction_engine import DEFAULT_ENGINE
+from clipit.core.instrumentation import timed
 from clipit.core.output_format import OutputFormat, OutputFormatList
 from clipit.grabbers.base_grabber import BaseGrabber
 
+if TYPE_CHECKING:
+    import requests
+
+# The most comment IDs the morechildren endpoint accepts per request
+_MORECHILDREN_BATCH_SIZE = 100
+
+# The front page, subreddits and users, optionally sorted, e.g. /r/python/top or /user/spez/submitted
+_LISTING_PATH = re.compile(
+    r"^(?:/(?P<kind>r|u|user)/[^/]+)?(?:/(?P<sort>hot|new|top|rising|controversial|best|submitted|overview))?/?$",
+    re.IGNORECASE,
+)
+# The most posts Reddit sends per listing page
+_LISTING_PAGE_SIZE = 100
+
+
+class _CommentTree:
+    """Every reply list of a thread's JSON, keyed on the fullname of its parent, so stubs can be replaced in place."""
+
+    def __init__(self, reddit_post_json):
+        post_data = reddit_post_json[0]["data"]["children"][0]["data"]
+        self.link_id = post_data.get("name") or f"t3_{post_data['id']}"
+        self.replies: dict[str, list[dict]] = {self.link_id: reddit_post_json[1]["data"]["children"]}
+        # How deep the comments of each reply list are, top-level comments being 0
+        self.depths: dict[str, int] = {self.link_id: 0}
+
+        stack = [self.link_id]
+        while stack:
+            parent = stack.pop()
+            for child in self.replies[parent]:
+                if child.get("kind") == "t1":
+                    stack.append(self._add_comment(child["data"], self.depths[parent]))
+
+    def _add_comment(self, comment_data: dict, depth: int) -> str:
+        name = comment_data.get("name") or f"t1_{comment_data['id']}"
+        if not isinstance(comment_data.get("replies"), dict):
+            comment_data["replies"] = {"kind": "Listing", "data": {"children": []}}
+        self.replies[name] = comment_data["replies"]["data"]["children"]
+        self.depths[name] = depth + 1
+        return name
+
+    def stubs(self, max_depth: int | None) -> list[tuple[str, dict]]:
+        """Every "more comments" stub that can still be expanded, along with its parent."""
+        return [
+            (parent, child)
+            for parent, children in self.replies.items()
+            if max_depth is None or self.depths[parent] <= max_depth
+            for child in children
+            if child.get("kind") == "more" and child["data"].get("children")
+        ]
+
+    def expand(self, parent: str, stub: dict, requested_ids: list[str], things: list[dict]) -> None:
+        """Replace the requested part of a stub with the comments the morechildren endpoint returned for it."""
+        requested = set(requested_ids)
+        stub_data = stub["data"]
+        stub_data["children"] = [child_id for child_id in stub_data["children"] if child_id not in requested]
+        stub_data["count"] = max(0, stub_data.get("count", 0) - len(requested))
+        if not stub_data["children"]:
+            siblings = self.replies[parent]
+            del siblings[next(i for i, sibling in enumerate(siblings) if sibling is stub)]
+
+        # Things come in thread order, every comment after its parent
+        for thing in things:
+            siblings = self.replies.get(thing["data"].get("parent_id"))
+            if siblings is None:
+                continue
+            if thing.get("kind") == "t1":
+                self._add_comment(thing["data"], self.depths[thing["data"]["parent_id"]])
+            siblings.append(thing)
+
 
 class RedditGrabber(BaseGrabber):
+    def __init__(self, max_more_requests: int = 16, max_more_depth: int | None = None, more_concurrency: int = 4):
+        """
+        Reddit only sends the first few hundred comments of a thread, the rest are "more comments" stubs. Up to
+        max_more_requests morechildren requests per thread (more_concurrency at a time) replace the stubs at most
+        max_more_depth levels deep with the actual comments. Set max_more_requests to 0 to keep the stubs.
+        """
+        self.max_more_requests = max_more_requests
+        self.max_more_depth = max_more_depth
+        self.more_concurrency = more_concurrency
+
     def can_handle(self, url: str) -> bool:
         domain = urlparse(url).netloc.lower()
         return domain == "www.reddit.com" or domain == "old.reddit.com"
 
-    def grab(
+    def is_listing(self, url: str) -> bool:
+        return self.can_handle(url) and _LISTING_PATH.match(urlparse(url).path) is not None
+
+    def list_urls(
         self,
         url: str,
         user_agent: str | None,
-        use_readability_js: bool,
-        fallback_title: str,
-        render_flags: RenderFlags,
-        output_formats: OutputFormatList,
-    ) -> tuple[str, dict[OutputFormat, str]]:
+        session: "requests.Session | None" = None,
+        max_urls: int | None = None,
+        since: datetime | None = None,
+    ) -> Iterator[str]:
+        """
+        The permalinks of the posts in a subreddit, user or front page listing, following the listing's after cursor
+        one page at a time, so only as many pages are downloaded as the caller consumes.
+        """
+        parsed_url = urlparse(url)
+        match = _LISTING_PATH.match(parsed_url.path)
+        if match is None:
+            raise ClipitError(f"{url} is not a Reddit listing.")
+
+        # Only these are sorted newest first, other sorts can have newer posts after older ones
+        is_user = (match["kind"] or "").lower() in ("u", "user")
+        newest_first = (match["sort"] or "").lower() == "new" or (
+            is_user and dict(parse_qsl(parsed_url.query)).get("sort", "new") == "new"
+        )
+        oldest = since.timestamp() if since is not None else None
+
+        seen: set[str] = set()
+        after = None
+        while True:
+            listing = self._fetch_listing_page(url, user_agent, session, after)
+            for child in listing.get("children", []):
+                # User pages list comments too
+                if child.get("kind") != "t3":
+                    continue
+                post_data = child["data"]
+                if oldest is not None and post_data.get("created_utc", 0) < oldest:
+                    if newest_first:
+                        return
+                    continue
+
+                # Listings shift while we page through them, so the same post can show up twice
+                permalink = urljoin(url, post_data["permalink"])
+                if permalink in seen:
+                    continue
+                seen.add(permalink)
+                yield permalink
+
+                if max_urls is not None and len(seen) >= max_urls:
+                    return
+
+            after = listing.get("after")
+            if not after:
+                return
+
+    def _fetch_listing_page(
+        self, url: str, user_agent: str | None, session: "requests.Session | None", after: str | None
+    ) -> dict:
+        parsed_url = urlparse(self._convert_to_json_url(url))
+        query = dict(parse_qsl(parsed_url.query))
+        query["limit"] = str(_LISTING_PAGE_SIZE)
+        if after:
+            query["after"] = after
+        page_url = urlunparse(parsed_url._replace(query=urlencode(query)))
+
+        json_content = _download_json(page_url, user_agent, session)
+        try:
+            return json.loads(json_content)["data"]
+        except (ValueError, LookupError, TypeError) as e:
+            raise ClipitError(f"Error reading the Reddit listing {page_url}: {e}")
+
+    def check_output_formats(self, output_formats: OutputFormatList) -> None:
         if (
             output_formats.should_output_raw_html()
             or output_formats.should_output_readable_html()
@@ -28,21 +176,123 @@ class RedditGrabber(BaseGrabber):
         ):
             raise ClipitError("Reddit posts can only be converted to Markdown.")
 
-        outputs = {}
-
+    def download(self, url: str, user_agent: str | None, session: "requests.Session | None" = None) -> str:
         json_url = self._convert_to_json_url(url)
-        json_content = json.loads(download_html_content(json_url, user_agent))
+        json_content = _download_json(json_url, user_agent, session)
+        if self.max_more_requests <= 0:
+            return json_content
+
+        try:
+            reddit_post_json = json.loads(json_content)
+            tree = _CommentTree(reddit_post_json)
+        except (ValueError, LookupError, TypeError, AttributeError):
+            # Not a thread we understand, let extract() report it
+            return json_content
+
+        with timed("more_comments"):
+            expanded = self._expand_more_comments(url, tree, user_agent, session)
+        if not expanded:
+            return json_content
+
+        return json.dumps(reddit_post_json)
+
+    def extract(
+        self,
+        html_content: str,
+        use_readability_js: bool,
+        fallback_title: str,
+        url: str | None = None,
+        engine: str = DEFAULT_ENGINE,
+    ) -> tuple[str, str]:
+        # The thread comes as JSON, there's nothing for use_readability_js or engine to pick
+        json_content = json.loads(html_content)
 
         title = json_content[0]["data"]["children"][0]["data"].get("title", None)
         title = self.post_process_title(title, fallback_title)
 
-        markdown_content = self._reddit_json_to_markdown(json_content)
-        markdown_content = self.post_process_markdown(url, title, markdown_content, render_flags)
+        # The "readable content" of a Reddit post is the thread itself, already rendered to Markdown
+        return self._reddit_json_to_markdown(json_content), title
+
+    def localize_assets(
+        self,
+        url: str,
+        html_readable_content: str,
+        assets: AssetOptions,
+        user_agent: str | None,
+        session: "requests.Session | None" = None,
+    ) -> str:
+        # Threads are rendered straight to Markdown, and images posted to Reddit are only ever linked to
+        return html_readable_content
+
+    def convert(self, url: str, title: str, html_readable_content: str, render_flags: RenderFlags) -> str:
+        with timed("post_process"):
+            return self.post_process_markdown(url, title, html_readable_content, render_flags)
+
+    def convert_parts(
+        self, url: str, title: str, html_readable_content: str, render_flags: RenderFlags
+    ) -> tuple[str, str]:
+        with timed("post_process"):
+            return self.markdown_header(url, title, render_flags), html_readable_content
+
+    def collect_outputs(
+        self,
+        html_content: str,
+        html_readable_content: str,
+        markdown_content: str | None,
+        output_formats: OutputFormatList,
+    ) -> dict[OutputFormat, str]:
+        outputs = {}
+
+        if markdown_content is not None:
+            outputs[OutputFormat.MD] = markdown_content
+            outputs[OutputFormat.STDOUT_MD] = markdown_content
+
+        return outputs
 
-        outputs[OutputFormat.MD] = markdown_content
-        outputs[OutputFormat.STDOUT_MD] = markdown_content
+    def _expand_more_comments(
+        self, url: str, tree: _CommentTree, user_agent: str | None, session: "requests.Session | None"
+    ) -> bool:
+        """Expand the thread's stubs breadth-first, within the request budget. Returns whether anything changed."""
+        api_url = urlunparse(urlparse(url)._replace(path="/api/morechildren.json", params="", query="", fragment=""))
+        fetch = partial(self._fetch_more_children, api_url, tree.link_id, user_agent, session)
+        budget = self.max_more_requests
+        requested: set[str] = set()
+        expanded = False
 
-        return title, outputs
+        with ThreadPoolExecutor(max_workers=self.more_concurrency, thread_name_prefix="clipit-reddit") as executor:
+            while budget > 0:
+                # Expanding stubs can reveal new ones, each round takes care of those found by the previous one
+                batches = []
+                for parent, stub in tree.stubs(self.max_more_depth):
+                    ids = [child_id for child_id in stub["data"]["children"] if child_id not in requested]
+                    for start in range(0, len(ids), _MORECHILDREN_BATCH_SIZE):
+                        batches.append((parent, stub, ids[start : start + _MORECHILDREN_BATCH_SIZE]))
+                batches = batches[:budget]
+                if not batches:
+                    break
+
+                budget -= len(batches)
+                for _, _, ids in batches:
+                    requested.update(ids)
+                for (parent, stub, ids), things in zip(batches, executor.map(fetch, [ids for _, _, ids in batches])):
+                    if things is not None:
+                        tree.expand(parent, stub, ids, things)
+                        expanded = True
+
+        return expanded
+
+    def _fetch_more_children(
+        self, api_url: str, link_id: str, user_agent: str | None, session: "requests.Session | None", ids: list[str]
+    ) -> list[dict] | None:
+        query = urlencode(
+            {"api_type": "json", "link_id": link_id, "children": ",".join(ids), "limit_children": "false"}
+        )
+        try:
+            response = json.loads(_download_json(f"{api_url}?{query}", user_agent, session))
+            return response["json"]["data"]["things"]
+        except (ClipitError, ValueError, LookupError, TypeError):
+            # The stub stays, and gets rendered as such
+            return None
 
     def _convert_to_json_url(self, url):
         parsed_url = urlparse(url)
@@ -54,26 +304,6 @@ class RedditGrabber(BaseGrabber):
         return json_url
 
     def _reddit_json_to_markdown(self, reddit_post_json):
-        def parse_comments(comments_data, depth=0):
-            comments_md = ""
-            # Sort comments by score, highest first
-            sorted_comments = sorted(comments_data, key=lambda x: x["data"].get("score", 0), reverse=True)
-            for comment in sorted_comments:
-                comment_data = comment["data"]
-                author = comment_data.get("author", "[deleted]")
-                score = comment_data.get("score", 0)
-                body = comment_data.get("body", "").replace("\n", "\n" + "    " * (depth + 1))
-                indentation = "    " * depth
-
-                comments_md += f"{indentation}- **{author}** [{score} score]:\n{indentation}    {body}\n\n"
-
-                # Check if 'replies' is a dict (has replies), and recursively parse them
-                if isinstance(comment_data.get("replies"), dict):
-                    nested_comments = comment_data["replies"]["data"]["children"]
-                    comments_md += parse_comments(nested_comments, depth + 1)
-
-            return comments_md
-
         try:
             # Extract post information
             post_data = reddit_post_json[0]["data"]["children"][0]["data"]
@@ -82,14 +312,50 @@ class RedditGrabber(BaseGrabber):
             author = post_data.get("author", "[deleted]")
             score = post_data.get("score", 0)
 
-            markdown = f"**{author}** [{score} score]:\n> {selftext if selftext else post_url}\n\n"
-
-            # Extract comments
-            comments_data = reddit_post_json[1]["data"]["children"]
-            markdown += "## Comments\n\n"
-            markdown += parse_comments(comments_data)
+            parts = [f"**{author}** [{score} score]:\n> {selftext if selftext else post_url}\n\n", "## Comments\n\n"]
+            _render_comments(reddit_post_json[1]["data"]["children"], parts)
 
         except Exception as e:
             raise ClipitError(f"Error converting Reddit JSON to Markdown: {str(e)}")
 
-        return markdown
+        return "".join(parts)
+
+
+def _download_json(url: str, user_agent: str | None, session: "requests.Session | None") -> str:
+    # Imported here so that importing the grabber doesn't import requests
+    from clipit.core.downloader import JSON_CONTENT_TYPES, download_html_content
+
+    return download_html_content(url, user_agent, session, content_types=JSON_CONTENT_TYPES)
+
+
+def _by_score(comments: list[dict]) -> list[dict]:
+    """Comments sorted by score, highest first, followed by the "more comments" stubs."""
+    sorted_comments = sorted(
+        (c for c in comments if c.get("kind") != "more"), key=lambda x: x["data"].get("score", 0), reverse=True
+    )
+    return sorted_comments + [c for c in comments if c.get("kind") == "more"]
+
+
+def _render_comments(comments: list[dict], parts: list[str]) -> None:
+    # Depth-first with an explicit stack instead of recursion, so deep threads can't hit the recursion limit
+    stack = [(comment, 0) for comment in reversed(_by_score(comments))]
+    while stack:
+        comment, depth = stack.pop()
+        comment_data = comment["data"]
+        indentation = "    " * depth
+
+        if comment.get("kind") == "more":
+            count = comment_data.get("count", 0)
+            if count:
+                parts.append(f"{indentation}- *{count} more {'comment' if count == 1 else 'comments'} not loaded*\n\n")
+            continue
+
+        author = comment_data.get("author", "[deleted]")
+        score = comment_data.get("score", 0)
+        body = comment_data.get("body", "").replace("\n", "\n" + "    " * (depth + 1))
+        parts.append(f"{indentation}- **{author}** [{score} score]:\n{indentation}    {body}\n\n")
+
+        # 'replies' is a dict when there are replies, and an empty string otherwise
+        if isinstance(comment_data.get("replies"), dict):
+            replies = comment_data["replies"]["data"]["children"]
+            stack.extend((reply, depth + 1) for reply in reversed(_by_score(replies)))
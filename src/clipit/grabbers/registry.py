@@ -0,0 +1,174 @@
+import importlib
+import threading
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+from urllib.parse import urlsplit
+
+from clipit.core import ClipitError
+from clipit.grabbers.base_grabber import BaseGrabber
+
+ENTRY_POINT_GROUP = "clipit.grabbers"
+
+GrabberTarget = BaseGrabber | str | Callable[..., BaseGrabber]
+
+
+@dataclass
+class GrabberSpec:
+    """
+    What a plugin's entry point in the clipit.grabbers group points to: the hosts a grabber handles, and where it is.
+
+    Hosts are exact ("www.example.com") or, with a leading dot, a domain and all its subdomains (".example.com").
+    The grabber is a "module:attribute" string naming a BaseGrabber subclass, or a function returning an instance,
+    so that the spec can live in a module that's cheap to import and the grabber is only imported when it's needed.
+    """
+
+    hosts: tuple[str, ...]
+    grabber: str
+
+
+@dataclass
+class _Entry:
+    name: str
+    target: GrabberTarget
+    options: dict[str, Any] = field(default_factory=dict)
+    grabber: BaseGrabber | None = None
+
+
+# Built into clipit, registered the same way a plugin would be
+BUILTIN_GRABBERS = {
+    "reddit": GrabberSpec(
+        hosts=("www.reddit.com", "old.reddit.com"), grabber="clipit.grabbers.reddit_grabber:RedditGrabber"
+    ),
+}
+
+
+class GrabberRegistry:
+    """
+    Picks the grabber for a URL with a dictionary lookup on its host, instead of asking every grabber in turn.
+
+    A grabber is imported and created the first time a URL for one of its hosts comes along. It can still turn the
+    URL down in can_handle, URLs nobody takes go to the fallback grabber.
+    """
+
+    def __init__(self, fallback: BaseGrabber | None = None):
+        self.fallback = fallback if fallback is not None else BaseGrabber()
+        self._entries: dict[str, _Entry] = {}
+        self._hosts: dict[str, _Entry] = {}
+        self._domains: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, hosts: Iterable[str], grabber: GrabberTarget, **options) -> None:
+        """
+        Handle hosts with grabber: an instance, a "module:attribute" string, or a class or function creating one
+        with options. A grabber registered under an existing name replaces it, and so do the hosts.
+        """
+        if isinstance(grabber, BaseGrabber) and options:
+            raise ValueError(f"The {name} grabber is already created, it can't take options")
+
+        entry = _Entry(name=name, target=grabber, options=options)
+        with self._lock:
+            self._entries[name] = entry
+            for host in hosts:
+                host = host.lower().rstrip(".")
+                if host.startswith("."):
+                    self._domains[host[1:]] = entry
+                else:
+                    self._hosts[host] = entry
+
+    def register_spec(self, name: str, spec: GrabberSpec, **options) -> None:
+        self.register(name, spec.hosts, spec.grabber, **options)
+
+    def configure(self, name: str, **options) -> None:
+        """Set the options the named grabber gets created with, before it's first used."""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise ClipitError(f"There's no {name} grabber")
+        if entry.grabber is not None or isinstance(entry.target, BaseGrabber):
+            raise ClipitError(f"The {name} grabber is already created, it can't be configured anymore")
+        entry.options.update(options)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register the GrabberSpec of every installed plugin, under its entry point's name."""
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=group):
+            try:
+                spec = entry_point.load()
+            except Exception as e:
+                warnings.warn(f"Could not load the {entry_point.name} grabber from {entry_point.value}: {e}")
+                continue
+            if not isinstance(spec, GrabberSpec):
+                warnings.warn(f"Ignoring the {entry_point.name} grabber, {entry_point.value} is not a GrabberSpec")
+                continue
+            self.register_spec(entry_point.name, spec)
+
+    def find(self, url: str) -> BaseGrabber:
+        entry = self._lookup((urlsplit(url).hostname or "").rstrip("."))
+        if entry is not None:
+            grabber = entry.grabber or self._create(entry)
+            if grabber.can_handle(url):
+                return grabber
+
+        return self.fallback
+
+    def loaded(self) -> list[str]:
+        """The names of the grabbers created so far."""
+        return [name for name, entry in self._entries.items() if entry.grabber is not None]
+
+    def _lookup(self, host: str) -> _Entry | None:
+        entry = self._hosts.get(host)
+        if entry is not None:
+            return entry
+
+        # The closest domain wins, e.g. .blog.example.com over .example.com
+        labels = host.split(".")
+        for start in range(len(labels)):
+            entry = self._domains.get(".".join(labels[start:]))
+            if entry is not None:
+                return entry
+
+        return None
+
+    def _create(self, entry: _Entry) -> BaseGrabber:
+        with self._lock:
+            if entry.grabber is None:
+                target = entry.target
+                if isinstance(target, str):
+                    target = _import(target)
+                entry.grabber = target if isinstance(target, BaseGrabber) else target(**entry.options)
+        return entry.grabber
+
+
+def _import(target: str) -> Any:
+    module_name, _, attribute = target.partition(":")
+    try:
+        value = importlib.import_module(module_name)
+        for name in attribute.split(".") if attribute else []:
+            value = getattr(value, name)
+    except (ImportError, AttributeError) as e:
+        raise ClipitError(f"Could not import the grabber {target}: {e}")
+    return value
+
+
+def create_registry(load_entry_points: bool = True) -> GrabberRegistry:
+    """A registry with clipit's own grabbers and, unless told otherwise, those of every installed plugin."""
+    registry = GrabberRegistry()
+    for name, spec in BUILTIN_GRABBERS.items():
+        registry.register_spec(name, spec)
+    if load_entry_points:
+        registry.load_entry_points()
+    return registry
+
+
+_default_registry: GrabberRegistry | None = None
+_default_registry_lock = threading.Lock()
+
+
+def default_registry() -> GrabberRegistry:
+    """The registry Clippers use unless they're given grabbers, created on first use."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = create_registry()
+        return _default_registry
@@ -0,0 +1,272 @@
+"""
+clipit serve: a Clipper that stays up between clips behind an HTTP server on localhost, so each clip skips the
+interpreter startup, the imports, the new connections and the Node cold start. Also the client the CLI uses to hand
+clips to it.
+"""
+
+import io
+import json
+import os
+import secrets
+import sys
+import threading
+import urllib.error
+import urllib.request
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from clipit.core import ClipitError
+from clipit.core.misc import default_cache_dir
+
+if TYPE_CHECKING:
+    from clipit.clipper import Clipper
+
+# The clip_and_save options a job can set, with the same defaults as the CLI. Everything that configures the Clipper
+# itself (user agent, cache, index...) is up to the server.
+JOB_DEFAULTS: dict[str, Any] = {
+    "use_readability_js": True,
+    "fallback_title": "Untitled {date}",
+    "include_source": False,
+    "include_title": True,
+    "yaml_frontmatter": True,
+    "output_formats": ["md"],
+    "create_domain_subdir": True,
+    "overwrite": False,
+}
+
+TOKEN_HEADER = "X-Clipit-Token"
+
+
+def default_server_file() -> Path:
+    """Where a running server leaves its address and token for the clients to find."""
+    return default_cache_dir() / "server.json"
+
+
+@dataclass
+class ServerInfo:
+    url: str
+    token: str
+    pid: int
+
+
+class _ThreadStdout(io.TextIOBase):
+    """Stands in for sys.stdout, so what each job prints goes back to its client instead of the server's console."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def capture(self, buffer: io.StringIO | None) -> None:
+        self._local.buffer = buffer
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "buffer", None) is None:
+            self.stream.flush()
+
+
+class ClipServer:
+    """
+    Runs clip jobs on a shared Clipper, up to max_jobs at a time, for as long as it's served.
+
+    Jobs are POSTed as JSON to /clip: the url, the directory to save it in, and any of the options in JOB_DEFAULTS.
+    Every request needs the server's token in the X-Clipit-Token header. While serving, the server's address and
+    token are in server_file, readable only by the current user, which is how the clients find it.
+    """
+
+    def __init__(
+        self,
+        clipper: "Clipper",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_jobs: int = 8,
+        server_file: Path | None = None,
+    ):
+        self.clipper = clipper
+        self.token = secrets.token_urlsafe(32)
+        self.server_file = server_file if server_file is not None else default_server_file()
+        self._jobs = threading.BoundedSemaphore(max_jobs)
+        self._stdout = _ThreadStdout(sys.stdout)
+        self._stdout_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self) -> None:
+        """Import the extraction and conversion code and start the Readability.js workers, in the background."""
+
+        def warm_up():
+            from clipit.core import extractor, markdown_emitter  # noqa: F401
+            from clipit.core.readability_pool import get_readability_pool
+
+            pool = get_readability_pool()
+            if pool is not None:
+                try:
+                    pool.start()
+                except ClipitError:
+                    # The first job to need Readability.js will try again, and report it
+                    pass
+
+        threading.Thread(target=warm_up, name="clipit-warm-up", daemon=True).start()
+
+    def serve_forever(self) -> None:
+        """Serve until shutdown() is called."""
+        self._advertise()
+        self._redirect_stdout()
+        try:
+            self._httpd.serve_forever()
+        finally:
+            with self._stdout_lock:
+                if sys.stdout is self._stdout:
+                    sys.stdout = self._stdout.stream
+            self._httpd.server_close()
+            self._withdraw()
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+
+    def _advertise(self) -> None:
+        self.server_file.parent.mkdir(parents=True, exist_ok=True)
+        info = ServerInfo(url=self.url, token=self.token, pid=os.getpid())
+        temp_file = self.server_file.with_suffix(f".{os.getpid()}.tmp")
+        # Only the user running the server gets to read the token
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(asdict(info), f)
+        os.replace(temp_file, self.server_file)
+
+    def _withdraw(self) -> None:
+        # Unless another server has taken over the file since
+        info = read_server_info(self.server_file)
+        if info is not None and info.token == self.token:
+            self.server_file.unlink(missing_ok=True)
+
+    def _redirect_stdout(self) -> None:
+        with self._stdout_lock:
+            # Whoever replaced sys.stdout in the meantime still gets everything but the jobs' output
+            if sys.stdout is not self._stdout:
+                self._stdout.stream = sys.stdout
+                sys.stdout = self._stdout
+
+    def run_job(self, job: dict) -> dict:
+        """Clip and save one URL, and return what it printed along with the error that stopped it, if any."""
+        from clipit.core.backends import FileBackend
+
+        unknown = set(job) - {"url", "directory", *JOB_DEFAULTS}
+        if unknown:
+            raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+        if not isinstance(job.get("url"), str) or not isinstance(job.get("directory"), str):
+            raise ValueError("A job needs a url and a directory")
+        if not os.path.isabs(job["directory"]):
+            raise ValueError("The job's directory has to be an absolute path")
+        options = {**JOB_DEFAULTS, **{key: value for key, value in job.items() if key in JOB_DEFAULTS}}
+        backend = FileBackend(create_domain_subdir=options["create_domain_subdir"], directory=job["directory"])
+
+        output = io.StringIO()
+        error = None
+        with self._jobs:
+            self._redirect_stdout()
+            self._stdout.capture(output)
+            try:
+                self.clipper.clip_and_save(url=job["url"], backend=backend, **options)
+            except Exception as e:
+                error = str(e)
+            finally:
+                self._stdout.capture(None)
+
+        return {"output": output.getvalue(), "error": error}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if not self._authorized():
+                    return self._reply(403, {"error": "Wrong or missing token"})
+                if self.path != "/status":
+                    return self._reply(404, {"error": "Not found"})
+                self._reply(200, {"pid": os.getpid()})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return self._reply(403, {"error": "Wrong or missing token"})
+                if self.path != "/clip":
+                    return self._reply(404, {"error": "Not found"})
+                try:
+                    job = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                    if not isinstance(job, dict):
+                        raise ValueError("A job is a JSON object")
+                    result = server.run_job(job)
+                except ValueError as e:
+                    return self._reply(400, {"error": str(e)})
+                self._reply(200, result)
+
+            def _authorized(self) -> bool:
+                return secrets.compare_digest(self.headers.get(TOKEN_HEADER, ""), server.token)
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def read_server_info(server_file: Path | None = None) -> ServerInfo | None:
+    """The address and token of the running server, or None if there's none."""
+    try:
+        with open(server_file or default_server_file(), encoding="utf-8") as f:
+            return ServerInfo(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def send_job(info: ServerInfo, job: dict, timeout: float = 600) -> dict | None:
+    """
+    Hand a job to the server and wait for it to finish. Returns None if the server isn't listening (anymore), so the
+    caller can clip the URL itself.
+    """
+    request = urllib.request.Request(
+        f"{info.url}/clip",
+        data=json.dumps(job).encode("utf-8"),
+        headers={"Content-Type": "application/json", TOKEN_HEADER: info.token},
+        method="POST",
+    )
+    # The server is on localhost, no proxy should get in between
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            reason = json.loads(e.read())["error"]
+        except (ValueError, LookupError, TypeError):
+            reason = e.reason
+        raise ClipitError(f"The clipit server refused the job: {reason}")
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, ConnectionRefusedError):
+            return None
+        raise ClipitError(f"Error talking to the clipit server at {info.url}: {e.reason}")
+    except ConnectionRefusedError:
+        return None
@@ -0,0 +1,88 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class LocalSite:
+    """A real HTTP server on localhost serving canned pages, so tests don't depend on the internet."""
+
+    def __init__(self):
+        self.pages: dict[str, tuple[int, dict[str, str], bytes]] = {}
+        # Served once each, in order, before falling back to pages
+        self.sequences: dict[str, list[tuple[int, dict[str, str], bytes]]] = {}
+        self._lock = threading.Lock()
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def add(self, path: str, body: str | bytes, status: int = 200, headers: dict[str, str] | None = None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.pages[path] = (status, {"Content-Type": "text/html; charset=utf-8", **(headers or {})}, body)
+
+    def add_sequence(self, path: str, responses: list[tuple[int, dict[str, str]]], then: str | bytes):
+        """Answer the first requests for path with these statuses and headers, and the ones after with then."""
+        self.sequences[path] = [
+            (status, {"Content-Type": "text/plain", **headers}, b"") for status, headers in responses
+        ]
+        self.add(path, then)
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests.append((self.path, dict(self.headers)))
+                    sequence = site.sequences.get(self.path)
+                    page = sequence.pop(0) if sequence else None
+                # Pages added without a query string answer for any query string
+                page = page or site.pages.get(self.path) or site.pages.get(self.path.split("?")[0])
+                status, headers, body = page or (404, {"Content-Type": "text/plain"}, b"Not found")
+                if "ETag" in headers and self.headers.get("If-None-Match") == headers["ETag"]:
+                    status, body = 304, b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def local_site():
+    site = LocalSite()
+    site.start()
+    yield site
+    site.stop()
+
+
+def article_html(title: str, paragraphs: int = 5) -> str:
+    body = "".join(
+        f"<p>This is paragraph {n} of {title}, with enough words in it to look like a real article.</p>"
+        for n in range(paragraphs)
+    )
+    return f"<html><head><title>{title}</title></head><body><article><h1>{title}</h1>{body}</article></body></html>"
@@ -0,0 +1,75 @@
+import os
+
+from clipit.clipper import Clipper
+from clipit.core import extractor
+from clipit.core.artifact_cache import ArtifactCache, use_artifact_cache
+from clipit.core.extractor import extract_readable_content_and_title
+from clipit.core.instrumentation import StageProfile
+
+from tests.conftest import article_html
+
+
+def clip(clipper, url, **options):
+    clipper.clip_and_save(
+        url,
+        use_readability_js=False,
+        fallback_title="Untitled",
+        include_source=False,
+        create_domain_subdir=False,
+        overwrite=True,
+        **options,
+    )
+
+
+def test_clipping_again_with_other_options_skips_extraction_and_conversion(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/article", article_html("Article"))
+    url = local_site.url("/article")
+    profile = StageProfile()
+
+    with Clipper(artifact_cache_dir=tmp_path / "artifacts", metrics=[profile]) as clipper:
+        clip(clipper, url, include_title=False, yaml_frontmatter=False, output_formats=["md"])
+        without_title = (tmp_path / "Article.md").read_text()
+        clip(clipper, url, include_title=True, yaml_frontmatter=True, output_formats=["md", "html"])
+        stats = clipper.artifact_stats()
+
+    assert (tmp_path / "Article.md").read_text().endswith(f"# Article\n\n{without_title}")
+    assert "paragraph 4 of Article" in (tmp_path / "Article.html").read_text()
+    # Extracted and converted once, then both came from the cache
+    assert profile.totals["extract.python"].count == 1
+    assert profile.totals["convert.emit"].count == 1
+    assert (stats.hits, stats.misses) == (2, 2)
+    assert stats.hit_rate == 0.5
+
+
+def test_cache_is_keyed_on_content_and_options_and_evicts_least_recently_used_entries(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=300)
+    keys = [cache.key("extract", "<p>page</p>", (use_readability_js,)) for use_readability_js in (True, False)]
+    keys.append(cache.key("extract", "<p>other page</p>", (True,)))
+    assert len(set(keys)) == 3
+
+    for key in keys[:2]:
+        cache.put(key, ["a" * 100, "Title"])
+    os.utime(tmp_path / keys[0][:2] / f"{keys[0]}.json", (0, 0))
+    cache.put(keys[2], ["a" * 100, "Title"])
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == ["a" * 100, "Title"]
+    assert cache.get(keys[2]) == ["a" * 100, "Title"]
+
+
+def test_extractions_are_cached_by_the_strategy_that_runs(tmp_path, monkeypatch):
+    # Too short for Readability.js to be worth trying, so the Python extraction runs either way
+    short_page = article_html("Short", paragraphs=1)
+    page = article_html("Long", paragraphs=10)
+    # As on machines without Node
+    monkeypatch.setattr(extractor, "get_readability_pool", lambda: None)
+    cache = ArtifactCache(tmp_path)
+
+    with use_artifact_cache(cache):
+        for use_readability_js in (True, True, False, False):
+            extract_readable_content_and_title(short_page, use_readability_js)
+            extract_readable_content_and_title(page, use_readability_js)
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (6, 2)
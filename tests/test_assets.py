@@ -0,0 +1,81 @@
+import re
+from urllib.parse import urlparse
+
+from clipit.clipper import Clipper
+from clipit.core import AssetOptions
+from clipit.core.assets import localize_images
+from clipit.grabbers import BaseGrabber
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"pixels" * 10
+
+
+def add_images(local_site):
+    local_site.add("/img/a.png", PNG, headers={"Content-Type": "image/png"})
+    local_site.add("/img/same-as-a", PNG, headers={"Content-Type": "image/png"})
+    local_site.add("/img/big.png", PNG * 100, headers={"Content-Type": "image/png"})
+    local_site.add("/img/not-an-image.png", "<html></html>")
+
+
+class PassThroughGrabber(BaseGrabber):
+    """Without Node, extraction drops the images, so these tests keep the whole page instead."""
+
+    def extract(self, html_content, use_readability_js, fallback_title, url=None, engine=None):
+        return html_content, url.rsplit("/", 1)[-1]
+
+
+def test_images_are_stored_once_under_their_hash(local_site, tmp_path):
+    add_images(local_site)
+    html = (
+        '<p><img src="/img/a.png" srcset="/img/a@2x.png 2x"><img src="img/same-as-a"><img src="/img/a.png"></p>'
+        '<p><img src="/img/big.png"><img src="/img/missing.png"><img src="/img/not-an-image.png">'
+        '<img src="data:image/png;base64,AAAA"></p>'
+    )
+    options = AssetOptions(directory=tmp_path / "assets", link_prefix="../assets", max_bytes=len(PNG) * 10)
+
+    localized = localize_images(html, local_site.url("/"), options, user_agent=None)
+
+    [stored] = [path for path in (tmp_path / "assets").rglob("*") if path.is_file()]
+    assert stored.read_bytes() == PNG
+    assert stored.suffix == ".png"
+    link = f"../assets/{stored.relative_to(tmp_path / 'assets').as_posix()}"
+    assert re.findall(r'src="([^"]+)"', localized) == [
+        link,
+        link,
+        link,
+        "/img/big.png",
+        "/img/missing.png",
+        "/img/not-an-image.png",
+        "data:image/png;base64,AAAA",
+    ]
+    assert "srcset" not in localized
+
+
+def test_clips_link_to_the_store_relative_to_where_they_are_saved(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    add_images(local_site)
+    for page in ("first", "second"):
+        local_site.add(f"/{page}", f'<html><body><h1>{page}</h1><p><img src="/img/a.png" alt="a"></p></body></html>')
+
+    with Clipper(grabbers=[PassThroughGrabber()], assets_dir="assets") as clipper:
+        results = list(
+            clipper.clip_many(
+                [local_site.url("/first"), local_site.url("/second")],
+                use_readability_js=False,
+                fallback_title="Untitled",
+                include_source=False,
+                include_title=False,
+                yaml_frontmatter=False,
+                output_formats=["md", "html"],
+                create_domain_subdir=True,
+                overwrite=False,
+            )
+        )
+
+    assert all(result.ok for result in results)
+    assert len([path for path in (tmp_path / "assets").rglob("*") if path.is_file()]) == 1
+    clips = sorted((tmp_path / urlparse(local_site.base_url).netloc).iterdir())
+    assert [clip.name for clip in clips] == ["first.html", "first.md", "second.html", "second.md"]
+    for clip in clips:
+        [link] = re.findall(r"\]\(([^)]+)\)" if clip.suffix == ".md" else r'src="([^"]+)"', clip.read_text())
+        assert link.startswith("../assets/")
+        assert (clip.parent / link).read_bytes() == PNG
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from clipit.clipper import Clipper
+from clipit.core.output_format import OutputFormat
+
+from tests.conftest import article_html
+
+
+@pytest.mark.asyncio
+async def test_aclip_runs_many_clips_concurrently_on_one_loop(local_site):
+    for n in range(20):
+        local_site.add(f"/article-{n}", article_html(f"Article {n}"))
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker_task = asyncio.create_task(ticker())
+    with Clipper() as clipper:
+        results = await asyncio.gather(
+            *(
+                clipper.aclip(
+                    local_site.url(f"/article-{n}"),
+                    use_readability_js=False,
+                    fallback_title="Untitled {date}",
+                    include_source=False,
+                    include_title=False,
+                    yaml_frontmatter=False,
+                    output_formats=["stdout.md"],
+                )
+                for n in range(20)
+            )
+        )
+    ticker_task.cancel()
+
+    assert [title for title, _ in results] == [f"Article {n}" for n in range(20)]
+    assert all("paragraph 0" in outputs[OutputFormat.STDOUT_MD] for _, outputs in results)
+    # The loop kept running other tasks while the clips were in flight
+    assert ticks > 1
@@ -0,0 +1,61 @@
+import json
+import zipfile
+
+import pytest
+from clipit.core.backends import ShardedFileBackend, create_backend
+from clipit.core.output_format import OutputFormat
+
+
+@pytest.mark.parametrize("name", ["zip", "tar", "sqlite"])
+def test_archive_backends_keep_clips_addressable_by_url_and_format(name, tmp_path):
+    archive = tmp_path / f"clips.{name}"
+
+    with create_backend(name, archive, batch_size=2) as backend:
+        for n in range(3):
+            backend.write(f"https://example.com/{n}", f"Post {n}", OutputFormat.MD, f"# Post {n}\n", overwrite=False)
+        backend.write("https://example.com/0", "Post 0", OutputFormat.READABLE_HTML, "<h1>Post 0</h1>", overwrite=False)
+        assert backend.read("https://example.com/2", OutputFormat.MD) == "# Post 2\n"
+
+    # Reopening the archive appends to it instead of starting over
+    with create_backend(name, archive) as backend:
+        assert backend.write("https://example.com/1", "Post 1", OutputFormat.MD, "changed", overwrite=False) is None
+        backend.write("https://example.com/2", "Post 2", OutputFormat.MD, "# Post 2, edited\n", overwrite=True)
+
+        assert backend.read("https://example.com/0", OutputFormat.MD) == "# Post 0\n"
+        assert backend.read("https://example.com/0", OutputFormat.READABLE_HTML) == "<h1>Post 0</h1>"
+        assert backend.read("https://example.com/1", OutputFormat.MD) == "# Post 1\n"
+        assert backend.read("https://example.com/2", OutputFormat.MD) == "# Post 2, edited\n"
+        assert backend.read("https://example.com/3", OutputFormat.MD) is None
+
+    if name == "zip":
+        # The overwritten output was dropped, not left next to the new one
+        with zipfile.ZipFile(archive) as zip_file:
+            names = zip_file.namelist()
+            assert len(names) == len(set(names)) == 4
+            assert zip_file.read(zip_file.NameToInfo[names[-1]]) == b"# Post 2, edited\n"
+
+
+@pytest.mark.parametrize("shard_by", ["hash", "date"])
+def test_sharded_backend_keeps_same_title_clips_apart_and_lists_them_in_a_manifest(shard_by, tmp_path):
+    urls = [f"https://example.com/{n}" for n in range(3)]
+
+    backend = ShardedFileBackend(directory=tmp_path, shard_by=shard_by)
+    for url in urls:
+        backend.write_parts(url, "Same title", OutputFormat.MD, ["# Same title\n", url], overwrite=False)
+    assert backend.write(urls[0], "Same title", OutputFormat.MD, "changed", overwrite=False) is None
+    backend.write(urls[1], "New title", OutputFormat.MD, "edited", overwrite=True)
+
+    files = sorted(path for path in tmp_path.rglob("*.md"))
+    assert len(files) == 3
+    # example.com/<2 hex digits>/ or example.com/<year>/<month>/<day>/
+    assert {len(path.relative_to(tmp_path / "example.com").parts) for path in files} == {2 if shard_by == "hash" else 4}
+    assert sum(path.name.startswith("New title-") for path in files) == 1
+
+    # A new backend finds the clips through the manifest, where the last line for a URL wins
+    manifest = [json.loads(line) for line in (tmp_path / "manifest.jsonl").read_text().splitlines()]
+    assert len(manifest) == 4
+    backend = ShardedFileBackend(directory=tmp_path, shard_by=shard_by)
+    assert backend.read(urls[0], OutputFormat.MD) == f"# Same title\n{urls[0]}"
+    assert backend.read(urls[1], OutputFormat.MD) == "edited"
+    assert backend.locate(urls[1], OutputFormat.MD) == tmp_path / manifest[-1]["path"]
+    assert backend.read(urls[2], OutputFormat.READABLE_HTML) is None
@@ -0,0 +1,57 @@
+from clipit.clipper import Clipper
+from clipit.core import StageConcurrency
+
+from tests.conftest import article_html
+
+
+def test_clip_many_saves_every_page_and_reports_failures(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for n in range(10):
+        local_site.add(f"/article-{n}", article_html(f"Article {n}"))
+    urls = [local_site.url(f"/article-{n}") for n in range(10)] + [local_site.url("/missing")]
+
+    results = list(
+        Clipper().clip_many(
+            urls,
+            use_readability_js=False,
+            fallback_title="Untitled {date}",
+            include_source=False,
+            include_title=False,
+            yaml_frontmatter=False,
+            output_formats=["md"],
+            create_domain_subdir=False,
+            overwrite=False,
+            concurrency=StageConcurrency(download=4, extract=2, convert=2, write=1, queue_size=2),
+        )
+    )
+
+    assert len(results) == 11
+    failures = [r for r in results if not r.ok]
+    assert [(r.url, r.failed_stage) for r in failures] == [(local_site.url("/missing"), "download")]
+    assert sorted(p.name for p in tmp_path.glob("*.md")) == sorted(f"Article {n}.md" for n in range(10))
+
+
+def test_clip_many_with_worker_processes_matches_in_process_output(local_site, tmp_path, monkeypatch):
+    for n in range(4):
+        local_site.add(f"/article-{n}", article_html(f"Article {n}"))
+    urls = [local_site.url(f"/article-{n}") for n in range(4)]
+    options = dict(
+        use_readability_js=False,
+        fallback_title="Untitled {date}",
+        include_source=True,
+        include_title=True,
+        yaml_frontmatter=False,
+        output_formats=["md", "html"],
+        create_domain_subdir=False,
+        overwrite=False,
+    )
+
+    for workers in (None, 2):
+        out_dir = tmp_path / f"workers-{workers}"
+        out_dir.mkdir()
+        monkeypatch.chdir(out_dir)
+        with Clipper(workers=workers) as clipper:
+            assert all(result.ok for result in clipper.clip_many(urls, **options))
+
+    for in_process in (tmp_path / "workers-None").iterdir():
+        assert in_process.read_text() == (tmp_path / "workers-2" / in_process.name).read_text()
@@ -0,0 +1,22 @@
+from benchmarks.suite import find_regressions, run_suite
+
+
+def test_suite_times_every_stage_of_pages_and_threads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = run_suite(["small.html", "reddit_small.json"], repeat=1, readability_js=False)
+
+    assert list(results["timings"]["small.html"]) == ["download", "extract", "convert", "post_process", "output"]
+    assert list(results["timings"]["reddit_small.json"]) == ["download", "extract", "post_process", "output"]
+    assert all(seconds > 0 for stages in results["timings"].values() for seconds in stages.values())
+    # Whatever the stages wrote went to a temporary directory
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_compare_only_flags_stages_slower_past_both_thresholds():
+    baseline = {"timings": {"small.html": {"extract": 0.100, "convert": 0.0001, "output": 0.010}}}
+    current = {"timings": {"small.html": {"extract": 0.150, "convert": 0.0003, "output": 0.011, "new": 1.0}}}
+
+    [regression] = find_regressions(baseline, current, threshold=0.2, min_delta=0.001)
+
+    assert (regression.document, regression.stage) == ("small.html", "extract")
+    assert round(regression.ratio, 2) == 1.5
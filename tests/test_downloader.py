@@ -0,0 +1,73 @@
+import codecs
+import os
+
+import pytest
+from clipit.core import ClipitError
+from clipit.core.downloader import download_html_content
+from clipit.core.http_cache import HttpCache
+from clipit.core.session import connection_stats, create_session
+
+
+def test_session_reuses_connections_per_host(local_site):
+    local_site.add("/page", "<html><body>Hello</body></html>")
+    session = create_session(pool_connections=2, pool_maxsize=2)
+
+    for _ in range(5):
+        assert (
+            download_html_content(local_site.url("/page"), "Clipit/test", session) == "<html><body>Hello</body></html>"
+        )
+
+    stats = connection_stats(session)
+    assert stats.requests == 5
+    assert stats.new_connections == 1
+    assert stats.reused_connections == 4
+    assert stats.hosts["127.0.0.1"].requests == 5
+    assert "gzip" in local_site.requests[0][1]["Accept-Encoding"]
+
+
+def test_cache_revalidates_and_skips_the_body_on_304(local_site, tmp_path):
+    local_site.add("/page", "<html><body>Cached</body></html>", headers={"ETag": '"v1"'})
+    session = create_session(cache=HttpCache(tmp_path))
+
+    assert download_html_content(local_site.url("/page"), "Clipit/test", session) == "<html><body>Cached</body></html>"
+    assert download_html_content(local_site.url("/page"), "Clipit/test", session) == "<html><body>Cached</body></html>"
+
+    assert "If-None-Match" not in local_site.requests[0][1]
+    assert local_site.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    # Room for two entries, with their metadata
+    cache = HttpCache(tmp_path, max_bytes=600)
+    keys = [cache.key(f"https://example.com/{n}", {}) for n in range(3)]
+
+    for n, key in enumerate(keys[:2]):
+        cache.store(key, f"https://example.com/{n}", etag='"x"', last_modified=None, content_type=None, body=b"a" * 100)
+    os.utime(tmp_path / keys[0][:2] / f"{keys[0]}.json", (0, 0))
+    cache.store(keys[2], "https://example.com/2", etag='"x"', last_modified=None, content_type=None, body=b"a" * 100)
+
+    assert cache.lookup(keys[0]) is None
+    assert cache.lookup(keys[1]) is not None
+    assert cache.lookup(keys[2]) is not None
+
+
+def test_download_detects_legacy_charsets(local_site):
+    html = '<html><head><meta charset="windows-1252"></head><body>Caf\xe9 – cr\xe8me</body></html>'
+    local_site.add("/meta", html.encode("cp1252"), headers={"Content-Type": "text/html"})
+    local_site.add("/header", html.encode("cp1252"), headers={"Content-Type": "text/html; charset=cp1252"})
+    local_site.add("/bom", codecs.BOM_UTF8 + "<p>Caf\xe9</p>".encode("utf-8"), headers={"Content-Type": "text/html"})
+
+    assert download_html_content(local_site.url("/meta"), None) == html
+    assert download_html_content(local_site.url("/header"), None) == html
+    assert download_html_content(local_site.url("/bom"), None) == "<p>Caf\xe9</p>"
+
+
+def test_download_rejects_oversized_and_non_html_responses(local_site):
+    local_site.add("/big", b"<p>" + b"a" * 10_000 + b"</p>")
+    local_site.add("/paper.pdf", b"%PDF-1.7", headers={"Content-Type": "application/pdf"})
+    session = create_session(max_download_bytes=1_000)
+
+    with pytest.raises(ClipitError, match="larger than 1000 bytes"):
+        download_html_content(local_site.url("/big"), None, session)
+    with pytest.raises(ClipitError, match="got application/pdf"):
+        download_html_content(local_site.url("/paper.pdf"), None, session)
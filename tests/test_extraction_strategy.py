@@ -0,0 +1,31 @@
+from clipit.core.extraction_strategy import ParsedPage, Strategy, StrategyMemory
+from readabilipy.extractors import extract_title
+
+from tests.conftest import article_html
+
+
+def test_classifier_tells_articles_from_pages_without_one():
+    assert ParsedPage(article_html("Long read", paragraphs=10)).is_probably_readable()
+    assert not ParsedPage(
+        "<html><body><nav><a href='/'>Home</a></nav><p>Short.</p></body></html>"
+    ).is_probably_readable()
+
+
+def test_title_matches_readabilipy():
+    html = (
+        '<html><head><title>Site | My Post</title><meta property="og:title" content="My Post"></head>'
+        '<body><header class="entry-header"><h1 class="entry-title">My Post</h1></header></body></html>'
+    )
+    assert ParsedPage(html).extract_title() == extract_title(html)
+
+
+def test_memory_prefers_python_for_hosts_where_readability_js_keeps_failing():
+    memory = StrategyMemory(min_misses=2)
+    assert memory.preferred("example.com") is None
+
+    memory.record("example.com", readability_js_found_content=False)
+    assert memory.preferred("example.com") == Strategy.READABILITY_JS
+
+    memory.record("example.com", readability_js_found_content=False)
+    assert memory.preferred("example.com") == Strategy.PYTHON
+    assert memory.preferred("other.com") is None
@@ -0,0 +1,172 @@
+import gzip
+import tracemalloc
+from datetime import datetime
+
+from clipit.clipper import Clipper
+from clipit.core.feeds import parse_feed
+
+from tests.conftest import article_html
+
+CLIP_OPTIONS = dict(
+    use_readability_js=False,
+    fallback_title="Untitled",
+    include_source=False,
+    include_title=True,
+    yaml_frontmatter=False,
+    output_formats=["md"],
+    create_domain_subdir=False,
+    overwrite=False,
+)
+XML = {"Content-Type": "application/xml"}
+
+
+def sitemap(*urls: tuple[str, str | None], tag: str = "urlset", entry: str = "url") -> str:
+    entries = "".join(
+        f"<{entry}><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</{entry}>"
+        for loc, lastmod in urls
+    )
+    return f'<?xml version="1.0"?><{tag} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</{tag}>'
+
+
+def clip_feeds(clipper, *urls, **options):
+    return sorted(
+        (result.url.rsplit("/", 1)[-1], result.ok) for result in clipper.clip_feeds(urls, **{**CLIP_OPTIONS, **options})
+    )
+
+
+def test_refreshing_a_sitemap_index_only_clips_new_and_updated_pages(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for page in ("a", "b", "c", "d"):
+        local_site.add(f"/{page}", article_html(page.upper()))
+    url = local_site.url
+    local_site.add(
+        "/sitemap.xml",
+        sitemap((url("/pages.xml"), "2025-01-01"), (url("/posts.xml.gz"), None), tag="sitemapindex", entry="sitemap"),
+        headers={**XML, "ETag": '"index-1"'},
+    )
+    local_site.add("/pages.xml", sitemap((url("/a"), "2025-01-01"), (url("/b"), None)), headers={**XML, "ETag": '"p1"'})
+    local_site.add(
+        "/posts.xml.gz",
+        gzip.compress(sitemap(("/c", None)).encode()),
+        headers={"Content-Type": "application/x-gzip", "ETag": '"g1"'},
+    )
+
+    with Clipper(feed_state_path=tmp_path / "feeds.sqlite") as clipper:
+        assert clip_feeds(clipper, url("/sitemap.xml")) == [("a", True), ("b", True), ("c", True)]
+
+        # Nothing changed, so one request for the index and one for the sitemap it has no lastmod for, both 304
+        local_site.requests.clear()
+        assert clip_feeds(clipper, url("/sitemap.xml")) == []
+        assert [path for path, _ in local_site.requests] == ["/sitemap.xml", "/posts.xml.gz"]
+
+        local_site.add(
+            "/sitemap.xml",
+            sitemap(
+                (url("/pages.xml"), "2025-02-01"), (url("/posts.xml.gz"), None), tag="sitemapindex", entry="sitemap"
+            ),
+            headers={**XML, "ETag": '"index-2"'},
+        )
+        local_site.add(
+            "/pages.xml",
+            sitemap((url("/a"), "2025-02-01"), (url("/b"), None), (url("/d"), None)),
+            headers={**XML, "ETag": '"p2"'},
+        )
+        local_site.add("/a", article_html("A", paragraphs=6))
+        local_site.requests.clear()
+        assert clip_feeds(clipper, url("/sitemap.xml")) == [("a", True), ("d", True)]
+
+    assert sorted(path for path, _ in local_site.requests) == [
+        "/a",
+        "/d",
+        "/pages.xml",
+        "/posts.xml.gz",
+        "/sitemap.xml",
+    ]
+    # Updated pages replace their earlier clip
+    assert "paragraph 5 of A" in (tmp_path / "A.md").read_text()
+
+
+def test_sitemaps_without_a_lastmod_are_refreshed_behind_an_unchanged_index(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for page in ("a", "b"):
+        local_site.add(f"/{page}", article_html(page.upper()))
+    url = local_site.url
+    local_site.add(
+        "/sitemap.xml",
+        sitemap((url("/posts.xml"), None), tag="sitemapindex", entry="sitemap"),
+        headers={**XML, "ETag": '"index"'},
+    )
+    local_site.add("/posts.xml", sitemap((url("/a"), None)), headers={**XML, "ETag": '"p1"'})
+
+    with Clipper(feed_state_path=tmp_path / "feeds.sqlite") as clipper:
+        assert clip_feeds(clipper, url("/sitemap.xml")) == [("a", True)]
+
+        local_site.add("/posts.xml", sitemap((url("/a"), None), (url("/b"), None)), headers={**XML, "ETag": '"p2"'})
+        local_site.requests.clear()
+        assert clip_feeds(clipper, url("/sitemap.xml")) == [("b", True)]
+
+    assert [(path, headers.get("If-None-Match")) for path, headers in local_site.requests] == [
+        ("/sitemap.xml", '"index"'),
+        ("/posts.xml", '"p1"'),
+        ("/b", None),
+    ]
+
+
+def test_feed_entries_that_failed_are_clipped_on_the_next_refresh(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/posts/new", article_html("New"))
+    local_site.add("/posts/old", article_html("Old"))
+    local_site.add(
+        "/rss.xml",
+        '<?xml version="1.0"?><rss version="2.0"><channel><title>Blog</title><image><url>/logo.png</url></image>'
+        "<item><link>/posts/new</link><pubDate>Mon, 03 Mar 2025 10:00:00 GMT</pubDate></item>"
+        "<item><link>/posts/broken</link><pubDate>Sun, 02 Mar 2025 10:00:00 GMT</pubDate></item>"
+        "<item><link>/posts/old</link><pubDate>Wed, 01 Jan 2020 10:00:00 GMT</pubDate></item>"
+        "</channel></rss>",
+        headers={"Content-Type": "application/rss+xml", "ETag": '"rss"'},
+    )
+    local_site.add(
+        "/atom.xml",
+        '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Blog</title>'
+        '<entry><link rel="alternate" href="/posts/new"/><updated>2025-03-03T10:00:00Z</updated></entry>'
+        "</feed>",
+        headers={"Content-Type": "application/atom+xml", "ETag": '"atom"'},
+    )
+
+    with Clipper(feed_state_path=tmp_path / "feeds.sqlite") as clipper:
+        since = datetime(2025, 1, 1)
+        # The Atom feed's entry is already in the RSS feed
+        assert clip_feeds(clipper, local_site.url("/rss.xml"), local_site.url("/atom.xml"), since=since) == [
+            ("broken", False),
+            ("new", True),
+        ]
+
+        local_site.add("/posts/broken", article_html("Fixed"))
+        local_site.requests.clear()
+        assert clip_feeds(clipper, local_site.url("/rss.xml"), local_site.url("/atom.xml"), since=since) == [
+            ("broken", True)
+        ]
+
+    # The RSS feed was downloaded again since it had a failure, the Atom one was not modified
+    assert sorted((path, headers.get("If-None-Match")) for path, headers in local_site.requests) == [
+        ("/atom.xml", '"atom"'),
+        ("/posts/broken", None),
+        ("/rss.xml", None),
+    ]
+
+
+def test_large_sitemaps_are_parsed_as_they_stream_in():
+    urls = [(f"https://example.com/page/{n}", "2025-01-01") for n in range(20_000)]
+    document = sitemap(*urls).encode()
+    chunks = (document[start : start + 16 * 1024] for start in range(0, len(document), 16 * 1024))
+
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in parse_feed(chunks, "https://example.com/sitemap.xml"))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == len(urls)
+    # About a chunk's worth of entries at a time, however long the sitemap
+    assert peak < len(document) / 4
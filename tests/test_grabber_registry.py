@@ -0,0 +1,79 @@
+import sys
+
+import pytest
+from clipit.grabbers import BaseGrabber, GrabberRegistry, RedditGrabber, create_registry
+
+PLUGIN = """
+from clipit.grabbers import BaseGrabber
+
+
+class ExampleGrabber(BaseGrabber):
+    def __init__(self, greeting="hello"):
+        self.greeting = greeting
+
+    def can_handle(self, url):
+        return "/skip" not in url
+"""
+
+SPEC = """
+from clipit.grabbers import GrabberSpec
+
+EXAMPLE = GrabberSpec(hosts=(".example.com",), grabber="example_plugin.grabber:ExampleGrabber")
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    """An installed plugin, with its spec and its grabber in separate modules."""
+    package = tmp_path / "example_plugin"
+    package.mkdir()
+    (package / "__init__.py").write_text(SPEC)
+    (package / "grabber.py").write_text(PLUGIN)
+    dist_info = tmp_path / "example_plugin-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: example-plugin\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text("[clipit.grabbers]\nexample = example_plugin:EXAMPLE\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for module in ("example_plugin", "example_plugin.grabber"):
+        sys.modules.pop(module, None)
+
+
+def test_plugins_are_only_imported_when_a_url_for_them_comes_along(plugin):
+    registry = create_registry()
+    registry.configure("example", greeting="hi")
+
+    assert isinstance(registry.find("https://elsewhere.org/page"), BaseGrabber)
+    assert "example_plugin.grabber" not in sys.modules
+    assert registry.loaded() == []
+
+    grabber = registry.find("https://blog.example.com/post")
+    assert type(grabber).__name__ == "ExampleGrabber"
+    assert grabber.greeting == "hi"
+    assert registry.find("https://EXAMPLE.com./other") is grabber
+    # The grabber still gets to turn URLs down
+    assert registry.find("https://example.com/skip") is registry.fallback
+    assert registry.loaded() == ["example"]
+
+
+def test_exact_hosts_win_over_domains_and_closer_domains_over_farther_ones():
+    registry = GrabberRegistry()
+    everything, blog, www = BaseGrabber(), BaseGrabber(), BaseGrabber()
+    registry.register("everything", [".example.com"], everything)
+    registry.register("blog", [".blog.example.com"], blog)
+    registry.register("www", ["www.blog.example.com"], www)
+
+    assert registry.find("https://example.com") is everything
+    assert registry.find("https://a.b.example.com") is everything
+    assert registry.find("https://blog.example.com") is blog
+    assert registry.find("https://old.blog.example.com") is blog
+    assert registry.find("https://www.blog.example.com") is www
+    assert registry.find("https://notexample.com") is registry.fallback
+
+
+def test_reddit_urls_go_to_the_reddit_grabber():
+    registry = create_registry(load_entry_points=False)
+
+    assert isinstance(registry.find("https://www.reddit.com/r/python/comments/abc/title/"), RedditGrabber)
+    assert isinstance(registry.find("https://old.reddit.com/r/python/"), RedditGrabber)
+    assert not isinstance(registry.find("https://example.com/reddit.com"), RedditGrabber)
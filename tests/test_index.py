@@ -0,0 +1,70 @@
+from clipit.clipper import Clipper
+from clipit.core.index import ClipIndex, canonical_url
+
+from tests.conftest import article_html
+
+
+def test_index_knows_canonical_urls_and_searches_content(tmp_path):
+    html = '<html><head><link rel="canonical" href="/posts/lxml"></head><body></body></html>'
+    canonical = canonical_url("https://Example.com/p?id=1&utm_source=feed#top", html)
+    assert canonical == "https://example.com/posts/lxml"
+
+    index = ClipIndex(tmp_path / "index.sqlite")
+    index.record("https://example.com/p?id=1", canonical, "Parsing with lxml", "Trees, xpaths and etree", ["a.md"])
+    index.close()
+
+    # Everything survives a reopen
+    index = ClipIndex(tmp_path / "index.sqlite")
+    assert index.contains("https://example.com/p?id=1")
+    assert index.contains("https://example.com/posts/lxml/")
+    assert not index.contains("https://example.com/other")
+
+    [result] = index.search("xpath*")
+    assert (result.url, result.title, result.output_paths) == (
+        "https://example.com/p?id=1",
+        "Parsing with lxml",
+        ["a.md"],
+    )
+    assert "[xpaths]" in result.snippet
+    assert index.search("readability") == []
+
+    # Clipping a URL again replaces its text
+    index.record("https://example.com/p?id=1", canonical, "Parsing with lxml", "Readability and etree", ["b.md"])
+    assert index.search("xpath*") == []
+    [result] = index.search("readability")
+    assert result.output_paths == ["b.md"]
+    index.close()
+
+
+def test_clip_many_skips_urls_already_in_the_index(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/first", article_html("First"))
+    local_site.add("/second", article_html("Second"))
+    # Same article as /first under another URL, only its canonical link gives it away
+    local_site.add(
+        "/first-again", article_html("First").replace("<head>", '<head><link rel="canonical" href="/first">')
+    )
+    options = dict(
+        use_readability_js=False,
+        fallback_title="Untitled {date}",
+        include_source=False,
+        include_title=False,
+        yaml_frontmatter=False,
+        output_formats=["md"],
+        create_domain_subdir=False,
+        overwrite=False,
+    )
+
+    with Clipper(index_path=tmp_path / "index.sqlite") as clipper:
+        assert all(
+            result.ok and not result.skipped for result in clipper.clip_many([local_site.url("/first")], **options)
+        )
+
+        urls = [local_site.url(path) for path in ("/first", "/first-again", "/second")]
+        results = {result.url: result for result in clipper.clip_many(urls, **options)}
+
+    assert {url for url, result in results.items() if result.skipped} == set(urls[:2])
+    assert results[urls[2]].ok and not results[urls[2]].skipped
+    # /first was skipped before it was downloaded again
+    assert [path for path, _ in local_site.requests].count("/first") == 1
+    assert sorted(p.name for p in tmp_path.glob("*.md")) == ["First.md", "Second.md"]
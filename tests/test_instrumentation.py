@@ -0,0 +1,71 @@
+import pstats
+
+from click.testing import CliRunner
+from clipit.cli import main
+from clipit.clipper import Clipper
+from clipit.core.instrumentation import StageEvent
+
+from tests.conftest import article_html
+
+
+def test_every_stage_of_a_clip_reaches_the_metrics_sinks(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/article", article_html("Article"))
+    url = local_site.url("/article")
+    events: list[StageEvent] = []
+
+    with Clipper(metrics=[events.append]) as clipper:
+        clipper.clip_and_save(
+            url,
+            use_readability_js=False,
+            fallback_title="Untitled {date}",
+            include_source=False,
+            include_title=True,
+            yaml_frontmatter=False,
+            output_formats=["md"],
+            create_domain_subdir=False,
+            overwrite=False,
+        )
+
+    # Nested stages finish first
+    assert [event.stage for event in events] == [
+        "download",
+        "extract.python",
+        "extract",
+        "convert.emit",
+        "convert.post_process",
+        "convert",
+        "write",
+    ]
+    assert all(event.url == url and event.ok and event.seconds > 0 for event in events)
+    sizes = {event.stage: event.bytes for event in events}
+    assert sizes["download"] == len(article_html("Article").encode())
+    assert sizes["write"] == sizes["convert"] == (tmp_path / "Article.md").stat().st_size
+
+
+def test_profile_prints_the_stage_breakdown_and_saves_stats(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for n in range(3):
+        local_site.add(f"/article-{n}", article_html(f"Article {n}"))
+    (tmp_path / "urls.txt").write_text("\n".join(local_site.url(f"/article-{n}") for n in range(3)))
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "--input",
+            "urls.txt",
+            "--no-use-readability-js",
+            "--no-create-domain-subdir",
+            "--no-cache",
+            "--profile-stats",
+            "clipit.prof",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    breakdown = {line.split()[0]: line.split()[1] for line in result.stderr.splitlines()[1:] if line.startswith(" ")}
+    assert breakdown == {"python": "3", "emit": "3", "post_process": "3"}
+    assert "write" in result.stderr
+    # The extraction ran on the pipeline's threads, and still made it into the stats
+    functions = {function for _, _, function in pstats.Stats("clipit.prof").stats}
+    assert "extract_readable_content_and_title" in functions
@@ -0,0 +1,69 @@
+import re
+import tracemalloc
+
+from clipit.clipper import Clipper
+
+from tests.conftest import article_html
+
+FORMATS = ["md", "html", "raw.html"]
+
+# Measured at ~23 times the page after extraction in low memory mode, nearly all of it the Markdown conversion's
+# tree, against ~35 times in normal mode, where the extraction's trees are still waiting to be garbage collected
+PEAK_BUDGET = 25
+
+
+def clip(clipper, url, directory, monkeypatch):
+    directory.mkdir()
+    monkeypatch.chdir(directory)
+    clipper.clip_and_save(
+        url,
+        use_readability_js=False,
+        fallback_title="Untitled",
+        include_source=True,
+        include_title=True,
+        yaml_frontmatter=True,
+        output_formats=FORMATS,
+        create_domain_subdir=False,
+        overwrite=False,
+    )
+    return {path.name: re.sub(r"\ndate: .*\n", "\n", path.read_text()) for path in directory.iterdir()}
+
+
+def clip_after_extraction_peak(clipper, url, directory, monkeypatch):
+    """The outputs of a clip, and the peak memory of the stages after extraction, which low_memory is about."""
+    extract = Clipper._extract
+
+    def extract_then_reset_peak(self, job):
+        job = extract(self, job)
+        tracemalloc.reset_peak()
+        return job
+
+    monkeypatch.setattr(Clipper, "_extract", extract_then_reset_peak)
+    tracemalloc.start()
+    try:
+        outputs = clip(clipper, url, directory, monkeypatch)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        monkeypatch.setattr(Clipper, "_extract", extract)
+    return outputs, peak
+
+
+def test_low_memory_saves_the_same_outputs_with_less_memory(local_site, tmp_path, monkeypatch):
+    page = article_html("Huge", paragraphs=400)
+    local_site.add("/huge", page)
+    url = local_site.url("/huge")
+
+    with Clipper(cache_dir=None) as clipper:
+        # Imports everything clipping needs, so it doesn't count in either measurement
+        clip(clipper, url, tmp_path / "warmup", monkeypatch)
+        expected, normal_peak = clip_after_extraction_peak(clipper, url, tmp_path / "normal", monkeypatch)
+
+    with Clipper(cache_dir=None, low_memory=True) as clipper:
+        outputs, low_peak = clip_after_extraction_peak(clipper, url, tmp_path / "low", monkeypatch)
+
+    assert sorted(outputs) == ["Huge.html", "Huge.md", "Huge.raw.html"]
+    assert outputs == expected
+    assert outputs["Huge.md"].startswith("---\ntitle: Huge\n")
+    assert low_peak < PEAK_BUDGET * len(page)
+    assert low_peak < normal_peak
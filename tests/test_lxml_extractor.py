@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from clipit.clipper import Clipper
+from clipit.core import OutputFormat
+from clipit.core.extractor import extract_readable_content_and_title
+from clipit.core.misc import ClipitError
+
+from benchmarks import extraction_engines
+
+PAGE = """<html><head><title>Post | Blog</title><meta property="og:title" content="A real post">
+<script>var tracking = true;</script></head><body>
+<header class="site-header"><a href="/">Home</a><nav><a href="/about">About</a></nav></header>
+<div id="sidebar"><ul><li><a href="/popular/1">Popular post</a></li></ul></div>
+<div class="main"><div class="post-content">
+<h1>A real post</h1>
+<p>The first paragraph, with commas, and more than enough words in it to be scored as the article's content.</p>
+<div class="share-tools"><a href="/share/tw">Twitter</a> <a href="/share/fb">Facebook</a></div>
+<p>The second paragraph is <a href="https://example.com/a" class="ext" onclick="track()">long enough</a> too.</p>
+<!-- an ad used to be here --><img src="/chart.png" alt="A chart" class="wide" loading="lazy">
+</div>
+<div id="comments"><p>Great post, thank you so much for writing it, I learned a lot from reading it today.</p></div>
+</div><footer><p>Copyright Example Inc.</p></footer></body></html>"""
+
+
+def test_lxml_engine_keeps_the_article_and_drops_the_boilerplate():
+    content_html, title = extract_readable_content_and_title(PAGE, use_readability_js=True, engine="lxml")
+
+    assert title == "A real post"
+    assert content_html.startswith("<div>") and content_html.endswith("</div>")
+    assert "first paragraph, with commas" in content_html
+    assert '<a href="https://example.com/a">long enough</a>' in content_html
+    assert '<img src="/chart.png" alt="A chart">' in content_html
+    for boilerplate in ("Home", "About", "Popular post", "Twitter", "Great post", "Copyright", "tracking", "an ad"):
+        assert boilerplate not in content_html
+
+
+def test_clipper_extracts_with_the_engine_it_was_given(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/post", PAGE)
+
+    with Clipper(cache_dir=None, engine="lxml") as clipper:
+        clipper.clip_and_save(
+            local_site.url("/post"),
+            use_readability_js=False,
+            fallback_title="Untitled",
+            include_source=False,
+            include_title=False,
+            yaml_frontmatter=False,
+            output_formats=["md"],
+            create_domain_subdir=False,
+            overwrite=True,
+        )
+        _, outputs = asyncio.run(
+            clipper.aclip(
+                local_site.url("/post"),
+                use_readability_js=False,
+                fallback_title="Untitled",
+                include_source=False,
+                include_title=False,
+                yaml_frontmatter=False,
+                output_formats=["stdout.md"],
+            )
+        )
+
+    markdown = (tmp_path / "A real post.md").read_text()
+    assert "[long enough](https://example.com/a)" in markdown
+    assert "Great post" not in markdown
+    # The async methods extract on other threads, with the same engine
+    assert outputs[OutputFormat.STDOUT_MD] == markdown
+
+
+def test_lxml_engine_is_faster_than_readabilipy_and_at_least_as_accurate_on_the_corpus():
+    results = extraction_engines.compare_engines(
+        ["blog_post.html", "deep_nesting.html"], repeat=1, engines=["lxml", "readabilipy"]
+    )
+
+    for document, by_engine in results.items():
+        lxml, readabilipy = by_engine["lxml"], by_engine["readabilipy"]
+        assert lxml["title"] == readabilipy["title"], document
+        assert lxml["f1"] >= readabilipy["f1"], document
+        assert lxml["recall"] > 0.95, document
+        assert lxml["seconds"] < readabilipy["seconds"], document
+
+
+def test_lxml_engine_keeps_the_content_of_a_page_wrapped_in_a_form():
+    page = PAGE.replace("<body>", '<body><form id="aspnetForm" action="/post">').replace(
+        "</body>", '<form class="search"><input name="q"><button>Search</button></form></form></body>'
+    )
+
+    content_html, _ = extract_readable_content_and_title(page, use_readability_js=False, engine="lxml")
+
+    assert "first paragraph, with commas" in content_html
+    assert "<form" not in content_html and "Search" not in content_html
+
+
+def test_lxml_engine_raises_when_nothing_is_readable():
+    page = "<html><body><nav><a href='/'>Home</a></nav><form><input name='q'></form></body></html>"
+
+    with pytest.raises(ClipitError, match="No content found"):
+        extract_readable_content_and_title(page, use_readability_js=False, engine="lxml")
+
+
+def test_lxml_engine_keeps_a_page_that_is_all_links():
+    cards = "".join(f'<div class="card"><a href="/item/{i}">Item {i}</a></div>' for i in range(20))
+    page = f"<html><head><title>Links</title></head><body><nav><a href='/'>Home</a></nav>{cards}</body></html>"
+
+    content_html, title = extract_readable_content_and_title(page, use_readability_js=False, engine="lxml")
+
+    assert title == "Links"
+    assert '<a href="/item/0">Item 0</a>' in content_html and "Item 19" in content_html
+    assert "Home" not in content_html
+
+
+def test_engine_comparison_records_failed_extractions(monkeypatch):
+    def extract(page_html, use_readability_js, engine):
+        if engine == "lxml":
+            raise ClipitError("Error processing HTML content: No content found")
+        return "<div><p>Some text</p></div>", "Title"
+
+    monkeypatch.setattr(extraction_engines, "extract_readable_content_and_title", extract)
+    results = extraction_engines.compare_engines(["blog_post.html"], repeat=1, engines=["lxml", "readabilipy"])
+
+    assert results["blog_post.html"]["lxml"] == {
+        "failed": "Error processing HTML content: No content found",
+        "precision": 0.0,
+        "recall": 0.0,
+        "f1": 0.0,
+    }
+    assert results["blog_post.html"]["readabilipy"]["title"] == "Title"
@@ -0,0 +1,60 @@
+import pytest
+from bs4 import BeautifulSoup
+from clipit.core.markdown_converter import convert_to_markdown
+from clipit.core.markdown_emitter import emit_markdown
+
+from tests.conftest import article_html
+
+CORPUS = [
+    "<p>Plain text</p>",
+    "<strong>Bold Text</strong> and <i>Italic Text</i>",
+    '<h2>TITLE (<a href="https://example.com">Link</a>)</h2>',
+    "<h1>Title</h1><h3>Sub <em>title</em></h3><p>Text</p>",
+    "<p>Line one<br>line two</p><p>Another   paragraph\nwrapped   over lines</p>",
+    "<p>Stars * and _underscores_, 100% of them, a+b=c</p>",
+    "<p>snake_case and 2*3*4 and **not bold**</p>",
+    "<p><b>bold</b> text <i>italic</i> text</p>",
+    "<p>Use <code>print(`x`)</code> and <kbd>Ctrl</kbd>+<kbd>C</kbd></p>",
+    '<p><a href="https://example.com/ü">unicode</a> <a href="/path" title="A &quot;title&quot;">titled</a></p>',
+    '<p><a href="https://example.com">https://example.com</a> and <a href="mailto:a@b.c">a@b.c</a></p>',
+    '<p><a href="#">empty</a> <a>no href</a></p>',
+    '<p><img src="a.png" alt="An image" title="Title"> <img src="b.png"></p>',
+    "<hr><p>After a rule</p><hr>",
+    "<pre>def f():\n    return `x`\n\n\nf()</pre>",
+    '<pre><code class="language-python">print("hi")</code></pre><p>After</p>',
+    "<blockquote><p>Quoted</p><p>Twice</p></blockquote>",
+    "<blockquote><blockquote>Nested</blockquote></blockquote>",
+    "<ul><li>One</li><li>Two</li><li>Three</li></ul>",
+    "<ul><li><p>Loose</p><p>item</p></li><li>Other</li></ul><p>After the list</p>",
+    '<ol><li>First</li><li>Second</li></ol><p>Between</p><ol start="7"><li>Seventh</li><li>Eighth</li></ol>',
+    "<ul><li>Outer<ul><li>Inner<ol><li>Innermost</li></ol></li></ul></li><li>Back out</li></ul>",
+    "<ul><li>Item</li></ul><ol><li>Other kind</li></ol>",
+    "<div><section><p>Wrapped in</p></section><article>containers</article></div>",
+    "<p>Ünïcödé — “quotes” and emoji 🎉</p>",
+    article_html("An Article", paragraphs=20),
+]
+
+
+@pytest.mark.parametrize("html", CORPUS)
+def test_single_pass_matches_mdformat(html):
+    markdown = emit_markdown(BeautifulSoup(html, "html.parser"))
+
+    assert markdown is not None
+    assert markdown == convert_to_markdown(html, single_pass=False)
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "<table><tr><td>Tables</td></tr></table>",
+        "<p><b><b>Nested bold</b></b></p>",
+        "<ul><li><h2>Heading in a list</h2></li></ul>",
+        "<p># not a heading</p><p>1. not a list</p><p>- nor this</p><p>&gt; nor a quote</p>",
+        "<p><b>bold</b>text<i>italic</i>text</p>",
+        '<p><a href="https://example.com/a b">spaces</a> <a href="/path_(x)">parens</a></p>',
+        '<ol><li>First</li></ol><ol start="7"><li>Seventh</li></ol>',
+    ],
+)
+def test_unsupported_markup_falls_back_to_mdformat(html):
+    assert emit_markdown(BeautifulSoup(html, "html.parser")) is None
+    assert convert_to_markdown(html) == convert_to_markdown(html, single_pass=False)
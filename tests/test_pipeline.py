@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pytest
+from clipit.core.pipeline import Stage, StageFailure, run_pipeline
+
+
+def test_error_from_the_items_is_raised_after_the_items_in_flight():
+    def items():
+        yield from range(3)
+        raise RuntimeError("listing page failed")
+
+    def double(item):
+        if item == 1:
+            raise ValueError("bad item")
+        return item * 2
+
+    results = []
+    with pytest.raises(RuntimeError, match="listing page failed"):
+        for result in run_pipeline(items(), [Stage("double", double, concurrency=2)], queue_size=2):
+            results.append(result)
+
+    assert sorted(result for result in results if not isinstance(result, StageFailure)) == [0, 4]
+    [failure] = [result for result in results if isinstance(result, StageFailure)]
+    assert (failure.item, failure.stage) == (1, "double")
+
+
+def test_workers_stop_when_the_consumer_stops_early():
+    before = set(threading.enumerate())
+
+    def pipeline_threads():
+        return [thread for thread in threading.enumerate() if thread not in before]
+
+    results = run_pipeline(range(100), [Stage("same", lambda item: item, concurrency=3)], queue_size=1)
+    next(results)
+    results.close()
+
+    deadline = time.monotonic() + 5
+    while pipeline_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert pipeline_threads() == []
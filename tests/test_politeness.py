@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from click.testing import CliRunner
+from clipit.cli import main
+from clipit.core import ClipitError, PolitenessPolicy
+from clipit.core.downloader import download_html_content
+from clipit.core.session import create_session
+
+PAGE = "<html><body>Hello</body></html>"
+
+
+def test_retries_back_off_and_wait_as_long_as_retry_after_asks(local_site):
+    local_site.add_sequence("/busy", [(503, {}), (502, {})], then=PAGE)
+    local_site.add_sequence("/limited", [(429, {"Retry-After": "1"})], then=PAGE)
+    session = create_session(politeness=PolitenessPolicy(retries=4, backoff_factor=0.01))
+
+    assert download_html_content(local_site.url("/busy"), None, session) == PAGE
+    start = time.monotonic()
+    assert download_html_content(local_site.url("/limited"), None, session) == PAGE
+    assert time.monotonic() - start >= 1
+
+    assert [path for path, _ in local_site.requests] == ["/busy"] * 3 + ["/limited"] * 2
+
+
+def test_gives_up_after_the_retries_or_when_asked_to_wait_too_long(local_site):
+    local_site.add_sequence("/down", [(503, {})] * 3, then=PAGE)
+    local_site.add_sequence("/closed", [(429, {"Retry-After": "3600"})], then=PAGE)
+    session = create_session(politeness=PolitenessPolicy(retries=2, backoff_factor=0.01, max_retry_after=10))
+
+    with pytest.raises(ClipitError, match="503"):
+        download_html_content(local_site.url("/down"), None, session)
+    start = time.monotonic()
+    with pytest.raises(ClipitError, match="429"):
+        download_html_content(local_site.url("/closed"), None, session)
+    assert time.monotonic() - start < 1
+
+
+def test_requests_to_a_host_are_rate_limited(local_site):
+    local_site.add("/page", PAGE)
+    session = create_session(politeness=PolitenessPolicy(requests_per_second=20, burst=2))
+
+    start = time.monotonic()
+    for _ in range(6):
+        download_html_content(local_site.url("/page"), None, session)
+
+    # The first 2 go out right away, the next 4 every 50ms
+    assert time.monotonic() - start >= 0.19
+
+
+def test_retries_wait_for_their_turn_too(local_site):
+    local_site.add_sequence("/busy", [(503, {})] * 2, then=PAGE)
+    session = create_session(politeness=PolitenessPolicy(requests_per_second=5, burst=1, retries=2, backoff_factor=0))
+
+    start = time.monotonic()
+    assert download_html_content(local_site.url("/busy"), None, session) == PAGE
+
+    # No backoff, but the 2 retries still go out 200ms apart
+    assert time.monotonic() - start >= 0.39
+    assert [path for path, _ in local_site.requests] == ["/busy"] * 3
+
+
+def test_robots_txt_is_fetched_once_and_honored(local_site):
+    local_site.add("/robots.txt", "User-agent: *\nDisallow: /private\n", headers={"Content-Type": "text/plain"})
+    local_site.add("/public", PAGE)
+    local_site.add("/private/page", PAGE)
+    session = create_session(politeness=PolitenessPolicy(respect_robots_txt=True))
+
+    for _ in range(3):
+        assert download_html_content(local_site.url("/public"), "Clipit/test", session) == PAGE
+    with pytest.raises(ClipitError, match="disallowed by"):
+        download_html_content(local_site.url("/private/page"), "Clipit/test", session)
+
+    assert [path for path, _ in local_site.requests] == ["/robots.txt"] + ["/public"] * 3
+
+
+def test_cli_retries_a_single_url_only_when_asked(local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add_sequence("/down", [(503, {})] * 10, then=PAGE)
+    args = ["--no-use-readability-js", "--no-cache", "--no-server", local_site.url("/down")]
+
+    # Batches (--input, --feed, listings) are retried by default, a single URL fails on the first error
+    assert CliRunner().invoke(main, args).exit_code != 0
+    assert [path for path, _ in local_site.requests] == ["/down"]
+
+    local_site.requests.clear()
+    assert CliRunner().invoke(main, ["--retries", "1", *args]).exit_code != 0
+    assert [path for path, _ in local_site.requests] == ["/down"] * 2
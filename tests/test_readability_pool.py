@@ -0,0 +1,54 @@
+import os
+
+import pytest
+from clipit.core import readability_pool
+from clipit.core.readability_pool import _JS_DIR, ReadabilityWorkerPool
+from readabilipy import simple_json_from_html_string
+
+from tests.conftest import article_html
+
+needs_readability_js = pytest.mark.skipif(
+    not os.path.exists(os.path.join(_JS_DIR, "node_modules")),
+    reason="Readability.js isn't installed for readabilipy",
+)
+
+
+@needs_readability_js
+def test_pool_output_matches_readabilipy():
+    html = article_html("Pooled", paragraphs=20)
+    pool = ReadabilityWorkerPool(size=1)
+    try:
+        article = pool.parse(html)
+    finally:
+        pool.close()
+
+    expected = simple_json_from_html_string(html, use_readability=True)
+    assert article["content"] == expected["content"]
+    assert article["title"] == expected["title"]
+
+
+@needs_readability_js
+def test_pool_restarts_workers_after_max_jobs_and_crashes():
+    pool = ReadabilityWorkerPool(size=1, max_jobs_per_worker=2)
+    try:
+        first = pool._checkout()
+        pool._checkin(first)
+        pool.parse(article_html("One"))
+        pool.parse(article_html("Two"))
+        assert not first.is_alive()
+
+        second = pool._checkout()
+        second._process.kill()
+        second._process.wait()
+        pool._checkin(second)
+        assert pool.parse(article_html("Three"))["title"] == "Three"
+    finally:
+        pool.close()
+
+
+def test_missing_node_is_a_warning(monkeypatch):
+    monkeypatch.setattr(readability_pool, "_node_available", None)
+    monkeypatch.setattr("readabilipy.simple_json.have_node", lambda: False)
+
+    with pytest.warns(UserWarning, match="node executable not found"):
+        assert readability_pool.get_readability_pool() is None
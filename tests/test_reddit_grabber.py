@@ -0,0 +1,121 @@
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from clipit.core import RenderFlags
+from clipit.grabbers import RedditGrabber
+
+JSON_HEADERS = {"Content-Type": "application/json; charset=UTF-8"}
+
+
+def comment(id: str, parent_id: str, score: int, replies: list[dict] | None = None) -> dict:
+    return {
+        "kind": "t1",
+        "data": {
+            "id": id,
+            "name": f"t1_{id}",
+            "parent_id": parent_id,
+            "author": f"user_{id}",
+            "score": score,
+            "body": f"Comment {id}",
+            "replies": {"kind": "Listing", "data": {"children": replies}} if replies else "",
+        },
+    }
+
+
+def more(parent_id: str, children: list[str]) -> dict:
+    return {"kind": "more", "data": {"parent_id": parent_id, "count": len(children), "children": children}}
+
+
+def thread(comments: list[dict]) -> list[dict]:
+    post = {"kind": "t3", "data": {"id": "abc", "name": "t3_abc", "author": "op", "score": 42, "selftext": "Post"}}
+    return [{"data": {"children": [post]}}, {"data": {"children": comments}}]
+
+
+def add_morechildren(local_site, ids: list[str], things: list[dict]):
+    query = urlencode({"api_type": "json", "link_id": "t3_abc", "children": ",".join(ids), "limit_children": "false"})
+    local_site.add(
+        f"/api/morechildren.json?{query}", json.dumps({"json": {"data": {"things": things}}}), headers=JSON_HEADERS
+    )
+
+
+def test_more_comments_are_expanded_within_the_request_budget(local_site):
+    local_site.add(
+        "/r/test/comments/abc/title.json",
+        json.dumps(thread([comment("c1", "t3_abc", 5, [more("t1_c1", ["c3"])]), more("t3_abc", ["c2"])])),
+        headers=JSON_HEADERS,
+    )
+    add_morechildren(local_site, ["c2"], [comment("c2", "t3_abc", 10), comment("c4", "t1_c2", 1)])
+    add_morechildren(local_site, ["c3"], [comment("c3", "t1_c1", 3), more("t1_c3", ["c5", "c6"])])
+
+    grabber = RedditGrabber(max_more_requests=2)
+    json_content = grabber.download(local_site.url("/r/test/comments/abc/title/"), None)
+    markdown, title = grabber.extract(json_content, False, "Untitled")
+
+    assert markdown == (
+        "**op** [42 score]:\n> Post\n\n"
+        "## Comments\n\n"
+        "- **user_c2** [10 score]:\n    Comment c2\n\n"
+        "    - **user_c4** [1 score]:\n        Comment c4\n\n"
+        "- **user_c1** [5 score]:\n    Comment c1\n\n"
+        "    - **user_c3** [3 score]:\n        Comment c3\n\n"
+        "        - *2 more comments not loaded*\n\n"
+    )
+    # The thread itself, then both stubs at once, and the budget was spent before the one they revealed
+    assert len(local_site.requests) == 3
+
+    post_processed = grabber.convert("https://www.reddit.com/r/test", title, markdown, RenderFlags(False, False, False))
+    assert "user_c4" in post_processed
+
+
+def test_deep_threads_render_without_recursion():
+    depth = 2000
+    deepest = comment(f"c{depth}", f"t1_c{depth - 1}", 1)
+    for n in range(depth - 1, 0, -1):
+        deepest = comment(f"c{n}", f"t1_c{n - 1}", 1, [deepest])
+
+    # Deeper than json.dumps would even go, so straight to the renderer
+    markdown = RedditGrabber()._reddit_json_to_markdown(thread([deepest]))
+
+    assert markdown.count("- **user_c") == depth
+
+
+def listing(posts: list[tuple[str, int]], after: str | None) -> str:
+    children = [
+        {
+            "kind": "t3",
+            "data": {"name": f"t3_{id}", "permalink": f"/r/test/comments/{id}/title/", "created_utc": created},
+        }
+        for id, created in posts
+    ]
+    # User pages and some listings mix comments in
+    children.append({"kind": "t1", "data": {"name": "t1_x", "permalink": "/r/test/comments/p1/title/x/"}})
+    return json.dumps({"kind": "Listing", "data": {"children": children, "after": after}})
+
+
+def test_listings_follow_the_after_cursor_until_a_limit(local_site):
+    local_site.add(
+        "/r/test/new.json?limit=100", listing([("p1", 500), ("p2", 400), ("p3", 300)], "t3_p3"), headers=JSON_HEADERS
+    )
+    # The listing moved while we were reading it, p3 shows up again
+    local_site.add(
+        "/r/test/new.json?limit=100&after=t3_p3",
+        listing([("p3", 300), ("p4", 200), ("p5", 100)], "t3_p5"),
+        headers=JSON_HEADERS,
+    )
+    grabber = RedditGrabber()
+    url = local_site.url("/r/test/new/")
+    assert grabber.is_listing("https://www.reddit.com/r/test/new/")
+    assert not grabber.is_listing("https://www.reddit.com/r/test/comments/p1/title/")
+
+    # Newest first, so the first post that's too old ends the crawl
+    since = datetime.fromtimestamp(250)
+    assert list(grabber.list_urls(url, None, since=since)) == [
+        local_site.url(f"/r/test/comments/{id}/title/") for id in ("p1", "p2", "p3")
+    ]
+    assert len(local_site.requests) == 2
+
+    # Only the pages needed for max_urls are downloaded
+    local_site.requests.clear()
+    assert len(list(grabber.list_urls(url, None, max_urls=2))) == 2
+    assert [path for path, _ in local_site.requests] == ["/r/test/new.json?limit=100"]
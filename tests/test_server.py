@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+from clipit import ClipitError
+from clipit.cli import main
+from clipit.clipper import Clipper
+from clipit.server import ClipServer, ServerInfo, default_server_file, read_server_info, send_job
+
+from tests.conftest import article_html
+
+
+@pytest.fixture
+def clip_server(tmp_path, monkeypatch):
+    # Where default_server_file() looks, so the CLI finds this server and no other
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    with Clipper(user_agent="Server/1.0", cache_dir=None) as clipper:
+        server = ClipServer(clipper, max_jobs=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        # Advertised once it's serving
+        while read_server_info() is None:
+            pass
+        yield server
+        server.shutdown()
+        thread.join(timeout=10)
+
+
+def job(url, directory, **options):
+    return {"url": url, "directory": str(directory), "use_readability_js": False, **options}
+
+
+def test_jobs_are_clipped_concurrently_into_their_own_directories(clip_server, local_site, tmp_path):
+    for n in range(4):
+        local_site.add(f"/article-{n}", article_html(f"Article {n}"))
+        (tmp_path / f"out-{n}").mkdir()
+    info = read_server_info()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(
+            pool.map(
+                lambda n: send_job(
+                    info, job(local_site.url(f"/article-{n}"), tmp_path / f"out-{n}", create_domain_subdir=False)
+                ),
+                range(4),
+            )
+        )
+
+    for n, result in enumerate(results):
+        assert result["error"] is None
+        assert f"Article {n}.md" in result["output"]
+        assert f"paragraph 0 of Article {n}" in (tmp_path / f"out-{n}" / f"Article {n}.md").read_text()
+
+
+def test_jobs_need_the_token_and_known_options(clip_server, local_site, tmp_path):
+    info = read_server_info()
+    url = local_site.url("/article")
+
+    with pytest.raises(ClipitError, match="token"):
+        send_job(ServerInfo(url=info.url, token="wrong", pid=info.pid), job(url, tmp_path))
+    with pytest.raises(ClipitError, match="Unknown job options: user_agent"):
+        send_job(info, job(url, tmp_path, user_agent="Evil/1.0"))
+    with pytest.raises(ClipitError, match="absolute"):
+        send_job(info, job(url, "relative"))
+    assert list(tmp_path.glob("*.md")) == []
+
+
+def test_the_cli_hands_single_urls_to_the_server(clip_server, local_site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_site.add("/article", article_html("Article"))
+    url = local_site.url("/article")
+    runner = CliRunner()
+
+    result = runner.invoke(main, [url, "--no-use-readability-js", "--no-create-domain-subdir"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "Article.md").exists()
+    assert "Article.md" in result.output
+
+    # Options the server can't honor mean clipping here, as does --no-server
+    for options in (["--user-agent", "Here/1.0"], ["--no-server", "--no-cache"]):
+        result = runner.invoke(
+            main, [url, "--no-use-readability-js", "--no-create-domain-subdir", "--overwrite", *options]
+        )
+        assert result.exit_code == 0, result.output
+    assert [headers["User-Agent"].split("/")[0] for _, headers in local_site.requests] == ["Server", "Here", "Clipit"]
+
+
+def test_the_server_file_is_private_and_removed_on_shutdown(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    with Clipper(cache_dir=None) as clipper:
+        server = ClipServer(clipper)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        while read_server_info() is None:
+            pass
+
+        assert default_server_file().stat().st_mode & 0o777 == 0o600
+        assert read_server_info().url == server.url
+
+        server.shutdown()
+        thread.join(timeout=10)
+    assert not default_server_file().exists()
+    # A server that's gone means clipping locally
+    assert send_job(ServerInfo(url=server.url, token=server.token, pid=0), job("http://example.com", tmp_path)) is None
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+from clipit.cli import main
+
+# What clipping needs, and --help or --version shouldn't wait for
+HEAVY_MODULES = ["requests", "urllib3", "readabilipy", "bs4", "lxml", "markdownify", "mdformat", "yaml", "asyncio"]
+
+
+def import_times(args: list[str]) -> dict[str, float]:
+    """Run clipit.cli.main with args under -X importtime, and return how long each module took, imports included."""
+    code = f"import sys; from clipit.cli import main; main({args!r})"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, timeout=60, check=False
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "[us]" not in line:
+            _, cumulative, name = line.removeprefix("import time:").split("|")
+            times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+@pytest.mark.parametrize("args", [["--help"], ["--version"], ["clip", "--help"], ["search", "--help"]])
+def test_help_and_version_only_import_what_they_need(args):
+    times = import_times(args)
+
+    # Not timed, that would fail on any busy machine, but these are what made startup slow
+    assert [module for module in HEAVY_MODULES if module in times] == []
+
+
+def test_help_lists_every_command_and_other_arguments_go_to_clip():
+    result = CliRunner().invoke(main, ["--help"])
+
+    assert result.exit_code == 0
+    assert [line.split()[0] for line in result.output.split("Commands:\n")[1].splitlines()] == [
+        "clip",
+        "search",
+        "serve",
+    ]
+    assert "--input" in CliRunner().invoke(main, ["clip", "--help"]).output
+    assert "Pass either a URL or --input" in CliRunner().invoke(main, []).output